@@ -2,7 +2,9 @@
 from django.contrib import admin
 from django.core.mail import send_mail
 from django.conf import settings
+from django.db import transaction
 from .models import UserProfile, Recipe, RecipeImage
+from .counters import COUNTER_FIELDS, RECIPE_COUNTER_FIELDS
 
 
 # Custom action to approve Chefs and Nutritionists
@@ -45,6 +47,8 @@ class UserProfileAdmin(admin.ModelAdmin):
     list_display = ('user', 'get_role', 'speciality', 'region', 'years_experience', 'user__is_active')
     list_filter = ('role', 'region', 'speciality')
     search_fields = ('user__username', 'user__email')
+    # Compteurs tenus par accounts/counters.py : les modifier ici les désynchroniserait
+    readonly_fields = COUNTER_FIELDS
     actions = [approve_professionals]
 
     def get_role(self, obj):
@@ -60,10 +64,18 @@ class RecipeAdmin(admin.ModelAdmin):
     list_display = ('title', 'author', 'created_at', 'is_approved', 'views')
     list_filter = ('is_approved', 'created_at', 'author')
     search_fields = ('title', 'author__username')
+    # Tenus par les signaux, le compteur de vues et les tâches de fond : jamais saisis à la main
+    readonly_fields = RECIPE_COUNTER_FIELDS + ('views', 'trending_score', 'cover_image')
     actions = ['approve_recipes']  # ← Now attached
 
     def approve_recipes(self, request, queryset):
-        updated = queryset.update(is_approved=True)
+        # save() plutôt que update() : les signaux mettent à jour les index de recherche
+        updated = 0
+        with transaction.atomic():
+            for recipe in queryset.filter(is_approved=False):
+                recipe.is_approved = True
+                recipe.save(update_fields=['is_approved'])
+                updated += 1
         self.message_user(request, f"{updated} recipe(s) approved successfully.")
     approve_recipes.short_description = "Approve selected recipes"
 
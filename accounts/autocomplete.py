@@ -0,0 +1,285 @@
+# accounts/autocomplete.py
+"""
+In-process prefix index behind the navbar autocomplete.
+
+Every worker keeps a sorted array of normalized keys (one per word position of
+each label, so "epi" finds "Chakchouka épicée") and answers lookups with a
+binary search: no database query on the request path.
+
+Ingredient entries are shared by the recipes that use them (their *owners*)
+and leave the index with the last approved recipe that has them.
+
+The index is loaded when the worker starts (see core/wsgi.py) and updated in
+place from the Recipe / UserProfile signals. Each change also bumps a
+generation number in the cache; a worker that sees a newer generation than its
+own (a change made by another worker) reloads the index in a background
+thread and keeps answering from the current one meanwhile, so no lookup waits
+for a reload. This only propagates across workers when CACHES points to a
+shared backend.
+"""
+import threading
+import time
+from bisect import bisect_left, insort
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection, DatabaseError
+from django.urls import reverse
+from django.utils.http import urlencode
+
+from .text import normalize, ingredient_words
+
+GENERATION_KEY = 'autocomplete:generation'
+
+
+class PrefixIndex:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._keys = []       # [(key, kind, ref)] trié
+        self._entries = {}    # (kind, ref) -> {'label', 'kind', 'url', 'keys'}
+        self._owners = {}     # (kind, ref) partagé -> {propriétaires}
+        self._owned = {}      # propriétaire -> {(kind, ref)}
+        self.generation = None
+        self.built_at = None
+
+    @staticmethod
+    def _keys_for(label):
+        words = normalize(label).split()
+        return [' '.join(words[i:]) for i in range(len(words))]
+
+    def _insert(self, kind, ref, label, url):
+        keys = self._keys_for(label)
+        self._entries[(kind, ref)] = {'label': label, 'kind': kind, 'url': url, 'keys': keys}
+        for key in keys:
+            insort(self._keys, (key, kind, ref))
+
+    def _delete(self, kind, ref):
+        entry = self._entries.pop((kind, ref), None)
+        if not entry:
+            return
+        for key in entry['keys']:
+            pos = bisect_left(self._keys, (key, kind, ref))
+            if pos < len(self._keys) and self._keys[pos] == (key, kind, ref):
+                del self._keys[pos]
+
+    def _share(self, owner, kind, ref, label, url):
+        if (kind, ref) not in self._entries:
+            self._insert(kind, ref, label, url)
+        self._owners.setdefault((kind, ref), set()).add(owner)
+        self._owned.setdefault(owner, set()).add((kind, ref))
+
+    def load(self, entries, shared=(), generation=None):
+        """
+        Replace the whole index with ``entries`` = [(kind, ref, label, url)]
+        and ``shared`` = [(owner, (kind, ref, label, url))].
+        """
+        fresh = PrefixIndex()
+        for kind, ref, label, url in entries:
+            fresh._insert(kind, ref, label, url)
+        for owner, entry in shared:
+            fresh._share(owner, *entry)
+        with self._lock:
+            self._keys, self._entries = fresh._keys, fresh._entries
+            self._owners, self._owned = fresh._owners, fresh._owned
+            self.generation = generation
+            self.built_at = time.monotonic()
+
+    def put(self, kind, ref, label, url):
+        with self._lock:
+            self._delete(kind, ref)
+            self._insert(kind, ref, label, url)
+
+    def discard(self, kind, ref):
+        with self._lock:
+            self._delete(kind, ref)
+
+    def share(self, owner, kind, ref, label, url):
+        """Add an entry shared by several owners; the first label is kept."""
+        with self._lock:
+            self._share(owner, kind, ref, label, url)
+
+    def release(self, owner, keep=()):
+        """Drop ``owner`` from its shared entries except ``keep``; entries left without owner go."""
+        with self._lock:
+            owned = self._owned.pop(owner, set())
+            kept = owned & set(keep)
+            if kept:
+                self._owned[owner] = kept
+            for kind_ref in owned - kept:
+                owners = self._owners.get(kind_ref, set())
+                owners.discard(owner)
+                if not owners:
+                    self._owners.pop(kind_ref, None)
+                    self._delete(*kind_ref)
+
+    def lookup(self, prefix, limit=10):
+        prefix = normalize(prefix)
+        if not prefix:
+            return []
+        results = []
+        seen = set()
+        # Sous le verrou : put() / discard() déplacent les clés de la liste pendant la recherche
+        with self._lock:
+            keys = self._keys
+            pos = bisect_left(keys, (prefix,))
+            while pos < len(keys) and len(results) < limit:
+                key, kind, ref = keys[pos]
+                if not key.startswith(prefix):
+                    break
+                entry = self._entries.get((kind, ref))
+                if entry and (kind, ref) not in seen:
+                    seen.add((kind, ref))
+                    results.append({'label': entry['label'], 'kind': kind, 'url': entry['url']})
+                pos += 1
+        return results
+
+    def __contains__(self, kind_ref):
+        return kind_ref in self._entries
+
+    def __len__(self):
+        return len(self._entries)
+
+
+index = PrefixIndex()
+
+
+# ====================== ENTRIES ======================
+def recipe_entry(pk, title):
+    return ('recipe', pk, title, reverse('accounts:recipe_detail', args=[pk]))
+
+
+def profile_entry(user_id, username, role):
+    if role == 'chef':
+        return ('chef', user_id, username, reverse('accounts:chef_profile_detail', args=[username]))
+    return ('nutritionist', user_id, username, reverse('accounts:nutritionist_sheets', args=[user_id]))
+
+
+def ingredient_entry(token, word):
+    return ('ingredient', token, word, reverse('accounts:search_recipes') + '?' + urlencode({'q': word}))
+
+
+def load_entries():
+    """``(entries, shared)`` for ``PrefixIndex.load``; ingredients are shared by their recipes."""
+    from .models import Recipe, UserProfile, SearchTerm
+
+    entries = [
+        recipe_entry(pk, title)
+        for pk, title in Recipe.objects.filter(is_approved=True).values_list('pk', 'title')
+    ]
+    entries += [
+        profile_entry(user_id, username, role)
+        for user_id, username, role in UserProfile.objects.filter(
+            role__in=['chef', 'nutritionist'], user__is_active=True
+        ).values_list('user_id', 'user__username', 'role')
+    ]
+    rows = SearchTerm.objects.filter(kind='ingredient', recipe__is_approved=True)\
+        .values_list('recipe_id', 'normalized', 'term')
+    by_token = {}
+    shared = []
+    for recipe_id, token, word in rows:
+        if token not in by_token:
+            by_token[token] = ingredient_entry(token, word)
+        shared.append((recipe_id, by_token[token]))
+    return entries, shared
+
+
+# ====================== CYCLE DE VIE ======================
+def _current_generation():
+    # Clé absente (jamais créée ou évincée) : repart d'une valeur jamais utilisée, cf. core/caching.py
+    return cache.get_or_set(GENERATION_KEY, time.time_ns, timeout=None)
+
+
+_rebuild_lock = threading.Lock()
+_rebuilding = False
+
+
+def rebuild():
+    # Génération lue avant les entrées : un changement pendant le chargement
+    # laisse l'index en retard d'une génération, il sera rechargé au prochain appel
+    generation = _current_generation()
+    entries, shared = load_entries()
+    index.load(entries, shared, generation=generation)
+
+
+def warm_up():
+    """Build the index at worker start-up; ignore a database that is not ready yet."""
+    try:
+        rebuild()
+    except DatabaseError:
+        pass
+
+
+def _rebuild_in_background():
+    global _rebuilding
+    try:
+        rebuild()
+    except DatabaseError:
+        pass  # l'ancien index reste servi : nouvel essai au prochain appel
+    finally:
+        connection.close()
+        with _rebuild_lock:
+            _rebuilding = False
+
+
+def ensure_fresh():
+    global _rebuilding
+    if index.built_at is None:
+        # Rien à servir (warm_up a échoué) : seul cas de chargement dans la requête
+        rebuild()
+        return
+    stale = index.generation != _current_generation() \
+        or time.monotonic() - index.built_at > settings.AUTOCOMPLETE_MAX_AGE
+    if not stale:
+        return
+    with _rebuild_lock:
+        if _rebuilding:
+            return
+        _rebuilding = True
+    threading.Thread(target=_rebuild_in_background, daemon=True).start()
+
+
+def _bump_generation():
+    try:
+        generation = cache.incr(GENERATION_KEY)
+    except ValueError:
+        generation = time.time_ns()
+        cache.set(GENERATION_KEY, generation, timeout=None)
+    # Ce worker applique lui-même le changement : pas besoin de recharger
+    if index.generation is not None and generation == index.generation + 1:
+        index.generation = generation
+
+
+def recipe_changed(recipe):
+    if index.built_at is not None:
+        if recipe.is_approved:
+            index.put(*recipe_entry(recipe.pk, recipe.title))
+            tokens = []
+            for token, word in ingredient_words(recipe.ingredients):
+                index.share(recipe.pk, *ingredient_entry(token, word))
+                tokens.append(('ingredient', token))
+            # Ingrédients retirés de la recette : supprimés s'ils n'appartiennent plus à aucune autre
+            index.release(recipe.pk, keep=tokens)
+        else:
+            index.discard('recipe', recipe.pk)
+            index.release(recipe.pk)
+    _bump_generation()
+
+
+def recipe_removed(recipe_id):
+    index.discard('recipe', recipe_id)
+    index.release(recipe_id)
+    _bump_generation()
+
+
+def profile_changed(profile):
+    if index.built_at is not None:
+        index.discard('chef', profile.user_id)
+        index.discard('nutritionist', profile.user_id)
+        if profile.role in ('chef', 'nutritionist') and profile.user.is_active:
+            index.put(*profile_entry(profile.user_id, profile.user.username, profile.role))
+    _bump_generation()
+
+
+def suggest(query, limit=None):
+    ensure_fresh()
+    return index.lookup(query, limit or settings.AUTOCOMPLETE_LIMIT)
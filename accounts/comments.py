@@ -0,0 +1,64 @@
+# accounts/comments.py
+"""
+Threaded comments of a recipe, loaded in a fixed number of queries.
+
+A page of top-level comments (keyset pagination, see accounts/pagination.py)
+is one query with the authors joined. The replies of the whole page are a
+second query: a ROW_NUMBER() window per thread keeps only the newest
+COMMENT_REPLIES_PREVIEW replies of each comment, and a COUNT() window gives
+the size of the thread. The tree is assembled in Python; the rest of a thread
+is served page by page by ``replies_page`` ("show more replies").
+
+Replies are only read one level deep, as the template shows them.
+"""
+from django.conf import settings
+from django.db.models import Count, F, Window
+from django.db.models.functions import RowNumber
+from django.utils.http import urlencode
+
+from .models import Comment
+from . import pagination
+
+
+def comment_page(request, recipe):
+    """KeysetPage of the recipe's top-level comments, each with ``reply_preview``."""
+    top_level = Comment.objects.filter(recipe=recipe, parent__isnull=True).select_related('author')
+    page = pagination.paginate(request, top_level, settings.COMMENTS_PAGE_SIZE, param='comments_cursor')
+    attach_replies(page.items)
+    return page
+
+
+def attach_replies(comments, limit=None):
+    """
+    Set ``reply_preview`` (newest replies first), ``reply_total`` and
+    ``more_replies_query`` (query string of the next replies page, or '') on
+    every comment of ``comments``, in one query.
+    """
+    limit = limit or settings.COMMENT_REPLIES_PREVIEW
+    by_id = {comment.pk: comment for comment in comments}
+    for comment in comments:
+        comment.reply_preview = []
+        comment.reply_total = 0
+        comment.more_replies_query = ''
+    if not by_id:
+        return
+
+    replies = Comment.objects.filter(parent_id__in=by_id).select_related('author').annotate(
+        position=Window(RowNumber(), partition_by=[F('parent_id')],
+                        order_by=[F('created_at').desc(), F('pk').desc()]),
+        thread_size=Window(Count('pk'), partition_by=[F('parent_id')]),
+    ).filter(position__lte=limit).order_by('parent_id', 'position')
+
+    for reply in replies:
+        parent = by_id[reply.parent_id]
+        parent.reply_preview.append(reply)
+        parent.reply_total = reply.thread_size
+    for comment in comments:
+        if comment.reply_total > len(comment.reply_preview):
+            comment.more_replies_query = urlencode({'cursor': pagination.cursor_after(comment.reply_preview[-1])})
+
+
+def replies_page(request, comment):
+    """KeysetPage of the replies of ``comment``, newest first."""
+    replies = comment.replies.select_related('author')
+    return pagination.paginate(request, replies, settings.COMMENT_REPLIES_PAGE_SIZE)
@@ -0,0 +1,97 @@
+# accounts/conditional.py
+"""
+Validators for conditional GET (``django.views.decorators.http.condition``).
+
+Each ETag is a hash of the version / timestamp / counter columns of what the
+page shows, read with one small query. When it matches the browser's
+If-None-Match the view is not run at all: 304, no rendering, no other query.
+
+The navbar depends on the visitor, so every ETag also covers the user (and
+their unread counts, accounts/unread.py), the query string (paginated
+pages) and the CSRF secret: a page kept by the browser must not come back
+with form tokens that no longer work (the secret rotates on login). A
+request with a pending flash message gets no ETag, so the message is always
+rendered.
+
+View counts are left out of the recipe and chef ETags on purpose: they
+change with every new visitor and would defeat 304s on popular pages. Like
+the page cache (accounts/pagecache.py), a 304 may show a slightly old count.
+"""
+import hashlib
+
+from django.contrib.messages import get_messages
+from django.db.models import Max, Count, Q, OuterRef, Subquery
+
+from .models import Recipe, UserProfile, NutritionFactSheet, SimilarRecipe, RECIPE_RATING_FIELDS
+from . import favorite_ids, unread
+
+
+def _etag(request, *parts):
+    if len(get_messages(request)):
+        return None
+    user = request.user
+    if user.is_authenticated:
+        # Les badges de la barre de navigation font partie de la page
+        counts = unread.counts(user)
+        who = f"u{user.pk}:{counts['notifications']}:{counts['messages']}"
+    else:
+        who = 'anonymous'
+    # Secret CSRF lu par CsrfViewMiddleware : change à chaque connexion
+    csrf = request.META.get('CSRF_COOKIE', '')
+    raw = '|'.join(str(part) for part in (who, csrf, request.get_full_path(), *parts))
+    return hashlib.md5(raw.encode()).hexdigest()
+
+
+# ====================== FICHE RECETTE ======================
+def recipe_state(request, pk):
+    """Validator columns of the approved recipe ``pk`` (None if not found), read once per request."""
+    if getattr(request, '_recipe_state_pk', None) != pk:
+        # similar : les voisines sont réécrites (nouveaux ids) par compute_similar_recipes
+        latest_link = SimilarRecipe.objects.filter(recipe=OuterRef('pk')).order_by('-pk').values('pk')[:1]
+        request._recipe_state = Recipe.objects.filter(pk=pk, is_approved=True) \
+            .annotate(similar=Subquery(latest_link)) \
+            .values('author_id', 'updated_at', 'comment_count', *RECIPE_RATING_FIELDS, 'similar').first()
+        request._recipe_state_pk = pk
+    return request._recipe_state
+
+
+def recipe_etag(request, pk):
+    state = recipe_state(request, pk)
+    if state is None:
+        return None
+    # Le bouton "Add to Favorites" dépend du visiteur (ensemble en cache, voir accounts/favorite_ids.py)
+    favorite = pk in favorite_ids.for_user(request.user)
+    return _etag(request, *state.values(), favorite)
+
+
+# ====================== PROFIL DE CHEF ======================
+def chef_etag(request, username):
+    state = UserProfile.objects.filter(user__username=username, role='chef').aggregate(
+        updated_at=Max('updated_at'),
+        recipes=Max('approved_recipe_count'),
+        latest_recipe=Max('user__recipes__updated_at', filter=Q(user__recipes__is_approved=True)),
+    )
+    if state['updated_at'] is None:
+        return None
+    return _etag(request, *state.values())
+
+
+# ====================== FICHES NUTRITION ======================
+def sheet_last_modified(request, pk):
+    # Lu une seule fois : condition() appelle les deux fonctions
+    if getattr(request, '_sheet_state_pk', None) != pk:
+        request._sheet_updated_at = NutritionFactSheet.objects.filter(pk=pk) \
+            .values_list('updated_at', flat=True).first()
+        request._sheet_state_pk = pk
+    return request._sheet_updated_at
+
+
+def sheet_etag(request, pk):
+    updated_at = sheet_last_modified(request, pk)
+    return _etag(request, updated_at) if updated_at else None
+
+
+def library_etag(request):
+    # Le nombre de fiches couvre les suppressions, que Max(updated_at) ne voit pas
+    state = NutritionFactSheet.objects.aggregate(updated_at=Max('updated_at'), count=Count('id'))
+    return _etag(request, *state.values())
@@ -0,0 +1,18 @@
+# accounts/context_processors.py
+from django.utils.functional import SimpleLazyObject
+
+from . import favorite_ids, unread
+
+
+def favorite_recipe_ids(request):
+    # Évalué au premier {% if recipe.pk in favorite_recipe_ids %} seulement
+    return {
+        'favorite_recipe_ids': SimpleLazyObject(lambda: favorite_ids.for_user(request.user)),
+    }
+
+
+def unread_counts(request):
+    # Badges de la barre de navigation : lus en cache (accounts/unread.py), seulement si affichés
+    return {
+        'unread_counts': SimpleLazyObject(lambda: unread.counts(request.user)),
+    }
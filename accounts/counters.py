@@ -0,0 +1,217 @@
+# accounts/counters.py
+"""
+Denormalized counters.
+
+UserProfile, for the chef / nutritionist directories: approved recipes, total
+views, ratings received (count and sum, for the average) and nutrition sheets.
+Recipe, for the detail page: ratings per star (1..5), comments and favorites.
+
+They are updated from the model signals (accounts/signals.py) with single
+``UPDATE ... SET x = x + delta`` statements, so concurrent updates do not
+overwrite each other and the change commits or rolls back with the write
+that caused it. Only what changed is applied: Recipe and Rating remember the
+values they were loaded with (``_loaded_values``). The
+``reconcile_profile_counters`` and ``reconcile_recipe_counters`` commands
+recompute everything from scratch.
+
+A profile counter update also bumps the ``profile:<user id>`` namespace, so
+the profile cached by accounts/objcache.py is never older than its counters.
+"""
+from django.db.models import F, Count, Sum, OuterRef, Subquery, IntegerField
+from django.db.models.functions import Coalesce, Greatest
+from django.utils import timezone
+
+from core import caching
+
+from . import objcache
+from .models import UserProfile, Recipe, Rating, Comment, Favorite, NutritionFactSheet, RECIPE_RATING_FIELDS
+
+COUNTER_FIELDS = ('approved_recipe_count', 'total_views', 'rating_count', 'rating_sum', 'sheet_count')
+RECIPE_COUNTER_FIELDS = RECIPE_RATING_FIELDS + ('comment_count', 'favorite_count')
+
+
+def _apply(queryset, deltas):
+    changes = {}
+    for field, delta in deltas.items():
+        if delta > 0:
+            changes[field] = F(field) + delta
+        elif delta < 0:
+            changes[field] = Greatest(F(field) + delta, 0)
+    if changes:
+        if queryset.model is Recipe:
+            # Marque la recette pour le prochain refresh_trending (accounts/trending.py)
+            changes['activity_at'] = timezone.now()
+        queryset.update(**changes)
+    return bool(changes)
+
+
+def bump(user_id, **deltas):
+    if _apply(UserProfile.objects.filter(user_id=user_id), deltas):
+        caching.bump(objcache.profile_namespace(user_id))
+
+
+def bump_recipe(recipe_id, **deltas):
+    # update() direct : pas de post_save Recipe (ni réindexation), updated_at inchangé
+    _apply(Recipe.objects.filter(pk=recipe_id), deltas)
+
+
+def bump_many(queryset, key, field, deltas):
+    """Add ``deltas`` = {key value: delta} to ``field``: one UPDATE per distinct delta."""
+    by_delta = {}
+    for value, delta in deltas.items():
+        by_delta.setdefault(delta, []).append(value)
+    for delta, values in by_delta.items():
+        _apply(queryset.filter(**{f'{key}__in': values}), {field: delta})
+
+
+def bump_profiles(field, deltas):
+    """``bump_many`` on the profiles, ``deltas`` = {user id: delta}."""
+    bump_many(UserProfile.objects.all(), 'user_id', field, deltas)
+    caching.bump(*(objcache.profile_namespace(user_id) for user_id, delta in deltas.items() if delta))
+
+
+def _is_recipe_deletion(origin):
+    # Les notes supprimées en cascade avec leur recette sont déjà décomptées
+    return isinstance(origin, Recipe) or getattr(origin, 'model', None) is Recipe
+
+
+# ====================== RECETTES ======================
+def recipe_saved(recipe, created):
+    loaded = getattr(recipe, '_loaded_values', None)
+    if created:
+        bump(recipe.author_id, approved_recipe_count=int(recipe.is_approved), total_views=recipe.views)
+    elif loaded is not None:
+        deltas = {}
+        if 'is_approved' in loaded:
+            deltas['approved_recipe_count'] = int(recipe.is_approved) - int(loaded['is_approved'])
+        if 'views' in loaded:
+            deltas['total_views'] = recipe.views - loaded['views']
+        bump(recipe.author_id, **deltas)
+    recipe._loaded_values = {'is_approved': recipe.is_approved, 'views': recipe.views}
+
+
+def recipe_deleting(recipe):
+    ratings = recipe.ratings.aggregate(count=Count('id'), total=Sum('score'))
+    bump(
+        recipe.author_id,
+        approved_recipe_count=-int(recipe.is_approved),
+        total_views=-recipe.views,
+        rating_count=-ratings['count'],
+        rating_sum=-(ratings['total'] or 0),
+    )
+
+
+# ====================== NOTES ======================
+def rating_saved(rating, created):
+    loaded = getattr(rating, '_loaded_values', None)
+    if created:
+        bump(rating.recipe.author_id, rating_count=1, rating_sum=rating.score)
+        bump_recipe(rating.recipe_id, **{f'rating_{rating.score}_count': 1})
+    elif loaded is not None and 'score' in loaded and loaded['score'] != rating.score:
+        bump(rating.recipe.author_id, rating_sum=rating.score - loaded['score'])
+        bump_recipe(rating.recipe_id, **{
+            f'rating_{loaded["score"]}_count': -1,
+            f'rating_{rating.score}_count': 1,
+        })
+    rating._loaded_values = {'score': rating.score}
+
+
+def rating_deleted(rating, origin=None):
+    if _is_recipe_deletion(origin):
+        return
+    author_id = Recipe.objects.filter(pk=rating.recipe_id).values_list('author_id', flat=True).first()
+    if author_id:
+        bump(author_id, rating_count=-1, rating_sum=-rating.score)
+        bump_recipe(rating.recipe_id, **{f'rating_{rating.score}_count': -1})
+
+
+# ====================== COMMENTAIRES ET FAVORIS ======================
+def comment_saved(comment, created):
+    if created:
+        bump_recipe(comment.recipe_id, comment_count=1)
+
+
+def comment_deleted(comment, origin=None):
+    if not _is_recipe_deletion(origin):
+        bump_recipe(comment.recipe_id, comment_count=-1)
+
+
+def favorite_saved(favorite, created):
+    if created:
+        bump_recipe(favorite.recipe_id, favorite_count=1)
+
+
+def favorite_deleted(favorite, origin=None):
+    if not _is_recipe_deletion(origin):
+        bump_recipe(favorite.recipe_id, favorite_count=-1)
+
+
+# ====================== FICHES NUTRITION ======================
+def sheet_saved(sheet, created):
+    if created:
+        bump(sheet.nutritionist_id, sheet_count=1)
+
+
+def sheet_deleted(sheet):
+    bump(sheet.nutritionist_id, sheet_count=-1)
+
+
+# ====================== RÉCONCILIATION ======================
+def _per_user(queryset, user_field, aggregate):
+    rows = queryset.filter(**{user_field: OuterRef('user_id')}).order_by()\
+        .values(user_field).annotate(value=aggregate).values('value')
+    return Coalesce(Subquery(rows, output_field=IntegerField()), 0)
+
+
+def reconcile():
+    """Recompute every profile's counters; returns the profiles that had drifted."""
+    profiles = UserProfile.objects.annotate(
+        real_approved_recipe_count=_per_user(Recipe.objects.filter(is_approved=True), 'author', Count('id')),
+        real_total_views=_per_user(Recipe.objects.all(), 'author', Sum('views')),
+        real_rating_count=_per_user(Rating.objects.all(), 'recipe__author', Count('id')),
+        real_rating_sum=_per_user(Rating.objects.all(), 'recipe__author', Sum('score')),
+        real_sheet_count=_per_user(NutritionFactSheet.objects.all(), 'nutritionist', Count('id')),
+    )
+    drifted = []
+    for profile in profiles.iterator():
+        changed = False
+        for field in COUNTER_FIELDS:
+            real = getattr(profile, f'real_{field}')
+            if getattr(profile, field) != real:
+                setattr(profile, field, real)
+                changed = True
+        if changed:
+            drifted.append(profile)
+    UserProfile.objects.bulk_update(drifted, COUNTER_FIELDS, batch_size=500)
+    caching.bump(*(objcache.profile_namespace(profile.user_id) for profile in drifted))
+    return drifted
+
+
+def _per_recipe(queryset, aggregate):
+    rows = queryset.filter(recipe=OuterRef('pk')).order_by().values('recipe').annotate(value=aggregate).values('value')
+    return Coalesce(Subquery(rows, output_field=IntegerField()), 0)
+
+
+def reconcile_recipes():
+    """Recompute every recipe's engagement counters; returns the recipes that had drifted."""
+    real = {
+        f'real_rating_{stars}_count': _per_recipe(Rating.objects.filter(score=stars), Count('id'))
+        for stars in range(1, 6)
+    }
+    real['real_comment_count'] = _per_recipe(Comment.objects.all(), Count('id'))
+    real['real_favorite_count'] = _per_recipe(Favorite.objects.all(), Count('id'))
+    recipes = Recipe.objects.annotate(**real).only('pk', 'activity_at', *RECIPE_COUNTER_FIELDS)
+
+    drifted = []
+    for recipe in recipes.iterator():
+        changed = False
+        for field in RECIPE_COUNTER_FIELDS:
+            value = getattr(recipe, f'real_{field}')
+            if getattr(recipe, field) != value:
+                setattr(recipe, field, value)
+                changed = True
+        if changed:
+            recipe.activity_at = timezone.now()
+            drifted.append(recipe)
+    Recipe.objects.bulk_update(drifted, RECIPE_COUNTER_FIELDS + ('activity_at',), batch_size=500)
+    return drifted
@@ -0,0 +1,117 @@
+# accounts/dedup.py
+"""
+Near-duplicate detection for the moderation queue (MinHash + LSH).
+
+A recipe is reduced to a set of shingles: its ingredient tokens and the
+3-word shingles of its normalized steps. The MinHash signature (NUM_HASHES
+minimums of universal hash functions) estimates the Jaccard similarity of two
+such sets: the share of equal positions.
+
+The signature is cut into BANDS bands of ROWS values; each band is hashed to a
+bucket stored in LshBucket. Two recipes become candidates when they share at
+least one bucket, so finding the near-duplicates of a new recipe is a handful
+of indexed lookups instead of a comparison with every recipe. Candidates with
+an estimated similarity above DUPLICATE_SIMILARITY_THRESHOLD are stored in
+DuplicateCandidate, in both directions.
+
+Signatures are computed from the Recipe post_save signal (accounts/signals.py).
+"""
+import hashlib
+import random
+import struct
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+
+from .models import Recipe, RecipeSignature, LshBucket, DuplicateCandidate
+from .text import normalize, ingredient_tokens
+
+NUM_HASHES = 64
+BANDS = 16
+ROWS = NUM_HASHES // BANDS    # seuil LSH ≈ (1 / BANDS) ** (1 / ROWS) = 0.5
+SHINGLE_SIZE = 3
+
+_PRIME = (1 << 61) - 1
+_rng = random.Random(20240101)  # graine fixe : les signatures stockées restent comparables
+_COEFFICIENTS = [(_rng.randrange(1, _PRIME), _rng.randrange(0, _PRIME)) for _ in range(NUM_HASHES)]
+_FORMAT = f'<{NUM_HASHES}Q'
+
+
+def _hash64(value):
+    return int.from_bytes(hashlib.blake2b(value.encode(), digest_size=8).digest(), 'little')
+
+
+def shingles(ingredients, steps):
+    items = {'ing:' + token for token in ingredient_tokens(ingredients)}
+    words = normalize(steps).split()
+    items.update(' '.join(words[i:i + SHINGLE_SIZE]) for i in range(max(len(words) - SHINGLE_SIZE + 1, 1)))
+    items.discard('')
+    return items
+
+
+def minhash(items):
+    """MinHash signature of a set of strings (tuple of NUM_HASHES ints), or None if empty."""
+    if not items:
+        return None
+    hashes = [_hash64(item) for item in items]
+    return tuple(min((a * h + b) % _PRIME for h in hashes) for a, b in _COEFFICIENTS)
+
+
+def band_buckets(signature):
+    """``[(band, bucket)]`` of a signature, buckets as signed 64-bit ints."""
+    buckets = []
+    for band in range(BANDS):
+        values = signature[band * ROWS:(band + 1) * ROWS]
+        digest = hashlib.blake2b(struct.pack(f'<{ROWS}Q', *values), digest_size=8).digest()
+        buckets.append((band, int.from_bytes(digest, 'little', signed=True)))
+    return buckets
+
+
+def similarity(signature, other):
+    return sum(1 for a, b in zip(signature, other) if a == b) / NUM_HASHES
+
+
+def pack(signature):
+    return struct.pack(_FORMAT, *signature)
+
+
+def unpack(data):
+    return struct.unpack(_FORMAT, bytes(data))
+
+
+def index_recipe(recipe):
+    """
+    Recompute the signature and buckets of ``recipe`` and its duplicate
+    candidates. Returns the list of DuplicateCandidate rows found.
+    """
+    signature = minhash(shingles(recipe.ingredients, recipe.steps))
+    with transaction.atomic():
+        LshBucket.objects.filter(recipe=recipe).delete()
+        DuplicateCandidate.objects.filter(Q(recipe=recipe) | Q(duplicate=recipe)).delete()
+        if signature is None:
+            RecipeSignature.objects.filter(recipe=recipe).delete()
+            return []
+
+        RecipeSignature.objects.update_or_create(recipe=recipe, defaults={'minhash': pack(signature)})
+        buckets = band_buckets(signature)
+        LshBucket.objects.bulk_create([
+            LshBucket(band=band, bucket=bucket, recipe=recipe) for band, bucket in buckets
+        ])
+
+        lookup = Q()
+        for band, bucket in buckets:
+            lookup |= Q(band=band, bucket=bucket)
+        candidate_ids = set(
+            LshBucket.objects.filter(lookup).exclude(recipe=recipe).values_list('recipe_id', flat=True)
+        )
+
+        found = []
+        for other_id, data in RecipeSignature.objects.filter(recipe_id__in=candidate_ids)\
+                .values_list('recipe_id', 'minhash'):
+            score = similarity(signature, unpack(data))
+            if score >= settings.DUPLICATE_SIMILARITY_THRESHOLD:
+                found.append(DuplicateCandidate(recipe=recipe, duplicate_id=other_id, similarity=score))
+                found.append(DuplicateCandidate(recipe_id=other_id, duplicate=recipe, similarity=score))
+        DuplicateCandidate.objects.bulk_create(found)
+    return [candidate for candidate in found if candidate.recipe_id == recipe.pk]
@@ -0,0 +1,70 @@
+# accounts/detail_page.py
+"""
+Everything the recipe detail page shows, loaded in a fixed number of queries
+whatever the number of images, ratings, comments or similar recipes:
+
+    1  the recipe, its author, its analysis and the analysis' nutritionist
+    1  the images
+       (both 0 when the recipe is in the object cache, accounts/objcache.py)
+    1  one page of individual ratings, with their authors
+    1  the similar recipes, with their authors
+    2  one page of comment threads (see accounts/comments.py)
+
+so at most MAX_QUERIES. What the request itself costs comes on top: the
+session, the user, the user's profile and favorite ids when logged in.
+Every row is read with the columns the template uses (``only``).
+"""
+from django.conf import settings
+from django.db.models import Prefetch
+from django.http import Http404
+
+from .models import Recipe, RecipeImage, RECIPE_RATING_FIELDS
+from . import comments, pagination, objcache
+
+MAX_QUERIES = 6
+
+RECIPE_FIELDS = (
+    'title', 'description', 'ingredients', 'steps', 'prep_time', 'cook_time', 'servings',
+    'views', 'is_approved', 'created_at', 'updated_at', 'comment_count', *RECIPE_RATING_FIELDS,
+    'author__username',
+    'analysis__calories', 'analysis__proteins', 'analysis__carbs', 'analysis__fats',
+    'analysis__health_rating', 'analysis__comment', 'analysis__analyzed_at', 'analysis__nutritionist__username',
+)
+CARD_FIELDS = ('title', 'cover_image', 'author__username')
+
+
+def _load_recipe(pk):
+    return Recipe.objects.filter(pk=pk, is_approved=True) \
+        .select_related('author', 'analysis__nutritionist') \
+        .only(*RECIPE_FIELDS) \
+        .prefetch_related(Prefetch('images', RecipeImage.objects.only('recipe_id', 'image').order_by('pk'))) \
+        .first()
+
+
+def load(request, pk):
+    """Template context of ``public/recipe_detail.html`` for the approved recipe ``pk``."""
+    # Recette et images en cache objet (accounts/objcache.py), invalidé avec le scope recipe:<pk>
+    recipe = objcache.lookup('recipe_detail', pk, lambda: _load_recipe(pk), [f'recipe:{pk}'])
+    if recipe is None:
+        raise Http404("No Recipe matches the given query.")
+
+    ratings = recipe.ratings.select_related('author').only('score', 'created_at', 'recipe_id', 'author__username')
+    rating_page = pagination.paginate(request, ratings, settings.RATINGS_PAGE_SIZE, param='ratings_cursor')
+
+    # Recettes similaires : précalculées par la commande compute_similar_recipes
+    similar_links = recipe.similar_links.filter(similar__is_approved=True) \
+        .select_related('similar', 'similar__author') \
+        .only('recipe_id', *(f'similar__{field}' for field in CARD_FIELDS))[:settings.SIMILAR_RECIPES_COUNT]
+
+    comment_page = comments.comment_page(request, recipe)
+    return {
+        'recipe': recipe,
+        'images': list(recipe.images.all()),
+        'avg_rating': recipe.average_rating,
+        'rating_count': recipe.rating_count,
+        'individual_ratings': rating_page,
+        'rating_page': rating_page,
+        'similar_recipes': [link.similar for link in similar_links],
+        'comments': comment_page,
+        'comment_page': comment_page,
+    }
@@ -0,0 +1,139 @@
+# accounts/facets.py
+"""
+Facet filters for the public recipe list.
+
+All facet counts are computed in ONE aggregate query: every (facet, value)
+pair is a ``Count(filter=...)`` over the approved recipes. As usual with
+facets, the count shown for a value applies the filters selected in the
+*other* facets, so a user can still switch value inside a facet.
+
+Results are cached per filter combination in the ``facets`` namespace of
+core/caching.py, bumped by the signals whenever a recipe, analysis or profile
+changes.
+"""
+import hashlib
+
+from django.conf import settings
+from django.db.models import Q, Count
+from django.utils.http import urlencode
+
+from core import caching
+
+from .models import UserProfile, RecipeAnalysis
+
+NAMESPACE = 'facets'
+
+
+def _range(field, low, high):
+    q = Q(**{f'{field}__gte': low})
+    if high is not None:
+        q &= Q(**{f'{field}__lte': high})
+    return q
+
+
+def _time_options(field):
+    return [
+        ('0-15', '≤ 15 min', _range(field, 0, 15)),
+        ('16-30', '16 – 30 min', _range(field, 16, 30)),
+        ('31-60', '31 – 60 min', _range(field, 31, 60)),
+        ('60+', '> 60 min', _range(field, 61, None)),
+    ]
+
+
+# (nom du paramètre GET, libellé, [(valeur, libellé, Q)])
+FACETS = [
+    ('prep', 'Prep time', _time_options('prep_time')),
+    ('cook', 'Cook time', _time_options('cook_time')),
+    ('servings', 'Servings', [
+        ('1-2', '1 – 2', _range('servings', 1, 2)),
+        ('3-4', '3 – 4', _range('servings', 3, 4)),
+        ('5-6', '5 – 6', _range('servings', 5, 6)),
+        ('7+', '7 +', _range('servings', 7, None)),
+    ]),
+    ('speciality', 'Chef speciality', [
+        (value, label, Q(author__userprofile__speciality=value))
+        for value, label in UserProfile.SPECIALITY_CHOICES
+    ]),
+    ('region', 'Region', [
+        (value, label, Q(author__userprofile__region=value))
+        for value, label in UserProfile.REGION_CHOICES
+    ]),
+    ('health', 'Health rating', [
+        (str(value), label, Q(analysis__health_rating=value))
+        for value, label in RecipeAnalysis.HEALTH_RATING_CHOICES
+    ]),
+]
+
+_OPTIONS = {name: {value: q for value, label, q in options} for name, label, options in FACETS}
+
+
+def selected_filters(params):
+    """Valid facet selections found in a QueryDict, e.g. ``{'region': 'sfax'}``."""
+    selected = {}
+    for name, options in _OPTIONS.items():
+        value = params.get(name)
+        if value in options:
+            selected[name] = value
+    return selected
+
+
+def _selection_q(selected, exclude=None):
+    q = Q()
+    for name, value in selected.items():
+        if name != exclude:
+            q &= _OPTIONS[name][value]
+    return q
+
+
+def filter_recipes(queryset, selected):
+    return queryset.filter(_selection_q(selected)) if selected else queryset
+
+
+def _cache_key(selected):
+    raw = urlencode(sorted(selected.items()))
+    return 'facets:' + hashlib.md5(raw.encode()).hexdigest()
+
+
+def bump_version():
+    caching.bump(NAMESPACE)
+
+
+def _count_facets(queryset, selected):
+    aggregates = {}
+    for name, label, options in FACETS:
+        others = _selection_q(selected, exclude=name)
+        for value, value_label, q in options:
+            aggregates[f'{name}__{value}'] = Count('id', filter=others & q)
+    return queryset.aggregate(**aggregates)
+
+
+def facet_counts(queryset, selected):
+    """
+    Facets ready for the template, with a live count for every value.
+
+    ``queryset`` is the unfiltered base queryset (approved recipes).
+    """
+    counts = caching.cached(
+        _cache_key(selected), lambda: _count_facets(queryset, selected),
+        settings.FACET_CACHE_TIMEOUT, namespaces=[NAMESPACE],
+    )
+
+    facets = []
+    for name, label, options in FACETS:
+        facet_options = []
+        for value, value_label, q in options:
+            is_selected = selected.get(name) == value
+            toggled = dict(selected)
+            if is_selected:
+                toggled.pop(name)
+            else:
+                toggled[name] = value
+            facet_options.append({
+                'value': value,
+                'label': value_label,
+                'count': counts[f'{name}__{value}'],
+                'selected': is_selected,
+                'query': urlencode(toggled),
+            })
+        facets.append({'name': name, 'label': label, 'options': facet_options})
+    return facets
@@ -0,0 +1,31 @@
+# accounts/favorite_ids.py
+"""
+Set of the recipe ids a user has favorited, for the "Add to Favorites" checks.
+
+The set is cached per user (one query on a miss) and dropped by
+``toggle_favorite``; templates get it lazily, once per request, through the
+``favorite_recipe_ids`` context processor.
+"""
+from django.conf import settings
+from django.core.cache import cache
+
+from .models import Favorite
+
+
+def _cache_key(user_id):
+    return f'favorites:ids:{user_id}'
+
+
+def for_user(user):
+    if not user.is_authenticated:
+        return frozenset()
+    key = _cache_key(user.pk)
+    ids = cache.get(key)
+    if ids is None:
+        ids = frozenset(Favorite.objects.filter(user=user).values_list('recipe_id', flat=True))
+        cache.set(key, ids, settings.FAVORITE_IDS_CACHE_TIMEOUT)
+    return ids
+
+
+def invalidate(user_id):
+    cache.delete(_cache_key(user_id))
@@ -0,0 +1,91 @@
+# accounts/ingredients.py
+"""
+"Cook with what I have": an inverted index from normalized ingredient tokens
+to recipes (IngredientPosting), maintained from the Recipe signals.
+
+A query is one grouped aggregate over the postings: for every recipe that
+has at least one of the visitor's ingredients, the number it has (matched)
+and the size of its ingredient list, ranked and limited in SQL. Only the
+top rows come back to Python.
+"""
+import re
+from collections import defaultdict
+
+from django.conf import settings
+from django.db.models import Count, F, Q
+
+from .models import Recipe, IngredientPosting
+from .text import ingredient_tokens
+
+_SEPARATORS_RE = re.compile(r'[,;+\n]')
+
+# Au-delà, les ingrédients tapés sont ignorés (taille de la requête bornée)
+MAX_PANTRY_INGREDIENTS = 50
+
+
+def parse_pantry(text):
+    """Tokens of what the visitor typed: "tomatoes, eggs, harissa"."""
+    return ingredient_tokens('\n'.join(_SEPARATORS_RE.split(text or '')))[:MAX_PANTRY_INGREDIENTS]
+
+
+def index_recipe_ingredients(recipe):
+    IngredientPosting.objects.filter(recipe=recipe).delete()
+    IngredientPosting.objects.bulk_create([
+        IngredientPosting(token=token[:100], recipe=recipe)
+        for token in ingredient_tokens(recipe.ingredients)
+    ])
+
+
+def rebuild_index():
+    IngredientPosting.objects.all().delete()
+    for recipe in Recipe.objects.only('pk', 'ingredients').iterator():
+        index_recipe_ingredients(recipe)
+    return IngredientPosting.objects.count()
+
+
+def recipes_for_pantry(tokens, limit=None):
+    """
+    Rank approved recipes by how well ``tokens`` cover them.
+
+    Returns dicts with the recipe, the matched / missing counts and the share
+    of the recipe's ingredients the visitor already has. Recipes containing
+    every requested ingredient (the intersection of all posting lists) come
+    first, then recipes needing the fewest extra ingredients.
+    """
+    limit = limit or settings.SEARCH_RESULTS_LIMIT
+    tokens = list(dict.fromkeys(tokens))[:MAX_PANTRY_INGREDIENTS]
+    if not tokens:
+        return []
+
+    # Recettes ayant au moins un des ingrédients : sous-requête sur l'index (token, recipe)
+    candidates = IngredientPosting.objects.filter(token__in=tokens).values('recipe_id')
+    ranked = list(
+        IngredientPosting.objects.filter(recipe_id__in=candidates, recipe__is_approved=True)
+        .values('recipe_id')
+        .annotate(matched_count=Count('id', filter=Q(token__in=tokens)), total=Count('id'))
+        .annotate(missing_count=F('total') - F('matched_count'))
+        # Toutes les demandes couvertes = matched_count maximal : ces recettes viennent d'abord
+        .order_by('-matched_count', 'missing_count', '-recipe_id')[:limit]
+    )
+    if not ranked:
+        return []
+
+    matched = defaultdict(set)
+    rows = IngredientPosting.objects.filter(recipe_id__in=[row['recipe_id'] for row in ranked], token__in=tokens)\
+        .values_list('recipe_id', 'token')
+    for recipe_id, token in rows:
+        matched[recipe_id].add(token)
+
+    recipes = Recipe.objects.select_related('author')\
+        .in_bulk([row['recipe_id'] for row in ranked])
+    results = []
+    for row in ranked:
+        if row['recipe_id'] not in recipes:
+            continue
+        total = row.pop('total')
+        row['recipe'] = recipes[row['recipe_id']]
+        row['matched'] = [token for token in tokens if token in matched[row['recipe_id']]]
+        row['coverage'] = row['matched_count'] / total if total else 0
+        row['has_everything'] = row['matched_count'] == len(tokens)
+        results.append(row)
+    return results
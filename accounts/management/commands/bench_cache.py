@@ -0,0 +1,89 @@
+import multiprocessing
+import os
+import tempfile
+import time
+
+from django.core.cache.backends.filebased import FileBasedCache
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.management.base import BaseCommand
+
+from core.cache_backends import SQLiteCache
+
+# Valeur typique : une petite liste d'objets sérialisés (ex. ensemble de favoris, page en cache)
+SAMPLE_VALUE = {'ids': list(range(50)), 'content': 'x' * 2000}
+
+
+def _backends(directory):
+    params = {'TIMEOUT': 300, 'OPTIONS': {'MAX_ENTRIES': 100000}}
+    return [
+        ('LocMemCache', LocMemCache('bench', params)),
+        ('FileBasedCache', FileBasedCache(os.path.join(directory, 'files'), params)),
+        ('SQLiteCache', SQLiteCache(
+            os.path.join(directory, 'cache.sqlite3'),
+            {'TIMEOUT': 300, 'OPTIONS': {'MAX_ENTRIES': 100000, 'COMPACT_INTERVAL': 0}},
+        )),
+    ]
+
+
+def _operations(cache, ops):
+    keys = [f'bench:{i}' for i in range(ops)]
+    cache.set('bench:counter', 0)
+    return [
+        ('set', lambda i: cache.set(keys[i], SAMPLE_VALUE)),
+        ('get (hit)', lambda i: cache.get(keys[i])),
+        ('get (miss)', lambda i: cache.get(f'bench:missing:{i}')),
+        ('get_many (10)', lambda i: cache.get_many(keys[i:i + 10])),
+        ('add', lambda i: cache.add(keys[i], SAMPLE_VALUE)),
+        ('incr', lambda i: cache.incr('bench:counter')),
+    ]
+
+
+def _incr_worker(cache, count):
+    for i in range(count):
+        try:
+            cache.incr('bench:shared')
+        except ValueError:
+            pass
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark the SQLite cache backend (core/cache_backends.py) against LocMemCache and FileBasedCache: "
+        "operations per second, then a multi-process incr() to check that workers share one coherent counter."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--ops', type=int, default=2000, help="Operations per measure (default 2000).")
+        parser.add_argument('--processes', type=int, default=4, help="Processes of the shared counter test (default 4).")
+
+    def handle(self, *args, **options):
+        ops, processes = options['ops'], options['processes']
+        with tempfile.TemporaryDirectory() as directory:
+            backends = _backends(directory)
+
+            self.stdout.write(f"Operations per second ({ops} operations each):")
+            names = [name for name, cache in backends]
+            self.stdout.write(f"  {'':<15}" + ''.join(f"{name:>16}" for name in names))
+            results = {}
+            for name, cache in backends:
+                for label, operation in _operations(cache, ops):
+                    started = time.perf_counter()
+                    for i in range(ops):
+                        operation(i)
+                    results[label, name] = ops / (time.perf_counter() - started)
+            for label, operation in _operations(backends[0][1], 0):
+                self.stdout.write(f"  {label:<15}" + ''.join(f"{results[label, name]:>16,.0f}" for name in names))
+
+            self.stdout.write(f"\nShared counter: {processes} processes x {ops} incr()")
+            context = multiprocessing.get_context('fork')
+            for name, cache in backends:
+                cache.set('bench:shared', 0)
+                workers = [context.Process(target=_incr_worker, args=(cache, ops)) for i in range(processes)]
+                for worker in workers:
+                    worker.start()
+                for worker in workers:
+                    worker.join()
+                value = cache.get('bench:shared')
+                expected = processes * ops
+                status = self.style.SUCCESS('coherent') if value == expected else self.style.WARNING('incoherent')
+                self.stdout.write(f"  {name:<15} {value:>8} / {expected}  {status}")
@@ -0,0 +1,85 @@
+import time
+
+from django.contrib.auth.models import User
+from django.db import connection, transaction
+from django.test import Client
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.core.management.base import BaseCommand
+from django.urls import reverse
+
+from accounts import objcache, viewcounter
+from accounts.models import Recipe, UserProfile, NutritionFactSheet
+from core import caching
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure the database round-trips and time of the detail pages (recipe, chef, chef recipes, nutrition sheet) "
+        "for a logged-in visitor, without and with the object cache (accounts/objcache.py). "
+        "Runs in a transaction that is rolled back."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=50, help="Requests per page and mode (default 50).")
+
+    def handle(self, *args, **options):
+        pages = self._pages()
+        if not pages:
+            self.stdout.write(self.style.WARNING("No approved recipe, chef or nutrition sheet to request."))
+            return
+
+        with transaction.atomic():
+            visitor = User.objects.create_user(username='bench-objcache', password=None)
+            UserProfile.objects.create(user=visitor, role='visitor')
+            client = Client(HTTP_HOST='localhost')
+            client.force_login(visitor)
+
+            self.stdout.write(f"{'page':<28}{'queries':>16}{'ms / request':>22}")
+            self.stdout.write(f"{'':<28}{'off':>8}{'on':>8}{'off':>11}{'on':>11}")
+            for label, url in pages:
+                without = self._measure(client, url, options['requests'], size=0)
+                objcache.clear()
+                client.get(url)   # remplit le cache
+                with_cache = self._measure(client, url, options['requests'])
+                self.stdout.write(
+                    f"{label:<28}{without[0]:>8}{with_cache[0]:>8}{without[1]:>11.2f}{with_cache[1]:>11.2f}"
+                )
+
+            # Vues comptées par le banc : écrites puis annulées avec la transaction
+            viewcounter.flush()
+            transaction.set_rollback(True)
+
+        self.stdout.write("")
+        for group, values in sorted(caching.stats().items()):
+            if group.startswith('obj.'):
+                self.stdout.write(
+                    f"  {group:<20} hits {values.get('hits', 0):>6}  misses {values.get('misses', 0):>4}  "
+                    f"hit rate {values['hit_rate']:.0%}"
+                )
+
+    def _pages(self):
+        pages = []
+        recipe_id = Recipe.objects.filter(is_approved=True).values_list('pk', flat=True).first()
+        if recipe_id:
+            pages.append(('recipe detail', reverse('accounts:recipe_detail', args=[recipe_id])))
+        chef = UserProfile.objects.filter(role='chef').values_list('user__username', flat=True).first()
+        if chef:
+            pages.append(('chef profile', reverse('accounts:chef_profile_detail', args=[chef])))
+            pages.append(('chef recipes', reverse('accounts:chef_recipes', args=[chef])))
+        sheet_id = NutritionFactSheet.objects.values_list('pk', flat=True).first()
+        if sheet_id:
+            pages.append(('nutrition sheet', reverse('accounts:public_nutrition_sheet_detail', args=[sheet_id])))
+        return pages
+
+    def _measure(self, client, url, count, **settings):
+        """(queries of one request, average ms per request) with ``settings`` overridden."""
+        with override_settings(**settings):
+            with CaptureQueriesContext(connection) as queries:
+                client.get(url)
+            # Lu tout de suite : chaque requête vide le journal des requêtes SQL
+            query_count = len(queries)
+            started = time.perf_counter()
+            for i in range(count):
+                client.get(url)
+            elapsed = time.perf_counter() - started
+        return query_count, elapsed * 1000 / count
@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+
+from accounts import similarity
+
+
+class Command(BaseCommand):
+    help = (
+        "Rebuild the item-item neighbours (favorites and ratings) and every user's "
+        "'for you' recommendations. Run it periodically (e.g. nightly cron). Requires NumPy and SciPy."
+    )
+
+    def handle(self, *args, **options):
+        links, users = similarity.compute_recommendations(stdout=self.stdout)
+        self.stdout.write(self.style.SUCCESS(
+            f"Recommendations rebuilt: {links} item-item link(s), {users} user(s)."
+        ))
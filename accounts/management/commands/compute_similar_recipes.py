@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from accounts import similarity
+
+
+class Command(BaseCommand):
+    help = (
+        "Compute the 'similar recipes' lists (TF-IDF cosine similarity). "
+        "Incremental by default; run it periodically (e.g. cron). Requires NumPy and SciPy."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--full', action='store_true', help="Recompute every recipe, not only the changed ones.")
+
+    def handle(self, *args, **options):
+        count = similarity.compute_similar_recipes(full=options['full'], stdout=self.stdout)
+        self.stdout.write(self.style.SUCCESS(f"Similar recipes refreshed for {count} recipe(s)."))
@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+
+from accounts import search, ingredients
+
+
+class Command(BaseCommand):
+    help = "Rebuild the recipe search indexes (FTS5 full-text, trigram and ingredients) from scratch."
+
+    def handle(self, *args, **options):
+        if search.fts_available():
+            count = search.rebuild_index()
+            self.stdout.write(self.style.SUCCESS(f"Full-text index rebuilt: {count} recipe(s) indexed."))
+        else:
+            self.stdout.write(self.style.WARNING("FTS5 index is only available on SQLite, skipped."))
+
+        terms = search.rebuild_fuzzy_index()
+        self.stdout.write(self.style.SUCCESS(f"Trigram index rebuilt: {terms} term(s) indexed."))
+
+        postings = ingredients.rebuild_index()
+        self.stdout.write(self.style.SUCCESS(f"Ingredient index rebuilt: {postings} posting(s)."))
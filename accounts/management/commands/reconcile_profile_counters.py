@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+
+from accounts import counters
+
+
+class Command(BaseCommand):
+    help = "Recompute the denormalized profile counters (recipes, views, ratings, sheets) and fix any drift."
+
+    def handle(self, *args, **options):
+        drifted = counters.reconcile()
+        for profile in drifted:
+            self.stdout.write(f"  fixed profile of user #{profile.user_id}")
+        self.stdout.write(self.style.SUCCESS(f"Profile counters reconciled: {len(drifted)} profile(s) corrected."))
@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+
+from accounts import counters
+
+
+class Command(BaseCommand):
+    help = (
+        "Recompute the recipe engagement counters (rating histogram, comments, favorites) and fix any drift. "
+        "Run it periodically (e.g. nightly cron)."
+    )
+
+    def handle(self, *args, **options):
+        drifted = counters.reconcile_recipes()
+        for recipe in drifted:
+            self.stdout.write(f"  fixed recipe #{recipe.pk}")
+        self.stdout.write(self.style.SUCCESS(f"Recipe counters reconciled: {len(drifted)} recipe(s) corrected."))
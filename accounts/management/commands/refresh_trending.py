@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from accounts import trending
+
+
+class Command(BaseCommand):
+    help = (
+        "Refresh the time-decayed trending score of the recipes. Incremental by default; "
+        "run it periodically (e.g. every 15 minutes)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--full', action='store_true', help="Recompute every recipe, not only the active ones.")
+
+    def handle(self, *args, **options):
+        count = trending.refresh_scores(full=options['full'])
+        self.stdout.write(self.style.SUCCESS(f"Trending scores updated for {count} recipe(s)."))
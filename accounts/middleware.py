@@ -0,0 +1,20 @@
+# accounts/middleware.py
+from django.contrib.auth.middleware import get_user
+from django.utils.functional import SimpleLazyObject
+
+from . import objcache
+
+
+class UserProfileCacheMiddleware:
+    """
+    Serve ``request.user.userprofile`` (navbar, role checks of the views) from
+    the object cache (accounts/objcache.py) instead of one query per request.
+    Goes right after AuthenticationMiddleware; the user stays lazy.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        request.user = SimpleLazyObject(lambda: objcache.attach_profile(get_user(request)))
+        return self.get_response(request)
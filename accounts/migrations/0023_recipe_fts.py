@@ -0,0 +1,34 @@
+# Full-text search index for recipes (SQLite FTS5).
+
+from django.db import migrations
+
+
+def create_fts_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    schema_editor.execute(
+        "CREATE VIRTUAL TABLE IF NOT EXISTS accounts_recipe_fts USING fts5("
+        "title, description, ingredients, steps, "
+        "tokenize = 'unicode61 remove_diacritics 2')"
+    )
+    schema_editor.execute(
+        "INSERT INTO accounts_recipe_fts (rowid, title, description, ingredients, steps) "
+        "SELECT id, title, description, ingredients, steps FROM accounts_recipe"
+    )
+
+
+def drop_fts_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    schema_editor.execute("DROP TABLE IF EXISTS accounts_recipe_fts")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0022_alter_recipeanalysis_options_and_more'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_fts_index, drop_fts_index),
+    ]
@@ -0,0 +1,176 @@
+# Generated by Django 5.2.18 on 2026-10-16 23:15
+
+import re
+import unicodedata
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+# ---- Copie figée de accounts/text.py : la migration ne doit pas suivre les évolutions du module ----
+# Translittération arabe -> latin (usage tunisien / francophone)
+ARABIC_TO_LATIN = {
+    'ا': 'a', 'أ': 'a', 'إ': 'i', 'آ': 'a', 'ى': 'a', 'ة': 'a', 'ء': '',
+    'ؤ': 'ou', 'ئ': 'i', 'ب': 'b', 'ت': 't', 'ث': 'th', 'ج': 'j', 'ح': 'h',
+    'خ': 'kh', 'د': 'd', 'ذ': 'dh', 'ر': 'r', 'ز': 'z', 'س': 's', 'ش': 'ch',
+    'ص': 's', 'ض': 'd', 'ط': 't', 'ظ': 'dh', 'ع': 'a', 'غ': 'gh', 'ف': 'f',
+    'ق': 'k', 'ك': 'k', 'ل': 'l', 'م': 'm', 'ن': 'n', 'ه': 'h', 'و': 'ou',
+    'ي': 'i', 'ـ': '',
+}
+
+# Variantes orthographiques courantes, appliquées dans cet ordre
+SPELLING_FOLDS = (
+    ('sh', 'ch'),
+    ('sch', 'ch'),
+    ('ck', 'k'),
+    ('q', 'k'),
+    ('ph', 'f'),
+    ('ou', 'u'),
+    ('oo', 'u'),
+    ('ee', 'i'),
+    ('y', 'i'),
+)
+
+_NON_WORD_RE = re.compile(r'[^a-z0-9]+')
+_REPEAT_RE = re.compile(r'(.)\1+')
+
+# Mots ignorés dans les lignes d'ingrédients
+INGREDIENT_STOPWORDS = {
+    'a', 'au', 'aux', 'de', 'd', 'du', 'des', 'la', 'le', 'les', 'l', 'un', 'une',
+    'et', 'ou', 'en', 'pour', 'avec', 'of', 'the', 'and', 'or', 'to', 'for', 'with',
+    'g', 'gr', 'kg', 'mg', 'ml', 'cl', 'dl', 'l', 'c', 'cs', 'cc', 'cuillere', 'cuilleres',
+    'soupe', 'cafe', 'tbsp', 'tsp', 'cup', 'cups', 'tasse', 'tasses', 'verre', 'verres',
+    'pincee', 'pinch', 'gousse', 'gousses', 'clove', 'cloves', 'botte', 'bunch',
+    'piece', 'pieces', 'tranche', 'tranches', 'slice', 'slices', 'boite', 'can',
+    'petit', 'petite', 'petits', 'petites', 'gros', 'grosse', 'grand', 'grande',
+    'large', 'small', 'medium', 'frais', 'fraiche', 'fresh', 'hache', 'hachee',
+    'chopped', 'moulu', 'ground', 'sel', 'salt', 'poivre', 'pepper', 'eau', 'water',
+}
+
+
+def strip_accents(text):
+    text = ''.join(ARABIC_TO_LATIN.get(ch, ch) for ch in text)
+    decomposed = unicodedata.normalize('NFKD', text)
+    return ''.join(ch for ch in decomposed if not unicodedata.combining(ch))
+
+
+def fold_word(word):
+    for old, new in SPELLING_FOLDS:
+        word = word.replace(old, new)
+    return _REPEAT_RE.sub(r'\1', word)
+
+
+def normalize(text):
+    """Lower-case, accent-free, transliterated and spelling-folded form of ``text``."""
+    if not text:
+        return ''
+    text = _NON_WORD_RE.sub(' ', strip_accents(text).lower())
+    return ' '.join(fold_word(word) for word in text.split())
+
+
+def trigrams(text):
+    """Set of padded trigrams of an already normalized string (pg_trgm style)."""
+    grams = set()
+    for word in text.split():
+        padded = f'  {word} '
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return grams
+
+
+def stem(word):
+    """Very small plural stripper, good enough for ingredient names (FR/EN)."""
+    if len(word) > 4 and word.endswith('ies'):
+        return word[:-3] + 'i'
+    if len(word) > 4 and word.endswith('oes'):
+        return word[:-2]
+    if len(word) > 2 and word[-1] in 'sx' and word[-2] != 's':
+        return word[:-1]
+    return word
+
+
+_FOLDED_STOPWORDS = {fold_word(word) for word in INGREDIENT_STOPWORDS}
+
+
+def ingredient_tokens(text):
+    """
+    Normalized ingredient tokens of a free-text ingredient list (one per line).
+
+    Quantities, units and filler words are dropped, so "2 c. à soupe de harissa"
+    and "Harissa" both give ``['harisa']``. Order is preserved, duplicates removed.
+    """
+    tokens = []
+    seen = set()
+    for line in (text or '').splitlines():
+        for word in normalize(line).split():
+            if word.isdigit() or word in _FOLDED_STOPWORDS or len(word) < 2:
+                continue
+            word = stem(word)
+            if word not in seen:
+                seen.add(word)
+                tokens.append(word)
+    return tokens
+# ---- fin de la copie ----
+
+
+def build_trigram_index(apps, schema_editor):
+    Recipe = apps.get_model('accounts', 'Recipe')
+    UserProfile = apps.get_model('accounts', 'UserProfile')
+    SearchTerm = apps.get_model('accounts', 'SearchTerm')
+    SearchTrigram = apps.get_model('accounts', 'SearchTrigram')
+
+    def create_terms(entries, **owner):
+        for kind, term, normalized in entries:
+            grams = trigrams(normalized)
+            if not grams:
+                continue
+            search_term = SearchTerm.objects.create(
+                kind=kind, term=term[:200], normalized=normalized[:200],
+                trigram_count=len(grams), **owner
+            )
+            SearchTrigram.objects.bulk_create([
+                SearchTrigram(trigram=gram, kind=kind, term=search_term) for gram in grams
+            ])
+
+    for recipe in Recipe.objects.all():
+        entries = [('recipe', recipe.title, normalize(recipe.title))]
+        entries += [('ingredient', token, token) for token in ingredient_tokens(recipe.ingredients)]
+        create_terms(entries, recipe=recipe)
+
+    for profile in UserProfile.objects.filter(role='chef').select_related('user'):
+        create_terms([('chef', profile.user.username, normalize(profile.user.username))], user=profile.user)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0023_recipe_fts'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SearchTerm',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('recipe', 'Recipe title'), ('chef', 'Chef username'), ('ingredient', 'Ingredient')], max_length=20)),
+                ('term', models.CharField(max_length=200)),
+                ('normalized', models.CharField(max_length=200)),
+                ('trigram_count', models.PositiveSmallIntegerField()),
+                ('recipe', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='search_terms', to='accounts.recipe')),
+                ('user', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='search_terms', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='SearchTrigram',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('trigram', models.CharField(max_length=3)),
+                ('kind', models.CharField(choices=[('recipe', 'Recipe title'), ('chef', 'Chef username'), ('ingredient', 'Ingredient')], max_length=20)),
+                ('term', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='trigrams', to='accounts.searchterm')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['trigram', 'kind', 'term'], name='searchtrigram_lookup_idx')],
+            },
+        ),
+        migrations.RunPython(build_trigram_index, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,119 @@
+# Generated by Django 5.2.18 on 2026-10-16 23:18
+
+import re
+import unicodedata
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+# ---- Copie figée de accounts/text.py : la migration ne doit pas suivre les évolutions du module ----
+ARABIC_TO_LATIN = {
+    'ا': 'a', 'أ': 'a', 'إ': 'i', 'آ': 'a', 'ى': 'a', 'ة': 'a', 'ء': '',
+    'ؤ': 'ou', 'ئ': 'i', 'ب': 'b', 'ت': 't', 'ث': 'th', 'ج': 'j', 'ح': 'h',
+    'خ': 'kh', 'د': 'd', 'ذ': 'dh', 'ر': 'r', 'ز': 'z', 'س': 's', 'ش': 'ch',
+    'ص': 's', 'ض': 'd', 'ط': 't', 'ظ': 'dh', 'ع': 'a', 'غ': 'gh', 'ف': 'f',
+    'ق': 'k', 'ك': 'k', 'ل': 'l', 'م': 'm', 'ن': 'n', 'ه': 'h', 'و': 'ou',
+    'ي': 'i', 'ـ': '',
+}
+
+SPELLING_FOLDS = (
+    ('sh', 'ch'),
+    ('sch', 'ch'),
+    ('ck', 'k'),
+    ('q', 'k'),
+    ('ph', 'f'),
+    ('ou', 'u'),
+    ('oo', 'u'),
+    ('ee', 'i'),
+    ('y', 'i'),
+)
+
+_NON_WORD_RE = re.compile(r'[^a-z0-9]+')
+_REPEAT_RE = re.compile(r'(.)\1+')
+
+INGREDIENT_STOPWORDS = {
+    'a', 'au', 'aux', 'de', 'd', 'du', 'des', 'la', 'le', 'les', 'l', 'un', 'une',
+    'et', 'ou', 'en', 'pour', 'avec', 'of', 'the', 'and', 'or', 'to', 'for', 'with',
+    'g', 'gr', 'kg', 'mg', 'ml', 'cl', 'dl', 'l', 'c', 'cs', 'cc', 'cuillere', 'cuilleres',
+    'soupe', 'cafe', 'tbsp', 'tsp', 'cup', 'cups', 'tasse', 'tasses', 'verre', 'verres',
+    'pincee', 'pinch', 'gousse', 'gousses', 'clove', 'cloves', 'botte', 'bunch',
+    'piece', 'pieces', 'tranche', 'tranches', 'slice', 'slices', 'boite', 'can',
+    'petit', 'petite', 'petits', 'petites', 'gros', 'grosse', 'grand', 'grande',
+    'large', 'small', 'medium', 'frais', 'fraiche', 'fresh', 'hache', 'hachee',
+    'chopped', 'moulu', 'ground', 'sel', 'salt', 'poivre', 'pepper', 'eau', 'water',
+}
+
+
+def strip_accents(text):
+    text = ''.join(ARABIC_TO_LATIN.get(ch, ch) for ch in text)
+    decomposed = unicodedata.normalize('NFKD', text)
+    return ''.join(ch for ch in decomposed if not unicodedata.combining(ch))
+
+
+def fold_word(word):
+    for old, new in SPELLING_FOLDS:
+        word = word.replace(old, new)
+    return _REPEAT_RE.sub(r'\1', word)
+
+
+def stem(word):
+    if len(word) > 4 and word.endswith('ies'):
+        word = word[:-3] + 'i'
+    elif len(word) > 4 and word.endswith('oes'):
+        word = word[:-2]
+    elif len(word) > 2 and word[-1] in 'sx' and word[-2] != 's':
+        word = word[:-1]
+    if len(word) > 4 and word[-1] in 'eo':
+        word = word[:-1]
+    return word
+
+
+_FOLDED_STOPWORDS = {fold_word(word) for word in INGREDIENT_STOPWORDS}
+
+
+def ingredient_tokens(text):
+    tokens = []
+    seen = set()
+    for line in (text or '').splitlines():
+        for raw in _NON_WORD_RE.sub(' ', strip_accents(line).lower()).split():
+            word = fold_word(raw)
+            if word.isdigit() or word in _FOLDED_STOPWORDS or len(word) < 2:
+                continue
+            token = stem(word)
+            if token not in seen:
+                seen.add(token)
+                tokens.append(token)
+    return tokens
+# ---- fin de la copie ----
+
+
+def build_ingredient_index(apps, schema_editor):
+    Recipe = apps.get_model('accounts', 'Recipe')
+    IngredientPosting = apps.get_model('accounts', 'IngredientPosting')
+    for recipe in Recipe.objects.only('pk', 'ingredients'):
+        IngredientPosting.objects.bulk_create([
+            IngredientPosting(token=token[:100], recipe=recipe)
+            for token in ingredient_tokens(recipe.ingredients)
+        ])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0024_searchterm_searchtrigram'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='IngredientPosting',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('token', models.CharField(max_length=100)),
+                ('recipe', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='ingredient_postings', to='accounts.recipe')),
+            ],
+            options={
+                'unique_together': {('token', 'recipe')},
+            },
+        ),
+        migrations.RunPython(build_ingredient_index, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 5.2.18 on 2026-10-16 23:24
+
+from datetime import datetime, timezone as dt_timezone
+
+from django.db import migrations, models
+
+# Valeurs figées de accounts/trending.py et de TRENDING_HALF_LIFE_HOURS au moment de la migration
+EPOCH = datetime(2024, 1, 1, tzinfo=dt_timezone.utc)
+HALF_LIFE = 72 * 3600
+
+
+def set_baseline_scores(apps, schema_editor):
+    # Score sans engagement (log2(1) = 0) ; la commande refresh_trending ajoute le reste
+    Recipe = apps.get_model('accounts', 'Recipe')
+    recipes = list(Recipe.objects.only('pk', 'created_at'))
+    for recipe in recipes:
+        recipe.trending_score = round((recipe.created_at - EPOCH).total_seconds() / HALF_LIFE, 6)
+    Recipe.objects.bulk_update(recipes, ['trending_score'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0027_recipecosimilarity_userrecommendation'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recipe',
+            name='trending_score',
+            field=models.FloatField(db_index=True, default=0),
+        ),
+        migrations.RunPython(set_baseline_scores, migrations.RunPython.noop),
+    ]
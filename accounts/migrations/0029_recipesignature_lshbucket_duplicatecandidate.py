@@ -0,0 +1,220 @@
+# Generated by Django 5.2.18 on 2026-10-16 23:25
+
+import hashlib
+import random
+import re
+import struct
+import unicodedata
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+# ---- Copie figée de accounts/text.py et accounts/dedup.py : la migration ne doit pas suivre leurs évolutions ----
+ARABIC_TO_LATIN = {
+    'ا': 'a', 'أ': 'a', 'إ': 'i', 'آ': 'a', 'ى': 'a', 'ة': 'a', 'ء': '',
+    'ؤ': 'ou', 'ئ': 'i', 'ب': 'b', 'ت': 't', 'ث': 'th', 'ج': 'j', 'ح': 'h',
+    'خ': 'kh', 'د': 'd', 'ذ': 'dh', 'ر': 'r', 'ز': 'z', 'س': 's', 'ش': 'ch',
+    'ص': 's', 'ض': 'd', 'ط': 't', 'ظ': 'dh', 'ع': 'a', 'غ': 'gh', 'ف': 'f',
+    'ق': 'k', 'ك': 'k', 'ل': 'l', 'م': 'm', 'ن': 'n', 'ه': 'h', 'و': 'ou',
+    'ي': 'i', 'ـ': '',
+}
+
+SPELLING_FOLDS = (
+    ('sh', 'ch'),
+    ('sch', 'ch'),
+    ('ck', 'k'),
+    ('q', 'k'),
+    ('ph', 'f'),
+    ('ou', 'u'),
+    ('oo', 'u'),
+    ('ee', 'i'),
+    ('y', 'i'),
+)
+
+_NON_WORD_RE = re.compile(r'[^a-z0-9]+')
+_REPEAT_RE = re.compile(r'(.)\1+')
+
+INGREDIENT_STOPWORDS = {
+    'a', 'au', 'aux', 'de', 'd', 'du', 'des', 'la', 'le', 'les', 'l', 'un', 'une',
+    'et', 'ou', 'en', 'pour', 'avec', 'of', 'the', 'and', 'or', 'to', 'for', 'with',
+    'g', 'gr', 'kg', 'mg', 'ml', 'cl', 'dl', 'l', 'c', 'cs', 'cc', 'cuillere', 'cuilleres',
+    'soupe', 'cafe', 'tbsp', 'tsp', 'cup', 'cups', 'tasse', 'tasses', 'verre', 'verres',
+    'pincee', 'pinch', 'gousse', 'gousses', 'clove', 'cloves', 'botte', 'bunch',
+    'piece', 'pieces', 'tranche', 'tranches', 'slice', 'slices', 'boite', 'can',
+    'petit', 'petite', 'petits', 'petites', 'gros', 'grosse', 'grand', 'grande',
+    'large', 'small', 'medium', 'frais', 'fraiche', 'fresh', 'hache', 'hachee',
+    'chopped', 'moulu', 'ground', 'sel', 'salt', 'poivre', 'pepper', 'eau', 'water',
+}
+
+
+def strip_accents(text):
+    text = ''.join(ARABIC_TO_LATIN.get(ch, ch) for ch in text)
+    decomposed = unicodedata.normalize('NFKD', text)
+    return ''.join(ch for ch in decomposed if not unicodedata.combining(ch))
+
+
+def fold_word(word):
+    for old, new in SPELLING_FOLDS:
+        word = word.replace(old, new)
+    return _REPEAT_RE.sub(r'\1', word)
+
+
+def normalize(text):
+    if not text:
+        return ''
+    text = _NON_WORD_RE.sub(' ', strip_accents(text).lower())
+    return ' '.join(fold_word(word) for word in text.split())
+
+
+def stem(word):
+    if len(word) > 4 and word.endswith('ies'):
+        word = word[:-3] + 'i'
+    elif len(word) > 4 and word.endswith('oes'):
+        word = word[:-2]
+    elif len(word) > 2 and word[-1] in 'sx' and word[-2] != 's':
+        word = word[:-1]
+    if len(word) > 4 and word[-1] in 'eo':
+        word = word[:-1]
+    return word
+
+
+_FOLDED_STOPWORDS = {fold_word(word) for word in INGREDIENT_STOPWORDS}
+
+
+def ingredient_tokens(text):
+    tokens = []
+    seen = set()
+    for line in (text or '').splitlines():
+        for raw in _NON_WORD_RE.sub(' ', strip_accents(line).lower()).split():
+            word = fold_word(raw)
+            if word.isdigit() or word in _FOLDED_STOPWORDS or len(word) < 2:
+                continue
+            token = stem(word)
+            if token not in seen:
+                seen.add(token)
+                tokens.append(token)
+    return tokens
+
+NUM_HASHES = 64
+BANDS = 16
+ROWS = NUM_HASHES // BANDS
+SHINGLE_SIZE = 3
+SIMILARITY_THRESHOLD = 0.7
+
+_PRIME = (1 << 61) - 1
+_rng = random.Random(20240101)
+_COEFFICIENTS = [(_rng.randrange(1, _PRIME), _rng.randrange(0, _PRIME)) for _ in range(NUM_HASHES)]
+_FORMAT = f'<{NUM_HASHES}Q'
+
+
+def _hash64(value):
+    return int.from_bytes(hashlib.blake2b(value.encode(), digest_size=8).digest(), 'little')
+
+
+def shingles(ingredients, steps):
+    items = {'ing:' + token for token in ingredient_tokens(ingredients)}
+    words = normalize(steps).split()
+    items.update(' '.join(words[i:i + SHINGLE_SIZE]) for i in range(max(len(words) - SHINGLE_SIZE + 1, 1)))
+    items.discard('')
+    return items
+
+
+def minhash(items):
+    if not items:
+        return None
+    hashes = [_hash64(item) for item in items]
+    return tuple(min((a * h + b) % _PRIME for h in hashes) for a, b in _COEFFICIENTS)
+
+
+def band_buckets(signature):
+    buckets = []
+    for band in range(BANDS):
+        values = signature[band * ROWS:(band + 1) * ROWS]
+        digest = hashlib.blake2b(struct.pack(f'<{ROWS}Q', *values), digest_size=8).digest()
+        buckets.append((band, int.from_bytes(digest, 'little', signed=True)))
+    return buckets
+
+
+def similarity(signature, other):
+    return sum(1 for a, b in zip(signature, other) if a == b) / NUM_HASHES
+
+
+def pack(signature):
+    return struct.pack(_FORMAT, *signature)
+# ---- fin de la copie ----
+
+
+def build_duplicate_index(apps, schema_editor):
+    Recipe = apps.get_model('accounts', 'Recipe')
+    RecipeSignature = apps.get_model('accounts', 'RecipeSignature')
+    LshBucket = apps.get_model('accounts', 'LshBucket')
+    DuplicateCandidate = apps.get_model('accounts', 'DuplicateCandidate')
+
+    signatures, members = {}, {}
+    for recipe in Recipe.objects.only('pk', 'ingredients', 'steps').order_by('pk'):
+        signature = minhash(shingles(recipe.ingredients, recipe.steps))
+        if signature is None:
+            continue
+        signatures[recipe.pk] = signature
+        RecipeSignature.objects.create(recipe_id=recipe.pk, minhash=pack(signature))
+        buckets = band_buckets(signature)
+        LshBucket.objects.bulk_create([
+            LshBucket(band=band, bucket=bucket, recipe_id=recipe.pk) for band, bucket in buckets
+        ])
+        for key in buckets:
+            members.setdefault(key, set()).add(recipe.pk)
+
+    pairs = {
+        (a, b) for recipe_ids in members.values()
+        for a in recipe_ids for b in recipe_ids if a < b
+    }
+    candidates = []
+    for a, b in pairs:
+        score = similarity(signatures[a], signatures[b])
+        if score >= SIMILARITY_THRESHOLD:
+            candidates.append(DuplicateCandidate(recipe_id=a, duplicate_id=b, similarity=score))
+            candidates.append(DuplicateCandidate(recipe_id=b, duplicate_id=a, similarity=score))
+    DuplicateCandidate.objects.bulk_create(candidates)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0028_recipe_trending_score'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RecipeSignature',
+            fields=[
+                ('recipe', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='signature', serialize=False, to='accounts.recipe')),
+                ('minhash', models.BinaryField()),
+            ],
+        ),
+        migrations.CreateModel(
+            name='DuplicateCandidate',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('similarity', models.FloatField()),
+                ('duplicate', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='accounts.recipe')),
+                ('recipe', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='duplicate_candidates', to='accounts.recipe')),
+            ],
+            options={
+                'ordering': ['-similarity'],
+                'unique_together': {('recipe', 'duplicate')},
+            },
+        ),
+        migrations.CreateModel(
+            name='LshBucket',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('band', models.PositiveSmallIntegerField()),
+                ('bucket', models.BigIntegerField()),
+                ('recipe', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='lsh_buckets', to='accounts.recipe')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['band', 'bucket'], name='lshbucket_lookup_idx')],
+            },
+        ),
+        migrations.RunPython(build_duplicate_index, migrations.RunPython.noop),
+    ]
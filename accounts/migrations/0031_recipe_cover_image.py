@@ -0,0 +1,31 @@
+# Generated by Django 5.2.18 on 2026-10-16 23:27
+
+from django.db import migrations, models
+
+
+def set_cover_images(apps, schema_editor):
+    Recipe = apps.get_model('accounts', 'Recipe')
+    RecipeImage = apps.get_model('accounts', 'RecipeImage')
+    covers = {}
+    for recipe_id, image in RecipeImage.objects.order_by('-pk').values_list('recipe_id', 'image'):
+        covers[recipe_id] = image  # la plus petite pk gagne, comme images.first
+    recipes = list(Recipe.objects.filter(pk__in=covers).only('pk'))
+    for recipe in recipes:
+        recipe.cover_image = covers[recipe.pk]
+    Recipe.objects.bulk_update(recipes, ['cover_image'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0030_keyset_pagination_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recipe',
+            name='cover_image',
+            field=models.ImageField(blank=True, upload_to='recipes/'),
+        ),
+        migrations.RunPython(set_cover_images, migrations.RunPython.noop),
+    ]
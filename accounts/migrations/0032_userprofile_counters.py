@@ -0,0 +1,67 @@
+# Generated by Django 5.2.18 on 2026-10-16 23:29
+
+from django.db import migrations, models
+from django.db.models import Count, Sum
+
+
+def fill_counters(apps, schema_editor):
+    UserProfile = apps.get_model('accounts', 'UserProfile')
+    Recipe = apps.get_model('accounts', 'Recipe')
+    Rating = apps.get_model('accounts', 'Rating')
+    NutritionFactSheet = apps.get_model('accounts', 'NutritionFactSheet')
+
+    approved = dict(Recipe.objects.filter(is_approved=True).values('author').annotate(n=Count('id')).values_list('author', 'n'))
+    views = dict(Recipe.objects.values('author').annotate(n=Sum('views')).values_list('author', 'n'))
+    ratings = {
+        row['recipe__author']: row
+        for row in Rating.objects.values('recipe__author').annotate(n=Count('id'), total=Sum('score'))
+    }
+    sheets = dict(NutritionFactSheet.objects.values('nutritionist').annotate(n=Count('id')).values_list('nutritionist', 'n'))
+
+    profiles = list(UserProfile.objects.all())
+    for profile in profiles:
+        rating = ratings.get(profile.user_id, {})
+        profile.approved_recipe_count = approved.get(profile.user_id, 0)
+        profile.total_views = views.get(profile.user_id) or 0
+        profile.rating_count = rating.get('n', 0)
+        profile.rating_sum = rating.get('total') or 0
+        profile.sheet_count = sheets.get(profile.user_id, 0)
+    UserProfile.objects.bulk_update(
+        profiles, ['approved_recipe_count', 'total_views', 'rating_count', 'rating_sum', 'sheet_count'], batch_size=500
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0031_recipe_cover_image'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='userprofile',
+            name='approved_recipe_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='userprofile',
+            name='rating_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='userprofile',
+            name='rating_sum',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='userprofile',
+            name='sheet_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='userprofile',
+            name='total_views',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(fill_counters, migrations.RunPython.noop),
+    ]
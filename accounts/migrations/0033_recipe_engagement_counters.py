@@ -0,0 +1,75 @@
+# Generated by Django 5.2.18 on 2026-10-16 23:31
+
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def fill_counters(apps, schema_editor):
+    Recipe = apps.get_model('accounts', 'Recipe')
+    Rating = apps.get_model('accounts', 'Rating')
+    Comment = apps.get_model('accounts', 'Comment')
+    Favorite = apps.get_model('accounts', 'Favorite')
+
+    histogram = {}
+    for row in Rating.objects.values('recipe', 'score').annotate(n=Count('id')):
+        histogram.setdefault(row['recipe'], {})[row['score']] = row['n']
+    comments = dict(Comment.objects.values('recipe').annotate(n=Count('id')).values_list('recipe', 'n'))
+    favorites = dict(Favorite.objects.values('recipe').annotate(n=Count('id')).values_list('recipe', 'n'))
+
+    recipes = list(Recipe.objects.only('pk'))
+    for recipe in recipes:
+        for stars in range(1, 6):
+            setattr(recipe, f'rating_{stars}_count', histogram.get(recipe.pk, {}).get(stars, 0))
+        recipe.comment_count = comments.get(recipe.pk, 0)
+        recipe.favorite_count = favorites.get(recipe.pk, 0)
+    Recipe.objects.bulk_update(
+        recipes,
+        [f'rating_{stars}_count' for stars in range(1, 6)] + ['comment_count', 'favorite_count'],
+        batch_size=500,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0032_userprofile_counters'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recipe',
+            name='comment_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='recipe',
+            name='favorite_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='recipe',
+            name='rating_1_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='recipe',
+            name='rating_2_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='recipe',
+            name='rating_3_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='recipe',
+            name='rating_4_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='recipe',
+            name='rating_5_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(fill_counters, migrations.RunPython.noop),
+    ]
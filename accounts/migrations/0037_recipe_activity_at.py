@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-17 00:03
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0036_searchterm_ingredient_words'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recipe',
+            name='activity_at',
+            field=models.DateTimeField(blank=True, db_index=True, null=True),
+        ),
+    ]
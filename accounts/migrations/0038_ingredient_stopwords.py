@@ -0,0 +1,132 @@
+# Generated by Django 5.2.18 on 2026-10-17 00:40
+
+import re
+import unicodedata
+
+from django.db import migrations
+
+# ---- Copie figée de accounts/text.py : la migration ne doit pas suivre les évolutions du module ----
+ARABIC_TO_LATIN = {
+    'ا': 'a', 'أ': 'a', 'إ': 'i', 'آ': 'a', 'ى': 'a', 'ة': 'a', 'ء': '',
+    'ؤ': 'ou', 'ئ': 'i', 'ب': 'b', 'ت': 't', 'ث': 'th', 'ج': 'j', 'ح': 'h',
+    'خ': 'kh', 'د': 'd', 'ذ': 'dh', 'ر': 'r', 'ز': 'z', 'س': 's', 'ش': 'ch',
+    'ص': 's', 'ض': 'd', 'ط': 't', 'ظ': 'dh', 'ع': 'a', 'غ': 'gh', 'ف': 'f',
+    'ق': 'k', 'ك': 'k', 'ل': 'l', 'م': 'm', 'ن': 'n', 'ه': 'h', 'و': 'ou',
+    'ي': 'i', 'ـ': '',
+}
+
+SPELLING_FOLDS = (
+    ('sh', 'ch'),
+    ('sch', 'ch'),
+    ('ck', 'k'),
+    ('q', 'k'),
+    ('ph', 'f'),
+    ('ou', 'u'),
+    ('oo', 'u'),
+    ('ee', 'i'),
+    ('y', 'i'),
+)
+
+_NON_WORD_RE = re.compile(r'[^a-z0-9]+')
+_REPEAT_RE = re.compile(r'(.)\1+')
+
+INGREDIENT_STOPWORDS = {
+    'a', 'au', 'aux', 'de', 'd', 'du', 'des', 'la', 'le', 'les', 'l', 'un', 'une',
+    'et', 'ou', 'en', 'pour', 'avec', 'of', 'the', 'and', 'or', 'to', 'for', 'with',
+    'g', 'gr', 'kg', 'mg', 'ml', 'cl', 'dl', 'l', 'c', 'cs', 'cc', 'cuillere', 'cuilleres',
+    'soupe', 'cafe', 'tbsp', 'tsp', 'cup', 'cups', 'tasse', 'tasses', 'verre', 'verres',
+    'pincee', 'pinch', 'gousse', 'gousses', 'clove', 'cloves', 'botte', 'bunch',
+    'piece', 'pieces', 'tranche', 'tranches', 'slice', 'slices', 'boite', 'can',
+    'petit', 'petite', 'petits', 'petites', 'gros', 'grosse', 'grand', 'grande',
+    'large', 'small', 'medium', 'frais', 'fraiche', 'fresh', 'hache', 'hachee',
+    'chopped', 'moulu', 'ground',
+}
+
+
+def strip_accents(text):
+    text = ''.join(ARABIC_TO_LATIN.get(ch, ch) for ch in text)
+    decomposed = unicodedata.normalize('NFKD', text)
+    return ''.join(ch for ch in decomposed if not unicodedata.combining(ch))
+
+
+def fold_word(word):
+    for old, new in SPELLING_FOLDS:
+        word = word.replace(old, new)
+    return _REPEAT_RE.sub(r'\1', word)
+
+
+def trigrams(text):
+    grams = set()
+    for word in text.split():
+        padded = f'  {word} '
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return grams
+
+
+def stem(word):
+    if len(word) > 4 and word.endswith('ies'):
+        word = word[:-3] + 'i'
+    elif len(word) > 4 and word.endswith('oes'):
+        word = word[:-2]
+    elif len(word) > 2 and word[-1] in 'sx' and word[-2] != 's':
+        word = word[:-1]
+    if len(word) > 4 and word[-1] in 'eo':
+        word = word[:-1]
+    return word
+
+
+_FOLDED_STOPWORDS = {fold_word(word) for word in INGREDIENT_STOPWORDS}
+
+
+def ingredient_words(text):
+    pairs = []
+    seen = set()
+    for line in (text or '').splitlines():
+        for raw in _NON_WORD_RE.sub(' ', strip_accents(line).lower()).split():
+            word = fold_word(raw)
+            if word.isdigit() or word in _FOLDED_STOPWORDS or len(word) < 2:
+                continue
+            token = stem(word)
+            if token not in seen:
+                seen.add(token)
+                pairs.append((token, raw))
+    return pairs
+# ---- fin de la copie ----
+
+
+def rebuild_ingredient_indexes(apps, schema_editor):
+    # Sel, poivre, eau... sont désormais des ingrédients : postings et termes recalculés
+    Recipe = apps.get_model('accounts', 'Recipe')
+    IngredientPosting = apps.get_model('accounts', 'IngredientPosting')
+    SearchTerm = apps.get_model('accounts', 'SearchTerm')
+    SearchTrigram = apps.get_model('accounts', 'SearchTrigram')
+
+    IngredientPosting.objects.all().delete()
+    SearchTerm.objects.filter(kind='ingredient').delete()
+    for recipe in Recipe.objects.only('pk', 'ingredients').iterator():
+        words = ingredient_words(recipe.ingredients)
+        IngredientPosting.objects.bulk_create([
+            IngredientPosting(token=token[:100], recipe=recipe) for token, word in words
+        ])
+        for token, word in words:
+            grams = trigrams(token)
+            if not grams:
+                continue
+            search_term = SearchTerm.objects.create(
+                kind='ingredient', term=word[:200], normalized=token[:200],
+                trigram_count=len(grams), recipe=recipe,
+            )
+            SearchTrigram.objects.bulk_create([
+                SearchTrigram(trigram=gram, kind='ingredient', term=search_term) for gram in grams
+            ])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0037_recipe_activity_at'),
+    ]
+
+    operations = [
+        migrations.RunPython(rebuild_ingredient_indexes, migrations.RunPython.noop),
+    ]
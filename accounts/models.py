@@ -2,6 +2,9 @@
 from django.db import models
 from django.contrib.auth.models import User
 
+# Recipe.rating_<n>_count, de 1 à 5 étoiles
+RECIPE_RATING_FIELDS = tuple(f'rating_{stars}_count' for stars in range(1, 6))
+
 
 class UserProfile(models.Model):
     ROLE_CHOICES = (
@@ -43,9 +46,22 @@ class UserProfile(models.Model):
     years_experience = models.PositiveIntegerField(blank=True, null=True)
     bio = models.TextField(blank=True, null=True, help_text="Tell us about your culinary journey")
 
+    # Compteurs dénormalisés pour les annuaires (voir accounts/counters.py)
+    approved_recipe_count = models.PositiveIntegerField(default=0)
+    total_views = models.PositiveIntegerField(default=0)
+    rating_count = models.PositiveIntegerField(default=0)
+    rating_sum = models.PositiveIntegerField(default=0)
+    sheet_count = models.PositiveIntegerField(default=0)
+    # Version de la carte du chef (cache de fragments) ; les compteurs ci-dessus ne la changent pas
+    updated_at = models.DateTimeField(auto_now=True)
+
     def __str__(self):
         return f"{self.user.username} - {self.role}"
 
+    @property
+    def average_rating(self):
+        return self.rating_sum / self.rating_count if self.rating_count else 0.0
+
     def is_chef(self):
         return self.role == 'chef'
 
@@ -62,11 +78,63 @@ class Recipe(models.Model):
     is_approved = models.BooleanField(default=False)
     views = models.PositiveIntegerField(default=0)
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
 
     # ADD THESE TWO FIELDS
     ingredients = models.TextField(blank=True, help_text="List of ingredients (one per line)")
     steps = models.TextField(blank=True, help_text="Preparation steps (one per line)")
 
+    # Copie du chemin de la première image : les cartes n'ont pas à interroger RecipeImage
+    cover_image = models.ImageField(upload_to='recipes/', blank=True)
+
+    # Score "tendance" (voir accounts/trending.py), rafraîchi par refresh_trending
+    trending_score = models.FloatField(default=0, db_index=True)
+    # Dernière variation d'un compteur d'engagement : refresh_trending ne relit que ces recettes
+    activity_at = models.DateTimeField(null=True, blank=True, db_index=True)
+
+    # Compteurs d'engagement (voir accounts/counters.py) : histogramme des notes 1..5 (RECIPE_RATING_FIELDS)
+    rating_1_count = models.PositiveIntegerField(default=0)
+    rating_2_count = models.PositiveIntegerField(default=0)
+    rating_3_count = models.PositiveIntegerField(default=0)
+    rating_4_count = models.PositiveIntegerField(default=0)
+    rating_5_count = models.PositiveIntegerField(default=0)
+    comment_count = models.PositiveIntegerField(default=0)
+    favorite_count = models.PositiveIntegerField(default=0)
+
+    @property
+    def rating_histogram(self):
+        """``[(stars, count, percent)]`` from 5 stars down to 1."""
+        total = self.rating_count
+        return [
+            (stars, count, round(100 * count / total) if total else 0)
+            for stars, count in ((s, getattr(self, RECIPE_RATING_FIELDS[s - 1])) for s in range(5, 0, -1))
+        ]
+
+    @property
+    def rating_count(self):
+        return sum(getattr(self, field) for field in RECIPE_RATING_FIELDS)
+
+    @property
+    def average_rating(self):
+        total = self.rating_count
+        if not total:
+            return 0.0
+        return sum(stars * getattr(self, field) for stars, field in enumerate(RECIPE_RATING_FIELDS, start=1)) / total
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Valeurs lues en base : les compteurs ne reportent que ce qui a changé
+        instance._loaded_values = dict(zip(field_names, values))
+        return instance
+
+    class Meta:
+        # Pagination par curseur (voir accounts/pagination.py)
+        indexes = [
+            models.Index(fields=['created_at', 'id'], name='recipe_created_idx'),
+            models.Index(fields=['author', 'created_at', 'id'], name='recipe_author_created_idx'),
+        ]
+
     def __str__(self):
         return self.title
 
@@ -91,6 +159,10 @@ class Comment(models.Model):
 
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            # Pagination par curseur des commentaires d'une recette (accounts/comments.py)
+            models.Index(fields=['recipe', 'created_at', 'id'], name='comment_recipe_created_idx'),
+        ]
 
 # NEW: Rating on recipe (1-5 stars)
 
@@ -103,6 +175,12 @@ class Rating(models.Model):
     class Meta:
         unique_together = ('author', 'recipe')
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_values = dict(zip(field_names, values))
+        return instance
+
     def __str__(self):
         return f"{self.score} stars by {self.author.username} on {self.recipe.title}"
 
@@ -114,6 +192,7 @@ class Favorite(models.Model):
 
     class Meta:
         unique_together = ['user', 'recipe']
+        indexes = [models.Index(fields=['user', 'added_at', 'id'], name='favorite_user_added_idx')]
 
     def __str__(self):
         return f"{self.user.username} favorited {self.recipe.title}"
@@ -220,4 +299,142 @@ class NutritionMessage(models.Model):
         return f"{self.sender} → {self.recipient}: {self.subject}"
 
     class Meta:
-        ordering = ['-sent_at']
\ No newline at end of file
+        ordering = ['-sent_at']
+
+
+# ====================== SEARCH INDEX (TRIGRAMMES) ======================
+class SearchTerm(models.Model):
+    """A normalized searchable term (recipe title, chef username or ingredient)."""
+    KIND_CHOICES = (
+        ('recipe', 'Recipe title'),
+        ('chef', 'Chef username'),
+        ('ingredient', 'Ingredient'),
+    )
+
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES)
+    term = models.CharField(max_length=200)
+    normalized = models.CharField(max_length=200)
+    trigram_count = models.PositiveSmallIntegerField()
+    recipe = models.ForeignKey(Recipe, null=True, blank=True, on_delete=models.CASCADE, related_name='search_terms')
+    user = models.ForeignKey(User, null=True, blank=True, on_delete=models.CASCADE, related_name='search_terms')
+
+    def __str__(self):
+        return f"{self.kind}: {self.term}"
+
+
+class SearchTrigram(models.Model):
+    trigram = models.CharField(max_length=3)
+    kind = models.CharField(max_length=20, choices=SearchTerm.KIND_CHOICES)
+    term = models.ForeignKey(SearchTerm, on_delete=models.CASCADE, related_name='trigrams')
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['trigram', 'kind', 'term'], name='searchtrigram_lookup_idx'),
+        ]
+
+    def __str__(self):
+        return f"'{self.trigram}' -> {self.term_id}"
+
+
+# ====================== INDEX INVERSÉ DES INGRÉDIENTS ======================
+class IngredientPosting(models.Model):
+    """One normalized ingredient token of a recipe (see accounts/text.py)."""
+    token = models.CharField(max_length=100)
+    recipe = models.ForeignKey(Recipe, on_delete=models.CASCADE, related_name='ingredient_postings')
+
+    class Meta:
+        unique_together = ('token', 'recipe')
+
+    def __str__(self):
+        return f"{self.token} -> {self.recipe_id}"
+
+
+# ====================== RECETTES SIMILAIRES ======================
+class SimilarRecipe(models.Model):
+    """Precomputed top-k content neighbours of a recipe (see accounts/similarity.py)."""
+    recipe = models.ForeignKey(Recipe, on_delete=models.CASCADE, related_name='similar_links')
+    similar = models.ForeignKey(Recipe, on_delete=models.CASCADE, related_name='+')
+    score = models.FloatField()
+    rank = models.PositiveSmallIntegerField()
+
+    class Meta:
+        ordering = ['rank']
+        unique_together = ('recipe', 'rank')
+
+    def __str__(self):
+        return f"{self.recipe_id} ~ {self.similar_id} ({self.score:.2f})"
+
+
+class JobRun(models.Model):
+    """Last successful run of a periodic batch job (management command)."""
+    name = models.CharField(max_length=100, unique=True)
+    last_run_at = models.DateTimeField()
+
+    def __str__(self):
+        return f"{self.name} @ {self.last_run_at}"
+
+
+# ====================== RECOMMANDATIONS "POUR VOUS" ======================
+class RecipeCoSimilarity(models.Model):
+    """Item-item neighbour from favorites/ratings (see compute_recommendations)."""
+    recipe = models.ForeignKey(Recipe, on_delete=models.CASCADE, related_name='co_links')
+    similar = models.ForeignKey(Recipe, on_delete=models.CASCADE, related_name='+')
+    score = models.FloatField()
+
+    class Meta:
+        unique_together = ('recipe', 'similar')
+
+    def __str__(self):
+        return f"{self.recipe_id} ~ {self.similar_id} ({self.score:.2f})"
+
+
+class UserRecommendation(models.Model):
+    """Stored top-N "for you" list of a user (see accounts/recommendations.py)."""
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='recommendations')
+    recipe = models.ForeignKey(Recipe, on_delete=models.CASCADE, related_name='+')
+    score = models.FloatField()
+    rank = models.PositiveSmallIntegerField()
+
+    class Meta:
+        ordering = ['rank']
+        unique_together = ('user', 'rank')
+
+    def __str__(self):
+        return f"{self.user.username} -> {self.recipe_id} ({self.score:.2f})"
+
+
+# ====================== DÉTECTION DES DOUBLONS ======================
+class RecipeSignature(models.Model):
+    """MinHash signature of a recipe's ingredients and steps (see accounts/dedup.py)."""
+    recipe = models.OneToOneField(Recipe, on_delete=models.CASCADE, primary_key=True, related_name='signature')
+    minhash = models.BinaryField()
+
+    def __str__(self):
+        return f"Signature of {self.recipe_id}"
+
+
+class LshBucket(models.Model):
+    """One LSH band of a recipe signature: recipes sharing a bucket are duplicate candidates."""
+    band = models.PositiveSmallIntegerField()
+    bucket = models.BigIntegerField()
+    recipe = models.ForeignKey(Recipe, on_delete=models.CASCADE, related_name='lsh_buckets')
+
+    class Meta:
+        indexes = [models.Index(fields=['band', 'bucket'], name='lshbucket_lookup_idx')]
+
+    def __str__(self):
+        return f"band {self.band} / {self.bucket} -> {self.recipe_id}"
+
+
+class DuplicateCandidate(models.Model):
+    """A recipe that looks like a near-duplicate of another one (estimated Jaccard)."""
+    recipe = models.ForeignKey(Recipe, on_delete=models.CASCADE, related_name='duplicate_candidates')
+    duplicate = models.ForeignKey(Recipe, on_delete=models.CASCADE, related_name='+')
+    similarity = models.FloatField()
+
+    class Meta:
+        ordering = ['-similarity']
+        unique_together = ('recipe', 'duplicate')
+
+    def __str__(self):
+        return f"{self.recipe_id} ≈ {self.duplicate_id} ({self.similarity:.0%})"
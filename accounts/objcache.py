@@ -0,0 +1,149 @@
+# accounts/objcache.py
+"""
+Read-through cache of the single objects most views look up: approved
+recipes by pk, chef profiles by username, nutrition sheets by pk, and the
+profile of the logged-in user (``request.user.userprofile``, see
+accounts/middleware.py).
+
+Objects are kept in an in-process LRU of OBJECT_CACHE_SIZE entries. Each
+entry remembers the versions of the core/caching.py namespaces it depends on
+(``recipe:<pk>``, ``sheet:<pk>``, ``users`` / ``profile:<user id>``), which
+the model signals bump on save / delete (accounts/signals.py) and
+accounts/counters.py bumps on every profile counter update: a hit costs one
+read of the shared cache instead of a database query, and a change made by
+any worker invalidates the entry everywhere. Lookups that found nothing are
+cached too, for CACHE_NEGATIVE_TIMEOUT.
+
+A username is first resolved to its user id (namespace ``users``), so a chef
+profile shares the per-user namespace of its counters. Pages whose ETag is
+computed from the database (chef profile) do not use this cache. Recipe
+counters written without signals (buffered views) may be up to
+OBJECT_CACHE_TIMEOUT old. Callers get a shallow copy: the object can be
+modified, the related objects it holds (author, analysis...) must not be.
+Hits / misses are recorded in the core/caching.py statistics (``obj.<kind>``).
+"""
+import copy
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.http import Http404
+
+from core import caching
+
+from .models import Recipe, UserProfile, NutritionFactSheet
+
+_lock = threading.Lock()
+_entries = OrderedDict()     # (kind, clé) -> (objet, namespaces, versions, expiration)
+
+
+def lookup(kind, key, load, namespaces):
+    """The object cached for ``(kind, key)``, or ``load()`` (None if not found)."""
+    if not settings.OBJECT_CACHE_SIZE:
+        return load()
+    group = f'obj.{kind}'
+    started = time.monotonic()
+    with _lock:
+        entry = _entries.get((kind, key))
+        if entry is not None:
+            _entries.move_to_end((kind, key))
+    current = caching.versions(namespaces)
+    read_time = time.monotonic() - started
+
+    if entry is not None and entry[2] == current and entry[3] > time.monotonic():
+        caching.record(group, hits=1, read_time=read_time)
+        return copy.copy(entry[0])
+
+    caching.record(group, misses=1, read_time=read_time)
+    # Versions lues avant le chargement : une modification pendant le chargement invalidera l'entrée
+    started = time.monotonic()
+    obj = load()
+    caching.record(group, computes=1, compute_time=time.monotonic() - started)
+    ttl = settings.OBJECT_CACHE_TIMEOUT if obj is not None else settings.CACHE_NEGATIVE_TIMEOUT
+    with _lock:
+        _entries[kind, key] = (obj, namespaces, current, time.monotonic() + ttl)
+        _entries.move_to_end((kind, key))
+        evicted = 0
+        while len(_entries) > settings.OBJECT_CACHE_SIZE:
+            _entries.popitem(last=False)
+            evicted += 1
+    if evicted:
+        caching.record(group, evictions=evicted)
+    return copy.copy(obj)
+
+
+def clear():
+    with _lock:
+        _entries.clear()
+
+
+def _or_404(obj, model):
+    if obj is None:
+        raise Http404(f"No {model._meta.object_name} matches the given query.")
+    return obj
+
+
+# ====================== RECHERCHES ======================
+def approved_recipe(pk):
+    return lookup(
+        'recipe', pk,
+        lambda: Recipe.objects.filter(pk=pk, is_approved=True).select_related('author').first(),
+        [f'recipe:{pk}'],
+    )
+
+
+def approved_recipe_or_404(pk):
+    """Same as ``get_object_or_404(Recipe, pk=pk, is_approved=True)``, author included."""
+    return _or_404(approved_recipe(pk), Recipe)
+
+
+def sheet_or_404(pk):
+    sheet = lookup(
+        'sheet', pk,
+        lambda: NutritionFactSheet.objects.filter(pk=pk).select_related('nutritionist').first(),
+        [f'sheet:{pk}'],
+    )
+    return _or_404(sheet, NutritionFactSheet)
+
+
+def profile_namespace(user_id):
+    return f'profile:{user_id}'
+
+
+def profile_of(user_id):
+    """The UserProfile of ``user_id``, or None."""
+    return lookup(
+        'profile', user_id,
+        lambda: UserProfile.objects.filter(user_id=user_id).first(),
+        ['users', profile_namespace(user_id)],
+    )
+
+
+def chef_or_404(username):
+    """Same as ``get_object_or_404(UserProfile, user__username=username, role='chef')``, user included."""
+    user_id = lookup(
+        'user_id', username,
+        lambda: User.objects.filter(username=username).values_list('pk', flat=True).first(),
+        ['users'],
+    )
+    profile = None
+    if user_id is not None:
+        profile = lookup(
+            'chef', user_id,
+            lambda: UserProfile.objects.filter(user_id=user_id, role='chef').select_related('user').first(),
+            ['users', profile_namespace(user_id)],
+        )
+    return _or_404(profile, UserProfile)
+
+
+def attach_profile(user):
+    """Put the cached profile in ``user.userprofile`` (no query on access)."""
+    if user.is_authenticated:
+        profile = profile_of(user.pk)
+        if profile is not None:
+            UserProfile.user.field.set_cached_value(profile, user)
+        # None : user.userprofile lève UserProfile.DoesNotExist, comme sans cache
+        type(user).userprofile.related.set_cached_value(user, profile)
+    return user
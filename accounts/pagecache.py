@@ -0,0 +1,75 @@
+# accounts/pagecache.py
+"""
+Whole-page cache of the public pages for anonymous visitors.
+
+A page is cached under its full path (query string included) and the
+versions of the *scopes* it shows, e.g. ``recipe:12`` for a recipe detail
+page or ``chefs`` for the chef directory. Scopes are core/caching.py
+namespaces: the model signals (see accounts/signals.py) bump the ones a
+change touches, so a changed page gets a new key: no stale entry is ever
+read, old entries just expire after PAGE_CACHE_TIMEOUT.
+
+Only anonymous GET/HEAD requests with no pending flash message use the
+cache, and only 200 responses that did not use a CSRF token are stored. The
+body is stored, not the response: cookies are never replayed to another
+visitor. Work that must happen on every request (the view counter of
+``recipe_detail``) belongs in a decorator applied outside this one.
+
+Counters that are written without signals (buffered views, trending scores)
+may be up to PAGE_CACHE_TIMEOUT stale on a cached page.
+"""
+import hashlib
+from functools import wraps
+
+from django.conf import settings
+from django.contrib.messages import get_messages
+from django.core.cache import cache
+from django.http import HttpResponse
+
+from core import caching
+
+KEY_PREFIX = 'pagecache'
+
+# Les scopes sont des namespaces de core/caching.py : partagés avec les autres caches
+bump = caching.bump
+
+
+def page_key(request, scopes):
+    path = hashlib.md5(request.get_full_path().encode()).hexdigest()
+    return caching.make_key(f'{KEY_PREFIX}:page:{path}', scopes)
+
+
+def cacheable(request):
+    return (
+        request.method in ('GET', 'HEAD')
+        and not request.user.is_authenticated
+        and not len(get_messages(request))
+    )
+
+
+def cache_anonymous_page(scopes):
+    """
+    Decorator. ``scopes`` is a list of scope names, or a callable
+    ``scopes(*args, **kwargs)`` given the view arguments (e.g. the recipe pk).
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if not cacheable(request):
+                return view(request, *args, **kwargs)
+
+            key = page_key(request, scopes(*args, **kwargs) if callable(scopes) else scopes)
+            cached = cache.get(key)
+            if cached is not None:
+                return HttpResponse(cached['content'], content_type=cached['content_type'])
+
+            response = view(request, *args, **kwargs)
+            if response.status_code == 200 and not response.streaming \
+                    and not request.META.get('CSRF_COOKIE_NEEDS_UPDATE'):
+                cache.set(key, {
+                    'content': response.content,
+                    'content_type': response['Content-Type'],
+                }, settings.PAGE_CACHE_TIMEOUT)
+            return response
+        return wrapper
+    return decorator
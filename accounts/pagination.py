@@ -0,0 +1,133 @@
+# accounts/pagination.py
+"""
+Keyset ("cursor") pagination for the recipe listings.
+
+Rows are ordered newest first on ``(date_field, id)`` and a page is fetched
+with ``WHERE (date, id) < (last date, last id) ORDER BY date DESC, id DESC
+LIMIT n + 1``: an index range scan whose cost does not depend on how deep the
+page is, unlike OFFSET. The extra row only tells whether there is a next page.
+
+Cursors are opaque, signed strings (django.core.signing) holding the key of
+the first or last row of the current page and the direction. A cursor that
+cannot be decoded simply gives the first page.
+"""
+from django.conf import settings
+from django.core import signing
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+
+CURSOR_SALT = 'accounts.pagination'
+
+
+class KeysetPage:
+    def __init__(self, items, params, param, next_key=None, previous_key=None):
+        self.items = items
+        self._params = params
+        self._param = param
+        self.next_cursor = _encode(next_key, 'next') if next_key else None
+        self.previous_cursor = _encode(previous_key, 'previous') if previous_key else None
+
+    @property
+    def has_next(self):
+        return self.next_cursor is not None
+
+    @property
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+    @property
+    def has_other_pages(self):
+        return self.has_next or self.has_previous
+
+    def _query(self, cursor):
+        params = self._params.copy()
+        params[self._param] = cursor
+        return params.urlencode()
+
+    @property
+    def next_query(self):
+        return self._query(self.next_cursor) if self.next_cursor else ''
+
+    @property
+    def previous_query(self):
+        return self._query(self.previous_cursor) if self.previous_cursor else ''
+
+    @property
+    def first_query(self):
+        params = self._params.copy()
+        params.pop(self._param, None)
+        return params.urlencode()
+
+    def __iter__(self):
+        return iter(self.items)
+
+    def __len__(self):
+        return len(self.items)
+
+    def __bool__(self):
+        return bool(self.items)
+
+
+def _encode(key, direction):
+    date, pk = key
+    return signing.dumps([date.isoformat(), pk, direction], salt=CURSOR_SALT, compress=True)
+
+
+def _decode(cursor):
+    try:
+        date, pk, direction = signing.loads(cursor, salt=CURSOR_SALT)
+        date = parse_datetime(date)
+    except (signing.BadSignature, TypeError, ValueError):
+        return None
+    if date is None or not isinstance(pk, int) or direction not in ('next', 'previous'):
+        return None
+    return date, pk, direction
+
+
+def cursor_after(row, date_field='created_at'):
+    """Cursor of the page that starts right after ``row``."""
+    return _encode((getattr(row, date_field), row.pk), 'next')
+
+
+def page_size_from(request, default=None):
+    default = default or settings.PAGINATION_PAGE_SIZE
+    size = request.GET.get('size', '')
+    if size.isdigit() and int(size) > 0:
+        return min(int(size), settings.PAGINATION_MAX_PAGE_SIZE)
+    return default
+
+
+def paginate(request, queryset, page_size=None, date_field='created_at', param='cursor'):
+    """
+    Return the KeysetPage of ``queryset`` selected by ``request.GET[param]``.
+
+    ``queryset`` must not be sliced; its ordering is replaced by
+    ``(-date_field, -id)``.
+    """
+    page_size = page_size_from(request, page_size)
+    decoded = _decode(request.GET.get(param, ''))
+    params = request.GET.copy()
+
+    def key(row):
+        return getattr(row, date_field), row.pk
+
+    if decoded is None:
+        rows = list(queryset.order_by(f'-{date_field}', '-pk')[:page_size + 1])
+        items = rows[:page_size]
+        next_key = key(items[-1]) if len(rows) > page_size else None
+        return KeysetPage(items, params, param, next_key=next_key)
+
+    date, pk, direction = decoded
+    if direction == 'next':
+        after = Q(**{f'{date_field}__lt': date}) | Q(**{date_field: date, 'pk__lt': pk})
+        rows = list(queryset.filter(after).order_by(f'-{date_field}', '-pk')[:page_size + 1])
+        items = rows[:page_size]
+        next_key = key(items[-1]) if len(rows) > page_size else None
+        previous_key = key(items[0]) if items else None
+    else:
+        before = Q(**{f'{date_field}__gt': date}) | Q(**{date_field: date, 'pk__gt': pk})
+        rows = list(queryset.filter(before).order_by(date_field, 'pk')[:page_size + 1])
+        items = rows[:page_size][::-1]
+        previous_key = key(items[0]) if len(rows) > page_size else None
+        next_key = key(items[-1]) if items else None
+    return KeysetPage(items, params, param, next_key=next_key, previous_key=previous_key)
@@ -0,0 +1,70 @@
+# accounts/recommendations.py
+"""
+"For you" recommendations on the visitor dashboard (item-item collaborative
+filtering on Favorite and Rating).
+
+Offline, the ``compute_recommendations`` command builds the user x recipe
+matrix and stores the nearest recipes of every recipe (RecipeCoSimilarity,
+see accounts/similarity.py), then every user's top-N list.
+
+A user's score for a recipe j is ``sum(weight(user, i) * sim(i, j))`` over the
+recipes i they favorited or rated. When a user favorites or rates something,
+only their own list is rebuilt from the stored neighbours: a few indexed
+queries, no matrix work. The dashboard only reads UserRecommendation.
+"""
+import heapq
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import transaction
+
+from .models import Favorite, Rating, RecipeCoSimilarity, UserRecommendation
+
+FAVORITE_WEIGHT = 1.0
+
+
+def rating_weight(score):
+    # 5 étoiles -> +1, 3 -> 0, 1 -> -1
+    return (score - 3) / 2.0
+
+
+def user_weights(user_id):
+    """``{recipe_id: weight}`` for every recipe the user favorited or rated."""
+    weights = defaultdict(float)
+    for recipe_id in Favorite.objects.filter(user_id=user_id).values_list('recipe_id', flat=True):
+        weights[recipe_id] += FAVORITE_WEIGHT
+    for recipe_id, score in Rating.objects.filter(author_id=user_id).values_list('recipe_id', 'score'):
+        weights[recipe_id] += rating_weight(score)
+    return weights
+
+
+def store_recommendations(user_id, scores, limit=None):
+    """Replace the stored list of a user with the best of ``scores`` = {recipe_id: score}."""
+    limit = limit or settings.RECOMMENDATIONS_COUNT
+    best = heapq.nlargest(limit, ((score, recipe_id) for recipe_id, score in scores.items() if score > 0))
+    with transaction.atomic():
+        UserRecommendation.objects.filter(user_id=user_id).delete()
+        UserRecommendation.objects.bulk_create([
+            UserRecommendation(user_id=user_id, recipe_id=recipe_id, score=round(score, 6), rank=rank)
+            for rank, (score, recipe_id) in enumerate(best, start=1)
+        ])
+
+
+def refresh_user(user_id):
+    """Rebuild one user's list from the stored item-item neighbours."""
+    weights = user_weights(user_id)
+    scores = defaultdict(float)
+    links = RecipeCoSimilarity.objects.filter(recipe_id__in=list(weights), similar__is_approved=True) \
+        .exclude(similar__author_id=user_id) \
+        .values_list('recipe_id', 'similar_id', 'score')
+    for recipe_id, similar_id, similarity in links:
+        if similar_id not in weights:
+            scores[similar_id] += weights[recipe_id] * similarity
+    store_recommendations(user_id, scores)
+
+
+def recommended_recipes(user, limit=None):
+    limit = limit or settings.RECOMMENDATIONS_COUNT
+    links = UserRecommendation.objects.filter(user=user, recipe__is_approved=True) \
+        .select_related('recipe', 'recipe__author')[:limit]
+    return [link.recipe for link in links]
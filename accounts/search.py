@@ -0,0 +1,233 @@
+# accounts/search.py
+"""
+Recipe search: a SQLite FTS5 index for word matches, plus a trigram index for
+typo- and transliteration-tolerant matches.
+
+The full-text index lives in the ``accounts_recipe_fts`` virtual table (created by
+migration 0023). Its rowid is the recipe id, and it is kept in sync from the
+Recipe post_save / post_delete signals (see accounts/signals.py). Approval is
+not stored in the index: it is checked with a join at query time, so approving
+a recipe with ``queryset.update()`` needs no re-indexing. The trigram index
+(SearchTerm / SearchTrigram) is maintained from the same signals.
+"""
+import re
+
+from django.conf import settings
+from django.db import connection, DatabaseError
+from django.db.models import Q, Count
+
+from .models import Recipe, UserProfile, SearchTerm, SearchTrigram
+from .text import normalize, trigrams, ingredient_words
+
+FTS_TABLE = 'accounts_recipe_fts'
+
+# Poids BM25 par colonne : title, description, ingredients, steps
+BM25_WEIGHTS = (10.0, 4.0, 2.0, 1.0)
+
+_TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+
+
+def fts_available():
+    return connection.vendor == 'sqlite'
+
+
+def build_match_query(query):
+    """
+    Turn free text typed by a user into a safe FTS5 MATCH expression.
+
+    Every word is quoted (so FTS5 operators typed by users are ignored) and
+    the last word becomes a prefix query, which keeps search-as-you-type useful.
+    """
+    tokens = _TOKEN_RE.findall(query.lower())
+    if not tokens:
+        return ''
+    terms = [f'"{token}"' for token in tokens[:-1]]
+    terms.append(f'"{tokens[-1]}"*')
+    return ' '.join(terms)
+
+
+def ranked_recipe_ids(query, limit=None):
+    """Return ids of approved recipes matching ``query``, best BM25 score first."""
+    limit = limit or settings.SEARCH_RESULTS_LIMIT
+    match = build_match_query(query)
+    if not match:
+        return []
+
+    weights = ', '.join(str(w) for w in BM25_WEIGHTS)
+    sql = (
+        f"SELECT f.rowid FROM {FTS_TABLE} f "
+        f"JOIN accounts_recipe r ON r.id = f.rowid "
+        f"WHERE {FTS_TABLE} MATCH %s AND r.is_approved = %s "
+        f"ORDER BY bm25({FTS_TABLE}, {weights}) "
+        f"LIMIT %s"
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(sql, [match, True, limit])
+        return [row[0] for row in cursor.fetchall()]
+
+
+def search_recipes(query, limit=None):
+    """
+    Approved recipes matching ``query``, ordered by relevance.
+
+    Falls back to the old ``icontains`` lookup when the database has no FTS5
+    support (e.g. another backend), so search never breaks.
+    """
+    limit = limit or settings.SEARCH_RESULTS_LIMIT
+    base = Recipe.objects.filter(is_approved=True).select_related('author', 'analysis')
+
+    if fts_available():
+        try:
+            ids = ranked_recipe_ids(query, limit)
+        except DatabaseError:
+            ids = None
+        if ids is not None:
+            by_id = base.in_bulk(ids)
+            return [by_id[pk] for pk in ids if pk in by_id]
+
+    return list(
+        base.filter(Q(title__icontains=query) | Q(description__icontains=query))
+        .order_by('-created_at')[:limit]
+    )
+
+
+# ====================== INDEX MAINTENANCE ======================
+def index_recipe(recipe):
+    if not fts_available():
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {FTS_TABLE} WHERE rowid = %s", [recipe.pk])
+        cursor.execute(
+            f"INSERT INTO {FTS_TABLE} (rowid, title, description, ingredients, steps) "
+            f"VALUES (%s, %s, %s, %s, %s)",
+            [recipe.pk, recipe.title, recipe.description, recipe.ingredients, recipe.steps],
+        )
+
+
+def unindex_recipe(recipe_id):
+    if not fts_available():
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {FTS_TABLE} WHERE rowid = %s", [recipe_id])
+
+
+def rebuild_index():
+    """Rebuild the whole FTS index from accounts_recipe. Returns the row count."""
+    if not fts_available():
+        return 0
+    with connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {FTS_TABLE}")
+        cursor.execute(
+            f"INSERT INTO {FTS_TABLE} (rowid, title, description, ingredients, steps) "
+            f"SELECT id, title, description, ingredients, steps FROM accounts_recipe"
+        )
+        cursor.execute(f"INSERT INTO {FTS_TABLE} ({FTS_TABLE}) VALUES ('optimize')")
+        cursor.execute(f"SELECT COUNT(*) FROM {FTS_TABLE}")
+        return cursor.fetchone()[0]
+
+
+# ====================== FUZZY (TRIGRAM) SEARCH ======================
+# Un ingrédient qui correspond pèse un peu moins que le titre de la recette
+INGREDIENT_MATCH_WEIGHT = 0.8
+
+
+def fuzzy_term_matches(query, kinds):
+    """
+    Return ``[(score, SearchTerm)]`` for terms similar to ``query``, best first.
+
+    Only the posting lists of the query trigrams are read (one grouped query on
+    the trigram index), and at most FUZZY_SEARCH_CANDIDATES terms are scored.
+    The score is the best of the trigram similarity and the share of the query
+    found in the term, so "chakchouka" still matches a longer title.
+    """
+    normalized = normalize(query)
+    grams = trigrams(normalized)
+    if len(normalized) < 3 or not grams:
+        return []
+
+    candidates = (
+        SearchTrigram.objects.filter(trigram__in=grams, kind__in=kinds)
+        .values('term_id')
+        .annotate(shared=Count('id'))
+        .order_by('-shared')[:settings.FUZZY_SEARCH_CANDIDATES]
+    )
+    shared_by_term = {row['term_id']: row['shared'] for row in candidates}
+
+    matches = []
+    for term in SearchTerm.objects.filter(pk__in=shared_by_term):
+        shared = shared_by_term[term.pk]
+        similarity = shared / (len(grams) + term.trigram_count - shared)
+        containment = 0.9 * shared / len(grams)
+        score = max(similarity, containment)
+        if score >= settings.FUZZY_SEARCH_THRESHOLD:
+            matches.append((score, term))
+    matches.sort(key=lambda match: match[0], reverse=True)
+    return matches
+
+
+def fuzzy_search_recipes(query, limit=None):
+    """Approved recipes whose title or ingredients look like ``query``."""
+    limit = limit or settings.SEARCH_RESULTS_LIMIT
+    best = {}
+    for score, term in fuzzy_term_matches(query, ['recipe', 'ingredient']):
+        if term.kind == 'ingredient':
+            score *= INGREDIENT_MATCH_WEIGHT
+        if score > best.get(term.recipe_id, 0):
+            best[term.recipe_id] = score
+
+    ids = sorted(best, key=best.get, reverse=True)[:limit]
+    by_id = Recipe.objects.filter(is_approved=True) \
+        .select_related('author', 'analysis') \
+        .in_bulk(ids)
+    return [by_id[pk] for pk in ids if pk in by_id]
+
+
+def fuzzy_search_chefs(query):
+    """Chef profiles whose username looks like ``query``, best match first."""
+    user_ids = []
+    for score, term in fuzzy_term_matches(query, ['chef']):
+        if term.user_id not in user_ids:
+            user_ids.append(term.user_id)
+    profiles = UserProfile.objects.filter(role='chef', user_id__in=user_ids).select_related('user')
+    by_user = {profile.user_id: profile for profile in profiles}
+    return [by_user[pk] for pk in user_ids if pk in by_user]
+
+
+def _create_terms(entries, recipe=None, user=None):
+    pending = []
+    for kind, term, normalized in entries:
+        grams = trigrams(normalized)
+        if grams:
+            pending.append((SearchTerm(
+                kind=kind, term=term[:200], normalized=normalized[:200],
+                trigram_count=len(grams), recipe=recipe, user=user,
+            ), grams))
+    SearchTerm.objects.bulk_create([term for term, grams in pending])
+    SearchTrigram.objects.bulk_create([
+        SearchTrigram(trigram=gram, kind=term.kind, term=term)
+        for term, grams in pending
+        for gram in grams
+    ])
+
+
+def index_recipe_terms(recipe):
+    SearchTerm.objects.filter(recipe=recipe).delete()
+    entries = [('recipe', recipe.title, normalize(recipe.title))]
+    entries += [('ingredient', word, token) for token, word in ingredient_words(recipe.ingredients)]
+    _create_terms(entries, recipe=recipe)
+
+
+def index_chef_terms(user, is_chef):
+    SearchTerm.objects.filter(user=user).delete()
+    if is_chef:
+        _create_terms([('chef', user.username, normalize(user.username))], user=user)
+
+
+def rebuild_fuzzy_index():
+    """Rebuild the trigram index for every recipe and chef. Returns the term count."""
+    SearchTerm.objects.all().delete()
+    for recipe in Recipe.objects.only('pk', 'title', 'ingredients').iterator():
+        index_recipe_terms(recipe)
+    for profile in UserProfile.objects.filter(role='chef').select_related('user'):
+        index_chef_terms(profile.user, is_chef=True)
+    return SearchTerm.objects.count()
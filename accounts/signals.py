@@ -0,0 +1,233 @@
+# accounts/signals.py
+from django.contrib.auth.models import User
+from django.db.models.signals import post_save, pre_delete, post_delete
+from django.dispatch import receiver
+from django.utils import timezone
+
+from .models import (
+    Recipe, RecipeImage, UserProfile, RecipeAnalysis, Rating, Comment, Favorite, NutritionFactSheet,
+    Notification, NutritionMessage,
+)
+from . import search, autocomplete, facets, ingredients, trending, dedup, counters, pagecache, unread, objcache
+
+RECIPE_TEXT_FIELDS = {'title', 'description', 'ingredients', 'steps'}
+
+
+# ====================== SEARCH INDEX ======================
+@receiver(post_save, sender=Recipe)
+def recipe_saved_update_search_index(sender, instance, update_fields=None, **kwargs):
+    # Un simple compteur de vues ne touche pas au texte indexé
+    if update_fields and not RECIPE_TEXT_FIELDS & set(update_fields):
+        return
+    search.index_recipe(instance)
+    search.index_recipe_terms(instance)
+    ingredients.index_recipe_ingredients(instance)
+
+
+@receiver(post_delete, sender=Recipe)
+def recipe_deleted_update_search_index(sender, instance, **kwargs):
+    search.unindex_recipe(instance.pk)
+    autocomplete.recipe_removed(instance.pk)
+
+
+@receiver(post_save, sender=UserProfile)
+def profile_saved_update_search_index(sender, instance, **kwargs):
+    search.index_chef_terms(instance.user, is_chef=instance.role == 'chef')
+    autocomplete.profile_changed(instance)
+
+
+@receiver(post_save, sender=User)
+def user_saved_update_search_index(sender, instance, created, update_fields=None, **kwargs):
+    # last_login est sauvegardé à chaque connexion : seuls username / is_active comptent
+    if created or (update_fields and not {'username', 'is_active'} & set(update_fields)):
+        return
+    profile = UserProfile.objects.filter(user=instance).only('role', 'user_id').first()
+    if profile:
+        profile.user = instance
+        search.index_chef_terms(instance, is_chef=profile.role == 'chef')
+        autocomplete.profile_changed(profile)
+
+
+# ====================== AUTOCOMPLETE ======================
+@receiver(post_save, sender=Recipe)
+def recipe_saved_update_autocomplete(sender, instance, update_fields=None, **kwargs):
+    if update_fields and not {'title', 'ingredients', 'is_approved'} & set(update_fields):
+        return
+    autocomplete.recipe_changed(instance)
+
+
+# ====================== TENDANCES ======================
+@receiver(post_save, sender=Recipe)
+def recipe_created_set_trending_score(sender, instance, created, **kwargs):
+    # Une nouvelle recette ne reste pas à 0 jusqu'au prochain refresh_trending
+    if created:
+        instance.trending_score = trending.baseline_score(instance.created_at)
+        Recipe.objects.filter(pk=instance.pk).update(trending_score=instance.trending_score)
+
+
+# ====================== DOUBLONS ======================
+@receiver(post_save, sender=Recipe)
+def recipe_saved_detect_duplicates(sender, instance, update_fields=None, **kwargs):
+    if update_fields and not {'ingredients', 'steps'} & set(update_fields):
+        return
+    dedup.index_recipe(instance)
+
+
+# ====================== IMAGE DE COUVERTURE ======================
+@receiver(post_save, sender=RecipeImage)
+def image_saved_update_cover(sender, instance, created, **kwargs):
+    # La première image reste la couverture (comme images.first)
+    if created:
+        Recipe.objects.filter(pk=instance.recipe_id, cover_image='')\
+            .update(cover_image=instance.image.name, updated_at=timezone.now())
+
+
+@receiver(post_delete, sender=RecipeImage)
+def image_deleted_update_cover(sender, instance, **kwargs):
+    next_image = RecipeImage.objects.filter(recipe_id=instance.recipe_id)\
+        .order_by('pk').values_list('image', flat=True).first()
+    Recipe.objects.filter(pk=instance.recipe_id, cover_image=instance.image.name)\
+        .update(cover_image=next_image or '', updated_at=timezone.now())
+
+
+# ====================== VERSION DES CARTES ======================
+@receiver(post_save, sender=RecipeAnalysis)
+@receiver(post_delete, sender=RecipeAnalysis)
+def analysis_changed_bump_recipe_version(sender, instance, **kwargs):
+    # Le badge "Analyzed" fait partie de la carte en cache (includes/recipe_card.html)
+    Recipe.objects.filter(pk=instance.recipe_id).update(updated_at=timezone.now())
+
+
+# ====================== COMPTEURS (PROFILS ET RECETTES) ======================
+@receiver(post_save, sender=Recipe)
+def recipe_saved_update_counters(sender, instance, created, **kwargs):
+    counters.recipe_saved(instance, created)
+
+
+@receiver(pre_delete, sender=Recipe)
+def recipe_deleting_update_counters(sender, instance, **kwargs):
+    # pre_delete : les notes de la recette existent encore
+    counters.recipe_deleting(instance)
+
+
+@receiver(post_save, sender=Rating)
+def rating_saved_update_counters(sender, instance, created, **kwargs):
+    counters.rating_saved(instance, created)
+
+
+@receiver(post_delete, sender=Rating)
+def rating_deleted_update_counters(sender, instance, origin=None, **kwargs):
+    counters.rating_deleted(instance, origin)
+
+
+@receiver(post_save, sender=Comment)
+def comment_saved_update_counters(sender, instance, created, **kwargs):
+    counters.comment_saved(instance, created)
+
+
+@receiver(post_delete, sender=Comment)
+def comment_deleted_update_counters(sender, instance, origin=None, **kwargs):
+    counters.comment_deleted(instance, origin)
+
+
+@receiver(post_save, sender=Favorite)
+def favorite_saved_update_counters(sender, instance, created, **kwargs):
+    counters.favorite_saved(instance, created)
+
+
+@receiver(post_delete, sender=Favorite)
+def favorite_deleted_update_counters(sender, instance, origin=None, **kwargs):
+    counters.favorite_deleted(instance, origin)
+
+
+@receiver(post_save, sender=NutritionFactSheet)
+def sheet_saved_update_counters(sender, instance, created, **kwargs):
+    counters.sheet_saved(instance, created)
+
+
+@receiver(post_delete, sender=NutritionFactSheet)
+def sheet_deleted_update_counters(sender, instance, **kwargs):
+    counters.sheet_deleted(instance)
+
+
+# ====================== NON LUS (NOTIFICATIONS ET MESSAGES) ======================
+@receiver(post_save, sender=Notification)
+def notification_saved_update_unread(sender, instance, created, **kwargs):
+    unread.notification_saved(instance, created)
+
+
+@receiver(post_delete, sender=Notification)
+def notification_deleted_update_unread(sender, instance, **kwargs):
+    unread.invalidate('notifications', instance.user_id)
+
+
+@receiver(post_save, sender=NutritionMessage)
+def message_saved_update_unread(sender, instance, created, **kwargs):
+    unread.message_saved(instance, created)
+
+
+@receiver(post_delete, sender=NutritionMessage)
+def message_deleted_update_unread(sender, instance, **kwargs):
+    unread.invalidate('messages', instance.recipient_id)
+
+
+# ====================== FACETTES ======================
+@receiver(post_save, sender=Recipe)
+@receiver(post_delete, sender=Recipe)
+@receiver(post_save, sender=RecipeAnalysis)
+@receiver(post_delete, sender=RecipeAnalysis)
+@receiver(post_save, sender=UserProfile)
+def invalidate_facet_counts(sender, update_fields=None, **kwargs):
+    if sender is Recipe and update_fields and set(update_fields) <= {'views'}:
+        return
+    facets.bump_version()
+
+
+# ====================== CACHE DES PAGES ======================
+# Chaque modification invalide les pages et listes qui l'affichent (namespaces de core/caching.py)
+@receiver(post_save, sender=Recipe)
+@receiver(post_delete, sender=Recipe)
+def recipe_changed_invalidate_pages(sender, instance, **kwargs):
+    pagecache.bump(f'recipe:{instance.pk}', 'recipes', 'chefs')
+
+
+@receiver(post_save, sender=RecipeImage)
+@receiver(post_delete, sender=RecipeImage)
+@receiver(post_save, sender=RecipeAnalysis)
+@receiver(post_delete, sender=RecipeAnalysis)
+def recipe_card_changed_invalidate_pages(sender, instance, **kwargs):
+    pagecache.bump(f'recipe:{instance.recipe_id}', 'recipes')
+
+
+@receiver(post_save, sender=Rating)
+@receiver(post_delete, sender=Rating)
+def rating_changed_invalidate_pages(sender, instance, **kwargs):
+    pagecache.bump(f'recipe:{instance.recipe_id}', 'chefs')
+
+
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+def comment_changed_invalidate_pages(sender, instance, **kwargs):
+    pagecache.bump(f'recipe:{instance.recipe_id}', 'comments')
+
+
+@receiver(post_save, sender=UserProfile)
+@receiver(post_delete, sender=UserProfile)
+def profile_changed_invalidate_pages(sender, instance, **kwargs):
+    # profile:<id> : profil en cache (accounts/objcache.py)
+    pagecache.bump('chefs', 'nutritionists', 'recipes', objcache.profile_namespace(instance.user_id))
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def user_changed_invalidate_pages(sender, instance, update_fields=None, **kwargs):
+    # last_login est sauvegardé à chaque connexion : sans effet sur les pages
+    if update_fields and set(update_fields) <= {'last_login'}:
+        return
+    pagecache.bump('users')
+
+
+@receiver(post_save, sender=NutritionFactSheet)
+@receiver(post_delete, sender=NutritionFactSheet)
+def sheet_changed_invalidate_pages(sender, instance, **kwargs):
+    pagecache.bump(f'sheet:{instance.pk}', 'sheets', 'nutritionists')
@@ -0,0 +1,286 @@
+# accounts/similarity.py
+"""
+Recipe similarities computed in batch: content-based "similar recipes" and
+the collaborative item-item neighbours behind the "for you" recommendations.
+
+Each approved recipe becomes a TF-IDF vector over its title, ingredients and
+steps. Cosine similarities are sparse matrix products (rows are L2-normalised),
+and the top-k neighbours of each recipe are stored in SimilarRecipe, so the
+detail page only needs one indexed lookup.
+
+Needs NumPy and SciPy; only the ``compute_similar_recipes`` and
+``compute_recommendations`` commands import this module.
+"""
+import numpy as np
+from scipy import sparse
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, Min
+from django.utils import timezone
+
+from .models import (
+    Recipe, SimilarRecipe, JobRun, Favorite, Rating, RecipeCoSimilarity, UserRecommendation,
+)
+from .recommendations import FAVORITE_WEIGHT, rating_weight, store_recommendations
+from . import pagecache
+from .text import normalize, ingredient_tokens
+
+JOB_NAME = 'similar_recipes'
+
+# Le titre compte double, les étapes (longues et bruitées) comptent moins
+TITLE_WEIGHT = 2
+STEP_WORD_MIN_LENGTH = 4
+
+# Nombre de lignes multipliées à la fois (mémoire : CHUNK_SIZE x nb recettes)
+CHUNK_SIZE = 256
+
+
+def recipe_terms(title, ingredients, steps):
+    terms = normalize(title).split() * TITLE_WEIGHT
+    terms += ['ing:' + token for token in ingredient_tokens(ingredients)]
+    terms += [word for word in normalize(steps).split() if len(word) >= STEP_WORD_MIN_LENGTH]
+    return terms
+
+
+def tfidf_matrix(documents):
+    """
+    L2-normalised TF-IDF matrix (CSR, one row per document).
+
+    ``documents`` is a list of term lists. TF is ``1 + log(count)`` and IDF the
+    smoothed ``log((1 + n) / (1 + df)) + 1``.
+    """
+    vocabulary = {}
+    rows, cols, counts = [], [], []
+    for row, terms in enumerate(documents):
+        term_counts = {}
+        for term in terms:
+            col = vocabulary.setdefault(term, len(vocabulary))
+            term_counts[col] = term_counts.get(col, 0) + 1
+        for col, count in term_counts.items():
+            rows.append(row)
+            cols.append(col)
+            counts.append(count)
+
+    shape = (len(documents), max(len(vocabulary), 1))
+    matrix = sparse.csr_matrix(
+        (np.asarray(counts, dtype=np.float64), (rows, cols)), shape=shape
+    )
+    matrix.data = 1.0 + np.log(matrix.data)
+
+    df = np.bincount(matrix.indices, minlength=shape[1])
+    idf = np.log((1.0 + shape[0]) / (1.0 + df)) + 1.0
+    matrix = matrix @ sparse.diags(idf)
+
+    norms = np.sqrt(np.asarray(matrix.multiply(matrix).sum(axis=1)).ravel())
+    norms[norms == 0] = 1.0
+    return sparse.csr_matrix(sparse.diags(1.0 / norms) @ matrix)
+
+
+def top_neighbours(similarities, row_positions, k):
+    """For each row of a dense similarity block, the k best (position, score), self excluded."""
+    results = []
+    for block_row, position in enumerate(row_positions):
+        scores = similarities[block_row].copy()
+        scores[position] = -1.0
+        count = min(k, len(scores) - 1)
+        if count <= 0:
+            results.append([])
+            continue
+        best = np.argpartition(-scores, count - 1)[:count]
+        best = best[np.argsort(-scores[best])]
+        results.append([(int(p), float(scores[p])) for p in best if scores[p] > 0])
+    return results
+
+
+def compute_similar_recipes(full=False, k=None, stdout=None):
+    """
+    Refresh the SimilarRecipe table. Returns the number of recipes refreshed.
+
+    Incremental by default: only recipes edited since the last run (or that
+    have fewer than k stored neighbours, e.g. newly approved ones) are
+    recomputed, plus the recipes whose stored neighbour lists those changes
+    can affect. ``full=True`` recomputes every recipe.
+    """
+    k = k or settings.SIMILAR_RECIPES_COUNT
+    started_at = timezone.now()
+    last_run = JobRun.objects.filter(name=JOB_NAME).first()
+
+    rows = list(
+        Recipe.objects.filter(is_approved=True)
+        .order_by('pk')
+        .values_list('pk', 'title', 'ingredients', 'steps', 'updated_at')
+    )
+    if not rows:
+        return 0
+    ids = np.array([row[0] for row in rows])
+    position_of = {pk: position for position, pk in enumerate(ids.tolist())}
+    matrix = tfidf_matrix([recipe_terms(title, ing, steps) for pk, title, ing, steps, updated in rows])
+
+    # Liste stockée de chaque recette : taille et plus petit score (0 si incomplète)
+    wanted = min(k, len(ids) - 1)
+    link_counts = {}
+    min_scores = np.zeros(len(ids))
+    stored = SimilarRecipe.objects.values('recipe_id').annotate(count=Count('id'), low=Min('score'))
+    for row in stored:
+        position = position_of.get(row['recipe_id'])
+        if position is not None:
+            link_counts[row['recipe_id']] = row['count']
+            if row['count'] >= wanted:
+                min_scores[position] = row['low']
+
+    if full or last_run is None:
+        targets = set(range(len(ids)))
+    else:
+        changed = {
+            position_of[pk] for pk, title, ing, steps, updated in rows
+            if updated > last_run.last_run_at or link_counts.get(pk, 0) < wanted
+        }
+        targets = set(changed)
+        changed_ids = [int(ids[p]) for p in changed]
+        # Recettes qui avaient une recette modifiée parmi leurs voisines
+        for recipe_id in SimilarRecipe.objects.filter(similar_id__in=changed_ids).values_list('recipe_id', flat=True):
+            if recipe_id in position_of:
+                targets.add(position_of[recipe_id])
+        # Recettes dans lesquelles une recette modifiée entre dans le top-k
+        changed_list = sorted(changed)
+        for start in range(0, len(changed_list), CHUNK_SIZE):
+            block = (matrix[changed_list[start:start + CHUNK_SIZE]] @ matrix.T).toarray()
+            for block_row, position in enumerate(changed_list[start:start + CHUNK_SIZE]):
+                block[block_row, position] = 0.0
+            affected = np.nonzero((block > min_scores[None, :]).any(axis=0))[0]
+            targets.update(int(p) for p in affected)
+
+    targets = sorted(targets)
+    for start in range(0, len(targets), CHUNK_SIZE):
+        positions = targets[start:start + CHUNK_SIZE]
+        block = (matrix[positions] @ matrix.T).toarray()
+        neighbours = top_neighbours(block, positions, k)
+        recipe_ids = [int(ids[p]) for p in positions]
+        with transaction.atomic():
+            SimilarRecipe.objects.filter(recipe_id__in=recipe_ids).delete()
+            SimilarRecipe.objects.bulk_create([
+                SimilarRecipe(recipe_id=recipe_id, similar_id=int(ids[p]), score=round(score, 6), rank=rank)
+                for recipe_id, best in zip(recipe_ids, neighbours)
+                for rank, (p, score) in enumerate(best, start=1)
+            ])
+        # Panneau "You may also like" : pages en cache et objets des recettes recalculées
+        pagecache.bump(*(f'recipe:{recipe_id}' for recipe_id in recipe_ids))
+        if stdout:
+            stdout.write(f"  {min(start + CHUNK_SIZE, len(targets))}/{len(targets)} recipes")
+
+    JobRun.objects.update_or_create(name=JOB_NAME, defaults={'last_run_at': started_at})
+    return len(targets)
+
+
+# ====================== COLLABORATIF (ITEM-ITEM) ======================
+# Rétrécit la similarité des paires vues par peu d'utilisateurs : sim * n / (n + SHRINKAGE)
+CO_SIMILARITY_SHRINKAGE = 3.0
+
+
+def interaction_matrix():
+    """
+    ``(user_ids, recipe_ids, matrix)``: the users x approved recipes matrix of
+    favorite / rating weights (same weights as accounts/recommendations.py).
+    """
+    recipe_ids = np.array(Recipe.objects.filter(is_approved=True).order_by('pk').values_list('pk', flat=True))
+    column_of = {pk: col for col, pk in enumerate(recipe_ids.tolist())}
+
+    entries = [
+        (user_id, recipe_id, FAVORITE_WEIGHT)
+        for user_id, recipe_id in Favorite.objects.values_list('user_id', 'recipe_id')
+    ]
+    entries += [
+        (user_id, recipe_id, rating_weight(score))
+        for user_id, recipe_id, score in Rating.objects.values_list('author_id', 'recipe_id', 'score')
+    ]
+    entries = [entry for entry in entries if entry[1] in column_of]
+    user_ids = np.array(sorted({entry[0] for entry in entries}), dtype=np.int64)
+    row_of = {pk: row for row, pk in enumerate(user_ids.tolist())}
+
+    # Les doublons (favori + note) sont additionnés par csr_matrix
+    matrix = sparse.csr_matrix(
+        (
+            np.array([entry[2] for entry in entries], dtype=np.float64),
+            ([row_of[entry[0]] for entry in entries], [column_of[entry[1]] for entry in entries]),
+        ),
+        shape=(len(user_ids), len(recipe_ids)),
+    )
+    matrix.sum_duplicates()
+    return user_ids, recipe_ids, matrix
+
+
+def compute_co_similarities(matrix, k):
+    """
+    Item-item neighbours: for every column, the k most similar columns as
+    ``[(position, score)]`` (cosine, shrunk by the number of common users).
+    """
+    interacted = matrix.copy()
+    interacted.data = np.ones_like(interacted.data)
+    weighted = matrix.copy()
+    weighted.eliminate_zeros()
+
+    norms = np.sqrt(np.asarray(weighted.multiply(weighted).sum(axis=0)).ravel())
+    norms[norms == 0] = 1.0
+    normalized = sparse.csr_matrix(weighted @ sparse.diags(1.0 / norms))
+    items = normalized.T.tocsr()
+    interacted_items = interacted.T.tocsr()
+
+    neighbours = []
+    for start in range(0, matrix.shape[1], CHUNK_SIZE):
+        positions = list(range(start, min(start + CHUNK_SIZE, matrix.shape[1])))
+        cosine = (items[positions] @ normalized).toarray()
+        common = (interacted_items[positions] @ interacted).toarray()
+        neighbours += top_neighbours(cosine * common / (common + CO_SIMILARITY_SHRINKAGE), positions, k)
+    return neighbours
+
+
+def compute_recommendations(k=None, limit=None, stdout=None):
+    """
+    Rebuild RecipeCoSimilarity and every user's recommendation list.
+    Returns ``(number of recipe links, number of users)``.
+    """
+    k = k or settings.RECOMMENDATION_NEIGHBOURS
+    user_ids, recipe_ids, matrix = interaction_matrix()
+    if not len(user_ids):
+        UserRecommendation.objects.all().delete()
+        RecipeCoSimilarity.objects.all().delete()
+        return 0, 0
+
+    neighbours = compute_co_similarities(matrix, k)
+    links = [
+        (row, col, score)
+        for row, best in enumerate(neighbours)
+        for col, score in best
+    ]
+    with transaction.atomic():
+        RecipeCoSimilarity.objects.all().delete()
+        RecipeCoSimilarity.objects.bulk_create([
+            RecipeCoSimilarity(recipe_id=int(recipe_ids[row]), similar_id=int(recipe_ids[col]), score=round(score, 6))
+            for row, col, score in links
+        ], batch_size=1000)
+    if stdout:
+        stdout.write(f"  {len(links)} item-item links")
+
+    # Scores de tous les utilisateurs en un produit : poids (users x recettes) @ voisins (recettes x recettes)
+    similarities = sparse.csr_matrix(
+        (
+            np.array([score for row, col, score in links], dtype=np.float64),
+            ([row for row, col, score in links], [col for row, col, score in links]),
+        ),
+        shape=(len(recipe_ids), len(recipe_ids)),
+    )
+    scores = sparse.csr_matrix(matrix @ similarities)
+    authors = dict(Recipe.objects.filter(pk__in=recipe_ids.tolist()).values_list('pk', 'author_id'))
+
+    UserRecommendation.objects.exclude(user_id__in=user_ids.tolist()).delete()
+    for row, user_id in enumerate(user_ids.tolist()):
+        seen = set(matrix.indices[matrix.indptr[row]:matrix.indptr[row + 1]].tolist())
+        start, end = scores.indptr[row], scores.indptr[row + 1]
+        candidates = {}
+        for col, score in zip(scores.indices[start:end].tolist(), scores.data[start:end].tolist()):
+            recipe_id = int(recipe_ids[col])
+            if col not in seen and authors.get(recipe_id) != user_id:
+                candidates[recipe_id] = score
+        store_recommendations(user_id, candidates, limit)
+    return len(links), len(user_ids)
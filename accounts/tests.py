@@ -1,3 +1,999 @@
-from django.test import TestCase
+import os
+import tempfile
+import threading
+import time
+from datetime import timedelta
+from io import StringIO
+from unittest import mock, skipIf
 
-# Create your tests here.
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser, User
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import OperationalError, connection
+from django.http import Http404, QueryDict
+from django.template.loader import render_to_string
+from django.test import TestCase, RequestFactory, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from core import caching
+from core.cache_backends import SQLiteCache
+
+from . import (
+    autocomplete, comments, counters, dedup, detail_page, facets, favorite_ids, ingredients, pagination, recommendations, search, trending,
+    objcache, unread, viewcounter,
+)
+from .models import (
+    UserProfile, Recipe, RecipeImage, RecipeAnalysis, Rating, Comment, Favorite, SimilarRecipe, RecipeCoSimilarity,
+    DuplicateCandidate, Notification, NutritionMessage,
+)
+
+try:
+    from . import similarity
+except ImportError:  # NumPy / SciPy absents
+    similarity = None
+
+LOCMEM_CACHE = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+
+
+def make_user(username, role='visitor'):
+    user = User.objects.create_user(username=username, password='secret')
+    UserProfile.objects.create(user=user, role=role)
+    return user
+
+
+def make_recipe(author, title='Brik au thon', is_approved=True, **fields):
+    values = {
+        'description': "Une recette tunisienne.",
+        'ingredients': "feuille de brick\noeuf\nthon",
+        'steps': "Plier la feuille.\nFrire.",
+        'prep_time': 10, 'cook_time': 5, 'servings': 2,
+    }
+    values.update(fields)
+    return Recipe.objects.create(author=author, title=title, is_approved=is_approved, **values)
+
+
+@override_settings(CACHES=LOCMEM_CACHE, VIEW_COUNT_FLUSH_INTERVAL=3600)
+class CacheTestCase(TestCase):
+    """Fresh in-memory cache, object cache and view buffer for every test."""
+
+    def setUp(self):
+        cache.clear()
+        objcache.clear()
+        self.addCleanup(self._reset_view_buffer)
+
+    @staticmethod
+    def _reset_view_buffer():
+        with viewcounter._lock:
+            viewcounter._pending.clear()
+            if viewcounter._timer is not None:
+                viewcounter._timer.cancel()
+                viewcounter._timer = None
+
+
+# ====================== RECHERCHE ======================
+class SearchTests(CacheTestCase):
+    def setUp(self):
+        super().setUp()
+        self.chef = make_user('chef', role='chef')
+
+    def test_title_match_ranks_above_description_match(self):
+        mention = make_recipe(self.chef, title='Salade mechouia',
+                              description="Se sert avec une ojja bien relevée.")
+        title = make_recipe(self.chef, title='Ojja merguez')
+        self.assertEqual(search.search_recipes('ojja'), [title, mention])
+
+    def test_only_approved_recipes_and_last_word_as_prefix(self):
+        approved = make_recipe(self.chef, title='Couscous au poisson')
+        make_recipe(self.chef, title='Couscous royal', is_approved=False)
+        self.assertEqual(search.search_recipes('cousc'), [approved])
+
+    def test_index_follows_edits_and_deletion(self):
+        recipe = make_recipe(self.chef, title='Lablabi')
+        recipe.title = 'Kafteji'
+        recipe.save()
+        self.assertEqual(search.search_recipes('lablabi'), [])
+        self.assertEqual(search.search_recipes('kafteji'), [recipe])
+        recipe.delete()
+        self.assertEqual(search.search_recipes('kafteji'), [])
+
+    def test_fts_operators_typed_by_users_are_quoted(self):
+        self.assertEqual(search.build_match_query('brik OR "thon'), '"brik" "or" "thon"*')
+        make_recipe(self.chef)
+        self.assertEqual(search.search_recipes('NEAR( brik'), [])
+
+    def test_typos_and_transliterations_find_the_recipe(self):
+        recipe = make_recipe(self.chef, title='Chakchouka épicée')
+        make_recipe(self.chef, title='Mloukhia')
+        for query in ('chakchouka', 'shakshuka', 'chakchoka', 'CHAKCHOUKA epicee'):
+            with self.subTest(query=query):
+                self.assertEqual(search.fuzzy_search_recipes(query), [recipe])
+
+    def test_fuzzy_search_matches_ingredients_and_chefs(self):
+        recipe = make_recipe(self.chef, title='Tajine malsouka', ingredients="feuilles de malsouka\nharissa")
+        self.assertEqual(search.fuzzy_search_recipes('harisa'), [recipe])
+        self.assertEqual(search.fuzzy_search_chefs('chefs'), [UserProfile.objects.get(user=self.chef)])
+        self.assertEqual(search.fuzzy_search_recipes('zz'), [])
+
+
+# ====================== AUTOCOMPLÉTION ======================
+class AutocompleteTests(CacheTestCase):
+    def setUp(self):
+        super().setUp()
+        # Index propre au test : les signaux mettent à jour celui-ci
+        patcher = mock.patch.object(autocomplete, 'index', autocomplete.PrefixIndex())
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.chef = make_user('chef', role='chef')
+
+    def labels(self, query):
+        return [entry['label'] for entry in autocomplete.suggest(query)]
+
+    def test_prefix_of_any_word_matches(self):
+        index = autocomplete.PrefixIndex()
+        index.put('recipe', 1, 'Chakchouka épicée', '/r/1/')
+        index.put('recipe', 2, 'Ojja', '/r/2/')
+        self.assertEqual([entry['url'] for entry in index.lookup('EPI')], ['/r/1/'])
+        self.assertEqual([entry['url'] for entry in index.lookup('chak')], ['/r/1/'])
+        index.put('recipe', 1, 'Mloukhia', '/r/1/')
+        self.assertEqual(index.lookup('chak'), [])
+        index.discard('recipe', 2)
+        self.assertEqual(len(index), 1)
+
+    def test_shared_entry_leaves_with_its_last_owner(self):
+        index = autocomplete.PrefixIndex()
+        index.share(1, 'ingredient', 'harisa', 'harissa', '/s/?q=harissa')
+        index.share(2, 'ingredient', 'harisa', 'harissa', '/s/?q=harissa')
+        index.release(1)
+        self.assertIn(('ingredient', 'harisa'), index)
+        index.release(2, keep=[('ingredient', 'harisa')])
+        self.assertIn(('ingredient', 'harisa'), index)
+        index.release(2)
+        self.assertNotIn(('ingredient', 'harisa'), index)
+
+    def test_index_follows_recipe_changes(self):
+        make_recipe(self.chef, title='Brik au thon')
+        recipe = make_recipe(self.chef, title='Tajine malsouka', ingredients="feuilles de malsouka\nharissa")
+        autocomplete.rebuild()
+        self.assertCountEqual(self.labels('malsouka'), ['Tajine malsouka', 'malsouka'])
+        self.assertEqual(self.labels('chef'), ['chef'])
+
+        recipe.ingredients = "feuilles de malsouka\nthon"
+        recipe.save()
+        self.assertEqual(self.labels('harissa'), [])
+        # "thon" reste : la brik l'utilise encore
+        recipe.is_approved = False
+        recipe.save()
+        self.assertEqual(self.labels('malsouka'), [])
+        self.assertEqual(self.labels('thon'), ['thon', 'Brik au thon'])
+
+    def test_stale_index_is_rebuilt_in_the_background(self):
+        make_recipe(self.chef, title='Lablabi')
+        autocomplete.rebuild()
+        cache.incr(autocomplete.GENERATION_KEY)
+
+        done = threading.Event()
+        with mock.patch.object(autocomplete, '_rebuild_in_background', side_effect=done.set) as rebuild:
+            self.addCleanup(setattr, autocomplete, '_rebuilding', False)
+            self.assertEqual(self.labels('lab'), ['Lablabi'])
+            self.assertTrue(done.wait(5))
+            # Une seule reconstruction à la fois par worker
+            self.assertEqual(self.labels('lab'), ['Lablabi'])
+        self.assertEqual(rebuild.call_count, 1)
+
+
+# ====================== FACETTES ======================
+class FacetTests(CacheTestCase):
+    def setUp(self):
+        super().setUp()
+        sfax = make_user('sfax', role='chef')
+        tunis = make_user('tunis', role='chef')
+        UserProfile.objects.filter(user=sfax).update(region='sfax')
+        UserProfile.objects.filter(user=tunis).update(region='tunis')
+        make_recipe(sfax, title='Chorba', prep_time=10)
+        make_recipe(sfax, title='Marka', prep_time=45)
+        make_recipe(tunis, title='Lablabi', prep_time=5)
+        make_recipe(tunis, title='Mloukhia', prep_time=5, is_approved=False)
+        self.approved = Recipe.objects.filter(is_approved=True)
+
+    def counts(self, selected):
+        return {
+            (facet['name'], option['value']): option['count']
+            for facet in facets.facet_counts(self.approved, selected)
+            for option in facet['options']
+        }
+
+    def test_counts_apply_the_other_facets_only(self):
+        selected = facets.selected_filters(QueryDict('region=sfax&prep=0-15&servings=bogus'))
+        self.assertEqual(selected, {'region': 'sfax', 'prep': '0-15'})
+        counts = self.counts(selected)
+        # Région : filtrée par le temps de préparation seulement
+        self.assertEqual((counts['region', 'sfax'], counts['region', 'tunis']), (1, 1))
+        # Temps de préparation : filtré par la région seulement
+        self.assertEqual((counts['prep', '0-15'], counts['prep', '31-60']), (1, 1))
+        self.assertEqual(counts['servings', '1-2'], 1)
+        self.assertEqual(
+            list(facets.filter_recipes(self.approved, selected).values_list('title', flat=True)), ['Chorba'])
+
+    def test_cached_counts_follow_recipe_changes(self):
+        self.assertEqual(self.counts({})['region', 'tunis'], 1)
+        Recipe.objects.filter(title='Mloukhia').update(is_approved=True)
+        # update() n'envoie pas de signal : les comptes en cache restent servis
+        self.assertEqual(self.counts({})['region', 'tunis'], 1)
+        make_recipe(User.objects.get(username='tunis'), title='Kafteji')
+        self.assertEqual(self.counts({})['region', 'tunis'], 3)
+
+
+# ====================== AVEC CE QUE J'AI ======================
+class PantryTests(CacheTestCase):
+    def setUp(self):
+        super().setUp()
+        chef = make_user('chef', role='chef')
+        self.brik = make_recipe(chef, title='Brik au thon')
+        self.ojja = make_recipe(chef, title='Ojja', ingredients="4 oeufs\n2 tomates\n1 poivron\n1 c.s. de harissa\nsel et poivre")
+        make_recipe(chef, title='Brik cachée', is_approved=False)
+
+    def test_recipes_with_everything_come_first(self):
+        results = ingredients.recipes_for_pantry(ingredients.parse_pantry('Oeufs, thon, feuilles de brick'))
+        self.assertEqual([row['recipe'] for row in results], [self.brik, self.ojja])
+        brik, ojja = results
+        self.assertTrue(brik['has_everything'])
+        self.assertEqual((brik['matched_count'], brik['missing_count'], brik['coverage']), (4, 0, 1))
+        self.assertFalse(ojja['has_everything'])
+        self.assertEqual((ojja['matched'], ojja['missing_count']), (['oeuf'], 5))
+
+    def test_salt_pepper_and_spelling_variants_match(self):
+        self.assertEqual(ingredients.parse_pantry('Harisa; poivre + sel'), ['harisa', 'poivr', 'sel'])
+        results = ingredients.recipes_for_pantry(ingredients.parse_pantry('harissa, poivre, sel'))
+        self.assertEqual([row['recipe'] for row in results], [self.ojja])
+        self.assertEqual(results[0]['matched_count'], 3)
+
+    def test_index_follows_edits_and_limit_applies(self):
+        self.ojja.ingredients = "oeufs\nmerguez"
+        self.ojja.save()
+        results = ingredients.recipes_for_pantry(['merguez', 'oeuf'], limit=1)
+        self.assertEqual([(row['recipe'], row['has_everything']) for row in results], [(self.ojja, True)])
+        self.assertEqual(ingredients.recipes_for_pantry(ingredients.parse_pantry(' , ;')), [])
+
+
+# ====================== RECETTES SIMILAIRES ======================
+@skipIf(similarity is None, "needs NumPy and SciPy")
+class SimilarRecipeTests(CacheTestCase):
+    def setUp(self):
+        super().setUp()
+        chef = make_user('chef', role='chef')
+        self.brik = make_recipe(chef, title='Brik au thon')
+        self.brik_oeuf = make_recipe(chef, title='Brik à l\'oeuf', ingredients="feuille de brick\noeuf\npersil")
+        self.makroudh = make_recipe(chef, title='Makroudh', ingredients="semoule\ndattes\nmiel",
+                                    steps="Rouler la pâte de dattes.\nFrire.")
+        make_recipe(chef, title='Brik au thon bis', is_approved=False)
+
+    def similar(self, recipe):
+        return list(SimilarRecipe.objects.filter(recipe=recipe).values_list('similar_id', flat=True))
+
+    def test_closest_recipe_comes_first(self):
+        self.assertEqual(similarity.compute_similar_recipes(k=1), 3)
+        self.assertEqual(self.similar(self.brik), [self.brik_oeuf.pk])
+        self.assertEqual(self.similar(self.brik_oeuf), [self.brik.pk])
+        self.assertEqual(SimilarRecipe.objects.filter(similar__is_approved=False).count(), 0)
+
+    def test_incremental_run_recomputes_only_affected_recipes(self):
+        similarity.compute_similar_recipes(k=1)
+        self.assertEqual(similarity.compute_similar_recipes(k=1), 0)
+
+        self.makroudh.title = 'Brik au thon et oeuf'
+        self.makroudh.ingredients = "feuille de brick\noeuf\nthon"
+        self.makroudh.steps = self.brik.steps
+        self.makroudh.save()
+        self.assertGreater(similarity.compute_similar_recipes(k=1), 0)
+        self.assertEqual(self.similar(self.brik), [self.makroudh.pk])
+
+    def test_tfidf_rows_are_normalised(self):
+        matrix = similarity.tfidf_matrix([['brik', 'thon'], ['brik'], []])
+        norms = matrix.multiply(matrix).sum(axis=1).ravel().tolist()[0]
+        self.assertEqual([round(norm, 6) for norm in norms], [1.0, 1.0, 0.0])
+
+
+# ====================== RECOMMANDATIONS ======================
+class RecommendationTests(CacheTestCase):
+    def setUp(self):
+        super().setUp()
+        chef = make_user('chef', role='chef')
+        self.alice, self.bob = make_user('alice'), make_user('bob')
+        self.brik, self.ojja, self.chorba = (
+            make_recipe(chef, title=title) for title in ('Brik', 'Ojja', 'Chorba'))
+
+    def recommended(self, user):
+        return recommendations.recommended_recipes(user)
+
+    def test_refresh_user_scores_stored_neighbours(self):
+        RecipeCoSimilarity.objects.create(recipe=self.brik, similar=self.ojja, score=0.4)
+        RecipeCoSimilarity.objects.create(recipe=self.brik, similar=self.chorba, score=0.9)
+        RecipeCoSimilarity.objects.create(recipe=self.ojja, similar=self.chorba, score=0.9)
+        Favorite.objects.create(user=self.alice, recipe=self.brik)
+        # Une mauvaise note pèse contre les voisines de la recette
+        Rating.objects.create(recipe=self.ojja, author=self.alice, score=1)
+        recommendations.refresh_user(self.alice.pk)
+        self.assertEqual(self.recommended(self.alice), [])
+
+        Rating.objects.filter(author=self.alice).update(score=5)
+        recommendations.refresh_user(self.alice.pk)
+        self.assertEqual(self.recommended(self.alice), [self.chorba])
+
+        Recipe.objects.filter(pk=self.chorba.pk).update(is_approved=False)
+        self.assertEqual(self.recommended(self.alice), [])
+
+    @skipIf(similarity is None, "needs NumPy and SciPy")
+    def test_batch_recommends_what_similar_users_liked(self):
+        Favorite.objects.create(user=self.alice, recipe=self.brik)
+        Favorite.objects.create(user=self.alice, recipe=self.ojja)
+        Favorite.objects.create(user=self.bob, recipe=self.brik)
+        Rating.objects.create(recipe=self.chorba, author=self.bob, score=2)
+
+        links, users = similarity.compute_recommendations()
+        self.assertEqual(users, 2)
+        self.assertEqual(self.recommended(self.bob), [self.ojja])
+        self.assertEqual(self.recommended(self.alice), [])
+        # Le recalcul d'un seul utilisateur repart des voisins stockés
+        carol = make_user('carol')
+        Favorite.objects.create(user=carol, recipe=self.ojja)
+        recommendations.refresh_user(carol.pk)
+        self.assertEqual(self.recommended(carol), [self.brik])
+
+
+# ====================== TENDANCES ======================
+class TrendingTests(CacheTestCase):
+    def setUp(self):
+        super().setUp()
+        self.chef = make_user('chef', role='chef')
+        self.visitor = make_user('visitor')
+        self.old = make_recipe(self.chef, title='Chorba')
+        self.new = make_recipe(self.chef, title='Ojja')
+        created = timezone.now() - timedelta(hours=settings.TRENDING_HALF_LIFE_HOURS)
+        Recipe.objects.filter(pk=self.old.pk).update(
+            created_at=created, trending_score=trending.baseline_score(created))
+
+    def test_engagement_outweighs_age_one_half_life_at_a_time(self):
+        self.assertEqual(list(trending.trending_recipes()), [self.new, self.old])
+        # Une demi-vie plus ancienne : il lui faut plus du double de l'engagement pour passer devant
+        Recipe.objects.filter(pk=self.old.pk).update(views=2)
+        trending.refresh_scores(full=True)
+        self.assertEqual(list(trending.trending_recipes()), [self.old, self.new])
+
+    def test_incremental_refresh_reads_recipes_with_new_activity(self):
+        self.assertEqual(trending.refresh_scores(), 0)
+        Rating.objects.create(recipe=self.old, author=self.visitor, score=5)
+        Favorite.objects.create(user=self.visitor, recipe=self.new)
+        self.assertEqual(trending.refresh_scores(), 2)
+        self.assertEqual(trending.refresh_scores(), 0)
+
+        # update() direct sans horodatage d'activité : seul un recalcul complet le voit
+        Recipe.objects.filter(pk=self.new.pk).update(views=50)
+        self.assertEqual(trending.refresh_scores(), 0)
+        self.assertEqual(trending.refresh_scores(full=True), 1)
+        self.assertEqual(list(trending.trending_recipes(limit=1)), [self.new])
+
+
+# ====================== DOUBLONS ======================
+class DuplicateTests(CacheTestCase):
+    STEPS = ("Faire revenir l'oignon dans l'huile d'olive.\nAjouter la tomate et la harissa.\n"
+             "Laisser mijoter dix minutes puis casser les oeufs.\nCouvrir et servir chaud avec du pain.")
+    INGREDIENTS = "4 oeufs\n2 tomates\n1 oignon\nharissa\nhuile d'olive\npain"
+
+    def setUp(self):
+        super().setUp()
+        self.chef = make_user('chef', role='chef')
+        self.original = make_recipe(self.chef, title='Ojja', ingredients=self.INGREDIENTS, steps=self.STEPS)
+
+    def duplicates(self, recipe):
+        return set(DuplicateCandidate.objects.filter(recipe=recipe).values_list('duplicate_id', flat=True))
+
+    def test_near_copy_is_flagged_both_ways(self):
+        copy = make_recipe(self.chef, title='Ojja de maman', ingredients=self.INGREDIENTS + "\npersil",
+                           steps=self.STEPS.replace('dix', '10'))
+        other = make_recipe(self.chef, title='Brik au thon')
+        self.assertEqual(self.duplicates(copy), {self.original.pk})
+        self.assertEqual(self.duplicates(self.original), {copy.pk})
+        self.assertEqual(self.duplicates(other), set())
+
+        copy.ingredients, copy.steps = "semoule\ndattes", "Rouler la pâte et frire."
+        copy.save()
+        self.assertEqual(self.duplicates(self.original), set())
+
+    def test_signature_estimates_jaccard_similarity(self):
+        items = {f'item{i}' for i in range(100)}
+        self.assertEqual(dedup.similarity(dedup.minhash(items), dedup.minhash(set(items))), 1.0)
+        half = {f'item{i}' for i in range(50, 150)}
+        # Jaccard exact : 50 / 150
+        self.assertAlmostEqual(dedup.similarity(dedup.minhash(items), dedup.minhash(half)), 1 / 3, delta=0.15)
+        self.assertEqual(dedup.unpack(dedup.pack(dedup.minhash(items))), dedup.minhash(items))
+        self.assertIsNone(dedup.minhash(set()))
+
+
+# ====================== PAGINATION PAR CURSEUR ======================
+class KeysetPaginationTests(CacheTestCase):
+    def setUp(self):
+        super().setUp()
+        chef = make_user('chef', role='chef')
+        now = timezone.now()
+        self.recipes = [make_recipe(chef, title=f'Recette {i}') for i in range(7)]
+        # Deux recettes à la même date : le départage se fait sur l'id
+        for i, recipe in enumerate(self.recipes):
+            created = now - timedelta(hours=min(i, 5))
+            Recipe.objects.filter(pk=recipe.pk).update(created_at=created)
+        self.expected = list(Recipe.objects.order_by('-created_at', '-pk').values_list('pk', flat=True))
+        self.factory = RequestFactory()
+
+    def page(self, cursor=None):
+        request = self.factory.get('/recipes/', {'cursor': cursor} if cursor else {})
+        return pagination.paginate(request, Recipe.objects.all(), page_size=3)
+
+    def test_walk_forward_then_back(self):
+        pages = [self.page()]
+        while pages[-1].has_next:
+            pages.append(self.page(pages[-1].next_cursor))
+        forward = [[recipe.pk for recipe in page] for page in pages]
+        self.assertEqual(sum(forward, []), self.expected)
+        self.assertEqual([len(ids) for ids in forward], [3, 3, 1])
+        self.assertFalse(pages[0].has_previous)
+
+        back = self.page(pages[2].previous_cursor)
+        self.assertEqual([recipe.pk for recipe in back], forward[1])
+        first = self.page(back.previous_cursor)
+        self.assertEqual([recipe.pk for recipe in first], forward[0])
+        self.assertFalse(first.has_previous)
+        self.assertTrue(first.has_next)
+
+    def test_invalid_cursor_gives_first_page(self):
+        self.assertEqual([recipe.pk for recipe in self.page('not-a-cursor')], self.expected[:3])
+
+
+# ====================== IMAGE DE COUVERTURE ======================
+class CoverImageTests(CacheTestCase):
+    def test_cover_follows_the_first_image(self):
+        recipe = make_recipe(make_user('chef', role='chef'))
+        first = RecipeImage.objects.create(recipe=recipe, image='recipes/brik-1.jpg')
+        RecipeImage.objects.create(recipe=recipe, image='recipes/brik-2.jpg')
+        recipe.refresh_from_db()
+        self.assertEqual(recipe.cover_image.name, 'recipes/brik-1.jpg')
+
+        first.delete()
+        recipe.refresh_from_db()
+        self.assertEqual(recipe.cover_image.name, 'recipes/brik-2.jpg')
+        RecipeImage.objects.filter(recipe=recipe).delete()
+        recipe.refresh_from_db()
+        self.assertEqual(recipe.cover_image.name, '')
+
+
+# ====================== FAVORIS ======================
+class FavoriteIdsTests(CacheTestCase):
+    def setUp(self):
+        super().setUp()
+        chef = make_user('chef', role='chef')
+        self.visitor = make_user('visitor')
+        self.recipe = make_recipe(chef)
+
+    def test_set_is_cached_and_dropped_on_toggle(self):
+        self.assertEqual(favorite_ids.for_user(AnonymousUser()), frozenset())
+        self.assertEqual(favorite_ids.for_user(self.visitor), frozenset())
+        with self.assertNumQueries(0):
+            favorite_ids.for_user(self.visitor)
+
+        self.client.force_login(self.visitor)
+        self.client.post(reverse('accounts:toggle_favorite', args=[self.recipe.pk]))
+        self.assertEqual(favorite_ids.for_user(self.visitor), {self.recipe.pk})
+        self.client.post(reverse('accounts:toggle_favorite', args=[self.recipe.pk]))
+        self.assertEqual(favorite_ids.for_user(self.visitor), frozenset())
+
+
+# ====================== COMPTEURS DES ANNUAIRES ======================
+class ProfileCounterTests(CacheTestCase):
+    def setUp(self):
+        super().setUp()
+        self.chef = make_user('chef', role='chef')
+        self.visitor = make_user('visitor')
+        self.recipe = make_recipe(self.chef)
+
+    def profile(self):
+        return UserProfile.objects.get(user=self.chef)
+
+    def test_approval_updates_recipe_count(self):
+        self.assertEqual(self.profile().approved_recipe_count, 1)
+        self.recipe.is_approved = False
+        self.recipe.save()
+        self.assertEqual(self.profile().approved_recipe_count, 0)
+        make_recipe(self.chef, title='Lablabi')
+        self.assertEqual(self.profile().approved_recipe_count, 1)
+
+    def test_rating_counters_follow_create_change_delete(self):
+        rating = Rating.objects.create(recipe=self.recipe, author=self.visitor, score=4)
+        profile = self.profile()
+        self.assertEqual((profile.rating_count, profile.rating_sum), (1, 4))
+
+        rating = Rating.objects.get(pk=rating.pk)
+        rating.score = 2
+        rating.save()
+        profile = self.profile()
+        self.assertEqual((profile.rating_count, profile.rating_sum), (1, 2))
+
+        rating.delete()
+        profile = self.profile()
+        self.assertEqual((profile.rating_count, profile.rating_sum), (0, 0))
+
+    def test_recipe_deletion_removes_its_ratings_once(self):
+        Rating.objects.create(recipe=self.recipe, author=self.visitor, score=5)
+        self.recipe.delete()
+        profile = self.profile()
+        self.assertEqual((profile.approved_recipe_count, profile.rating_count, profile.rating_sum), (0, 0, 0))
+
+    def test_reconcile_command_repairs_drift(self):
+        Rating.objects.create(recipe=self.recipe, author=self.visitor, score=3)
+        UserProfile.objects.filter(user=self.chef).update(approved_recipe_count=9, rating_sum=40)
+
+        call_command('reconcile_profile_counters', stdout=StringIO())
+
+        profile = self.profile()
+        self.assertEqual((profile.approved_recipe_count, profile.rating_count, profile.rating_sum), (1, 1, 3))
+        self.assertEqual(counters.reconcile(), [])
+
+
+# ====================== COMPTEURS DES RECETTES ======================
+class RecipeCounterTests(CacheTestCase):
+    def setUp(self):
+        super().setUp()
+        self.chef = make_user('chef', role='chef')
+        self.visitor = make_user('visitor')
+        self.recipe = make_recipe(self.chef)
+
+    def reload(self):
+        return Recipe.objects.get(pk=self.recipe.pk)
+
+    def test_rating_histogram_follows_create_change_delete(self):
+        rating = Rating.objects.create(recipe=self.recipe, author=self.visitor, score=4)
+        self.assertEqual(self.reload().rating_4_count, 1)
+
+        rating = Rating.objects.get(pk=rating.pk)
+        rating.score = 2
+        rating.save()
+        recipe = self.reload()
+        self.assertEqual((recipe.rating_4_count, recipe.rating_2_count), (0, 1))
+
+        rating.delete()
+        self.assertEqual(self.reload().rating_count, 0)
+
+    def test_comment_and_favorite_counters(self):
+        comment = Comment.objects.create(recipe=self.recipe, author=self.visitor, content="Bnin !")
+        self.client.force_login(self.visitor)
+        self.client.post(reverse('accounts:toggle_favorite', args=[self.recipe.pk]))
+        recipe = self.reload()
+        self.assertEqual((recipe.comment_count, recipe.favorite_count), (1, 1))
+
+        comment.delete()
+        self.client.post(reverse('accounts:toggle_favorite', args=[self.recipe.pk]))
+        recipe = self.reload()
+        self.assertEqual((recipe.comment_count, recipe.favorite_count), (0, 0))
+
+    def test_reconcile_command_repairs_drift(self):
+        Rating.objects.create(recipe=self.recipe, author=self.visitor, score=3)
+        Comment.objects.create(recipe=self.recipe, author=self.visitor, content="Top")
+        Recipe.objects.filter(pk=self.recipe.pk).update(comment_count=7, rating_3_count=0)
+
+        call_command('reconcile_recipe_counters', stdout=StringIO())
+
+        recipe = self.reload()
+        self.assertEqual((recipe.comment_count, recipe.rating_3_count), (1, 1))
+        self.assertEqual(counters.reconcile_recipes(), [])
+
+
+# ====================== COMPTEUR DE VUES ======================
+class ViewCounterTests(CacheTestCase):
+    def setUp(self):
+        super().setUp()
+        self.chef = make_user('chef', role='chef')
+        self.recipe = make_recipe(self.chef)
+        self.url = reverse('accounts:recipe_detail', args=[self.recipe.pk])
+
+    def test_views_are_buffered_then_written_in_one_flush(self):
+        other = make_recipe(self.chef, title='Lablabi')
+        for recipe_id in (self.recipe.pk, self.recipe.pk, other.pk):
+            viewcounter.record(recipe_id)
+        self.assertEqual(Recipe.objects.get(pk=self.recipe.pk).views, 0)
+        self.assertEqual(viewcounter.pending(self.recipe.pk), 2)
+        self.assertIsNotNone(viewcounter._timer)
+
+        self.assertEqual(viewcounter.flush(), 3)
+        self.assertEqual(viewcounter.pending(self.recipe.pk), 0)
+        self.assertIsNone(viewcounter._timer)
+        self.assertEqual(Recipe.objects.get(pk=self.recipe.pk).views, 2)
+        self.assertEqual(UserProfile.objects.get(user=self.chef).total_views, 3)
+
+    def test_each_visitor_counted_once(self):
+        first, second = self.client_class(), self.client_class()
+        first.get(self.url)
+        first.get(self.url)
+        second.get(self.url)
+        self.assertIn(viewcounter.VISITOR_COOKIE, second.cookies)
+        self.assertEqual(viewcounter.pending(self.recipe.pk), 2)
+
+        # Un utilisateur connecté est reconnu par son id ; l'auteur n'est pas compté
+        self.client.force_login(make_user('visitor'))
+        self.client.get(self.url)
+        self.client.get(self.url)
+        self.assertEqual(viewcounter.pending(self.recipe.pk), 3)
+        self.assertNotIn(f'recipe_viewed_{self.recipe.pk}', self.client.session)
+        self.client.force_login(self.chef)
+        self.client.get(self.url)
+        self.assertEqual(viewcounter.pending(self.recipe.pk), 3)
+
+    @override_settings(VIEW_COUNT_FLUSH_THRESHOLD=1)
+    def test_failed_flush_keeps_views_and_page_works(self):
+        with mock.patch.object(viewcounter, '_write', side_effect=OperationalError('database is locked')):
+            response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(viewcounter.pending(self.recipe.pk), 1)
+        self.assertIsNotNone(viewcounter._timer)
+
+        viewcounter.flush()
+        self.assertEqual(Recipe.objects.get(pk=self.recipe.pk).views, 1)
+
+
+# ====================== COMMENTAIRES ======================
+@override_settings(COMMENTS_PAGE_SIZE=2, COMMENT_REPLIES_PREVIEW=2, COMMENT_REPLIES_PAGE_SIZE=2)
+class CommentTreeTests(CacheTestCase):
+    def setUp(self):
+        super().setUp()
+        self.chef = make_user('chef', role='chef')
+        visitor = make_user('visitor')
+        self.recipe = make_recipe(self.chef)
+        self.threads = [
+            Comment.objects.create(recipe=self.recipe, author=visitor, content=f"Commentaire {i}") for i in range(3)
+        ]
+        newest = self.threads[-1]
+        self.replies = [
+            Comment.objects.create(recipe=self.recipe, author=self.chef, content=f"Réponse {i}", parent=newest)
+            for i in range(5)
+        ]
+        self.factory = RequestFactory()
+
+    def test_page_and_reply_previews_in_two_queries(self):
+        with self.assertNumQueries(2):
+            page = comments.comment_page(self.factory.get('/'), self.recipe)
+            newest, older = page.items
+            [reply.author.username for reply in newest.reply_preview]
+        self.assertEqual([newest, older], self.threads[:0:-1])
+        self.assertTrue(page.has_next)
+        self.assertEqual(newest.reply_preview, self.replies[:2:-1])
+        self.assertEqual(newest.reply_total, 5)
+        self.assertEqual((older.reply_preview, older.reply_total, older.more_replies_query), ([], 0, ''))
+
+        rest = comments.replies_page(self.factory.get('/?' + newest.more_replies_query), newest)
+        self.assertEqual(list(rest), self.replies[2:0:-1])
+        self.assertTrue(rest.has_next)
+
+    def test_detail_page_shows_one_page_of_threads(self):
+        response = self.client.get(reverse('accounts:recipe_detail', args=[self.recipe.pk]))
+        self.assertContains(response, "Commentaire 2")
+        self.assertContains(response, "Réponse 4")
+        self.assertNotContains(response, "Commentaire 0")
+        self.assertNotContains(response, "Réponse 2")
+
+
+# ====================== FICHE RECETTE ======================
+class DetailPageTests(CacheTestCase):
+    def test_query_budget_does_not_grow_with_content(self):
+        chef = make_user('chef', role='chef')
+        recipe = make_recipe(chef)
+        for i in range(3):
+            RecipeImage.objects.create(recipe=recipe, image=f'recipes/brik-{i}.jpg')
+        for i in range(4):
+            visitor = make_user(f'visitor{i}')
+            Rating.objects.create(recipe=recipe, author=visitor, score=i + 1)
+            comment = Comment.objects.create(recipe=recipe, author=visitor, content="Top")
+            Comment.objects.create(recipe=recipe, author=chef, content="Merci", parent=comment)
+        objcache.clear()
+
+        request = RequestFactory().get('/')
+        request.user = AnonymousUser()
+        with CaptureQueriesContext(connection) as queries:
+            context = detail_page.load(request, recipe.pk)
+        self.assertLessEqual(len(queries), detail_page.MAX_QUERIES)
+        self.assertEqual(len(context['images']), 3)
+        self.assertEqual(len(context['comments']), 4)
+
+
+# ====================== CACHE DES PAGES ======================
+class PageCacheTests(CacheTestCase):
+    def setUp(self):
+        super().setUp()
+        self.chef = make_user('chef', role='chef')
+        self.visitor = make_user('visitor')
+        self.recipe = make_recipe(self.chef, title='Kafteji')
+        self.url = reverse('accounts:recipe_detail', args=[self.recipe.pk])
+
+    def test_anonymous_page_served_from_cache_until_a_change(self):
+        self.assertContains(self.client.get(self.url), 'Kafteji')
+        # update() n'envoie pas de signal : la page en cache reste servie
+        Recipe.objects.filter(pk=self.recipe.pk).update(title='Ojja')
+        self.assertContains(self.client.get(self.url), 'Kafteji')
+
+        Comment.objects.create(recipe=self.recipe, author=self.visitor, content="Bnin")
+        self.assertContains(self.client.get(self.url), 'Ojja')
+
+    def test_signed_in_users_never_get_the_anonymous_page(self):
+        self.assertNotContains(self.client.get(self.url), 'Logout')
+        self.client.force_login(self.visitor)
+        self.assertContains(self.client.get(self.url), 'Logout')
+
+
+# ====================== FRAGMENTS EN CACHE ======================
+class FragmentCacheTests(CacheTestCase):
+    def setUp(self):
+        super().setUp()
+        self.chef = make_user('chef', role='chef')
+        self.recipe = make_recipe(self.chef, title='Kafteji')
+
+    def recipe_card(self):
+        recipe = Recipe.objects.select_related('author', 'analysis').get(pk=self.recipe.pk)
+        return render_to_string('includes/recipe_card.html', {'recipe': recipe, 'user': AnonymousUser()})
+
+    def test_recipe_card_is_versioned_by_updated_at(self):
+        self.assertIn('Kafteji', self.recipe_card())
+        # Même version : le fragment en cache est resservi, les vues (hors cache) sont à jour
+        Recipe.objects.filter(pk=self.recipe.pk).update(title='Ojja', views=7)
+        card = self.recipe_card()
+        self.assertIn('Kafteji', card)
+        self.assertIn('7 views', card)
+
+        # Une analyse change la version de la carte (badge "Analyzed")
+        RecipeAnalysis.objects.create(recipe=self.recipe, nutritionist=make_user('nutri', role='nutritionist'))
+        card = self.recipe_card()
+        self.assertIn('Ojja', card)
+        self.assertIn('Analyzed by Nutritionist', card)
+
+    def test_chef_card_is_versioned_by_profile_updated_at(self):
+        def chef_card():
+            profile = UserProfile.objects.select_related('user').get(user=self.chef)
+            return render_to_string('includes/chef_card.html', {'profile': profile})
+
+        self.assertIn('1 recipe published', chef_card())
+        make_recipe(self.chef, title='Lablabi')
+        self.assertIn('2 recipes published', chef_card())
+        User.objects.filter(pk=self.chef.pk).update(username='chef_fatma')
+        self.assertIn('chef_fatma', chef_card())
+
+
+# ====================== GET CONDITIONNELS ======================
+class ConditionalGetTests(CacheTestCase):
+    def setUp(self):
+        super().setUp()
+        self.chef = make_user('chef', role='chef')
+        self.visitor = make_user('visitor')
+        self.recipe = make_recipe(self.chef, title='Kafteji')
+        self.url = reverse('accounts:recipe_detail', args=[self.recipe.pk])
+
+    def assertRevalidated(self, url, etag):
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+        return response
+
+    def test_recipe_etag_changes_with_ratings(self):
+        etag = self.client.get(self.url)['ETag']
+        self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        Rating.objects.create(recipe=self.recipe, author=self.visitor, score=5)
+        self.assertRevalidated(self.url, etag)
+
+    def test_recipe_etag_changes_with_similar_recipes(self):
+        etag = self.client.get(self.url)['ETag']
+        SimilarRecipe.objects.create(recipe=self.recipe, similar=make_recipe(self.chef, title='Ojja'), score=0.5, rank=1)
+        self.assertRevalidated(self.url, etag)
+
+    def test_etag_changes_with_the_csrf_secret(self):
+        # Les formulaires de la page embarquent le jeton CSRF
+        self.client.force_login(self.visitor)
+        self.client.get(self.url)  # pose le cookie CSRF
+        etag = self.client.get(self.url)['ETag']
+        self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        self.client.cookies['csrftoken'] = 'x' * 32
+        self.assertRevalidated(self.url, etag)
+
+    def test_chef_etag_changes_with_approved_recipes(self):
+        url = reverse('accounts:chef_profile_detail', args=[self.chef.username])
+        etag = self.client.get(url)['ETag']
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        make_recipe(self.chef, title='Makloub')
+        response = self.assertRevalidated(url, etag)
+        self.assertEqual(response.context['recipe_count'], 2)
+
+
+# ====================== COMPTEURS NON LUS ======================
+class UnreadCountTests(CacheTestCase):
+    def setUp(self):
+        super().setUp()
+        self.visitor = make_user('visitor')
+        self.nutritionist = make_user('nutri', role='nutritionist')
+
+    def notify(self, message="Nouvelle note"):
+        with self.captureOnCommitCallbacks(execute=True):
+            return Notification.objects.create(user=self.visitor, message=message)
+
+    def test_counts_are_cached_and_written_through(self):
+        self.assertEqual(unread.counts(AnonymousUser()), {'notifications': 0, 'messages': 0})
+        self.assertEqual(unread.counts(self.visitor), {'notifications': 0, 'messages': 0})
+        self.notify()
+        self.notify()
+        with self.captureOnCommitCallbacks(execute=True):
+            NutritionMessage.objects.create(sender=self.nutritionist, recipient=self.visitor,
+                                            subject="Analyse", message="Bonjour")
+        with self.assertNumQueries(0):
+            self.assertEqual(unread.counts(self.visitor), {'notifications': 2, 'messages': 1})
+
+    def test_marking_read_decrements_the_cached_count(self):
+        first = self.notify()
+        self.notify()
+        self.assertEqual(unread.counts(self.visitor)['notifications'], 2)
+
+        self.client.force_login(self.visitor)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.get(reverse('accounts:read_notification', args=[first.pk]))
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.get(reverse('accounts:read_notification', args=[first.pk]))
+        self.assertEqual(unread.counts(self.visitor)['notifications'], 1)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(reverse('accounts:mark_notifications_read'))
+        self.assertEqual(unread.counts(self.visitor)['notifications'], 0)
+
+    def test_other_changes_drop_the_counter(self):
+        notification = self.notify()
+        self.assertEqual(unread.counts(self.visitor)['notifications'], 1)
+        with self.captureOnCommitCallbacks(execute=True):
+            notification.delete()
+        with self.assertNumQueries(1):
+            self.assertEqual(unread.counts(self.visitor)['notifications'], 0)
+
+
+# ====================== BOÎTE À OUTILS DU CACHE ======================
+class CachingToolkitTests(CacheTestCase):
+    def setUp(self):
+        super().setUp()
+        self.calls = 0
+
+    def compute(self, value='valeur', delay=0):
+        def compute():
+            self.calls += 1
+            time.sleep(delay)
+            return value
+        return compute
+
+    def test_value_and_none_are_cached(self):
+        for i in range(2):
+            self.assertEqual(caching.cached('toolkit:value', self.compute(), 60, beta=0), 'valeur')
+            self.assertIsNone(caching.cached('toolkit:missing', self.compute(None), 60, beta=0))
+        self.assertEqual(self.calls, 2)
+
+    def test_bump_invalidates_the_namespace(self):
+        caching.cached('toolkit:value', self.compute(), 60, namespaces=['recipes'], beta=0)
+        caching.cached('toolkit:value', self.compute(), 60, namespaces=['recipes'], beta=0)
+        caching.bump('recipes')
+        caching.cached('toolkit:value', self.compute(), 60, namespaces=['recipes'], beta=0)
+        self.assertEqual(self.calls, 2)
+
+        # Version évincée : jamais de retour à une ancienne version
+        before = caching.versions(['recipes'])
+        cache.delete('ns:recipes')
+        self.assertNotEqual(caching.versions(['recipes']), before)
+
+    def test_concurrent_misses_compute_once(self):
+        results = []
+        compute = self.compute(delay=0.2)
+        threads = [
+            threading.Thread(target=lambda: results.append(caching.cached('toolkit:slow', compute, 60, beta=0)))
+            for i in range(6)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(results, ['valeur'] * 6)
+        self.assertEqual(self.calls, 1)
+
+    def test_entry_near_expiry_is_refreshed_early(self):
+        key = caching.make_key('toolkit:value')
+        cache.set(key, ('ancienne', time.time(), 1.0), 60)
+        self.assertEqual(caching.cached('toolkit:value', self.compute(), 60, beta=0), 'ancienne')
+        self.assertEqual(caching.cached('toolkit:value', self.compute(), 60, beta=1), 'valeur')
+        self.assertEqual(self.calls, 1)
+
+
+# ====================== CACHE SQLITE ======================
+class SQLiteCacheTests(TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, 'cache.sqlite3')
+        self.cache = SQLiteCache(self.path, {'OPTIONS': {'COMPACT_INTERVAL': 0}})
+
+    def run_threads(self, target, count=8):
+        threads = [threading.Thread(target=target) for i in range(count)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+    def test_add_has_exactly_one_winner(self):
+        results = []
+        self.run_threads(lambda: results.append(self.cache.add('lock', 1, 30)))
+        self.assertEqual(results.count(True), 1)
+
+    def test_add_replaces_an_expired_entry(self):
+        self.cache.set('lock', 1, timeout=-1)
+        self.assertTrue(self.cache.add('lock', 2))
+        self.assertEqual(self.cache.get('lock'), 2)
+
+    def test_concurrent_incr_loses_nothing(self):
+        self.cache.set('counter', 0)
+
+        def bump():
+            for i in range(100):
+                self.cache.incr('counter')
+        self.run_threads(bump)
+        self.assertEqual(self.cache.get('counter'), 800)
+        # Une autre instance (un autre worker) lit le même fichier
+        self.assertEqual(SQLiteCache(self.path, {'OPTIONS': {'COMPACT_INTERVAL': 0}}).get('counter'), 800)
+
+    def test_incr_missing_key_raises(self):
+        with self.assertRaises(ValueError):
+            self.cache.incr('missing')
+
+
+# ====================== CACHE D'OBJETS ======================
+class ObjectCacheTests(CacheTestCase):
+    def setUp(self):
+        super().setUp()
+        self.chef = make_user('chef', role='chef')
+        self.visitor = make_user('visitor')
+        self.recipe = make_recipe(self.chef, title='Kafteji')
+
+    def test_hit_costs_no_query_and_save_invalidates(self):
+        objcache.approved_recipe_or_404(self.recipe.pk)
+        with self.assertNumQueries(0):
+            recipe = objcache.approved_recipe_or_404(self.recipe.pk)
+            self.assertEqual(recipe.author.username, 'chef')
+
+        self.recipe.title = 'Ojja'
+        self.recipe.save()
+        self.assertEqual(objcache.approved_recipe_or_404(self.recipe.pk).title, 'Ojja')
+        self.recipe.is_approved = False
+        self.recipe.save()
+        with self.assertRaises(Http404):
+            objcache.approved_recipe_or_404(self.recipe.pk)
+
+    def test_counter_update_invalidates_cached_profile(self):
+        self.assertEqual(objcache.profile_of(self.chef.pk).rating_count, 0)
+        Rating.objects.create(recipe=self.recipe, author=self.visitor, score=5)
+        self.assertEqual(objcache.profile_of(self.chef.pk).rating_count, 1)
+
+    def test_chef_lookup_and_negative_caching(self):
+        self.assertEqual(objcache.chef_or_404('chef').user, self.chef)
+        for username in ('visitor', 'nobody'):
+            with self.assertRaises(Http404):
+                objcache.chef_or_404(username)
+        with self.assertNumQueries(0), self.assertRaises(Http404):
+            objcache.chef_or_404('nobody')
+
+        profile = UserProfile.objects.get(user=self.visitor)
+        profile.role = 'chef'
+        profile.save()
+        self.assertEqual(objcache.chef_or_404('visitor').user, self.visitor)
+
+    @override_settings(OBJECT_CACHE_SIZE=1)
+    def test_least_recently_used_entry_is_evicted(self):
+        objcache.profile_of(self.chef.pk)
+        objcache.profile_of(self.visitor.pk)
+        with self.assertNumQueries(1):
+            objcache.profile_of(self.chef.pk)
@@ -0,0 +1,128 @@
+# accounts/text.py
+"""
+Text normalisation helpers shared by the search indexes.
+
+Tunisian dish names are written in many ways (chakchouka / shakshuka /
+chekchouka, brik / brick, Arabic or Latin script). ``normalize`` folds all of
+them towards one Latin spelling so that trigram similarity can do the rest.
+"""
+import re
+import unicodedata
+
+# Translittération arabe -> latin (usage tunisien / francophone)
+ARABIC_TO_LATIN = {
+    'ا': 'a', 'أ': 'a', 'إ': 'i', 'آ': 'a', 'ى': 'a', 'ة': 'a', 'ء': '',
+    'ؤ': 'ou', 'ئ': 'i', 'ب': 'b', 'ت': 't', 'ث': 'th', 'ج': 'j', 'ح': 'h',
+    'خ': 'kh', 'د': 'd', 'ذ': 'dh', 'ر': 'r', 'ز': 'z', 'س': 's', 'ش': 'ch',
+    'ص': 's', 'ض': 'd', 'ط': 't', 'ظ': 'dh', 'ع': 'a', 'غ': 'gh', 'ف': 'f',
+    'ق': 'k', 'ك': 'k', 'ل': 'l', 'م': 'm', 'ن': 'n', 'ه': 'h', 'و': 'ou',
+    'ي': 'i', 'ـ': '',
+}
+
+# Variantes orthographiques courantes, appliquées dans cet ordre
+SPELLING_FOLDS = (
+    ('sh', 'ch'),
+    ('sch', 'ch'),
+    ('ck', 'k'),
+    ('q', 'k'),
+    ('ph', 'f'),
+    ('ou', 'u'),
+    ('oo', 'u'),
+    ('ee', 'i'),
+    ('y', 'i'),
+)
+
+_NON_WORD_RE = re.compile(r'[^a-z0-9]+')
+_REPEAT_RE = re.compile(r'(.)\1+')
+
+# Mots ignorés dans les lignes d'ingrédients : liaisons, unités, mesures et qualificatifs,
+# jamais de vrais ingrédients (sel, poivre, eau... se cherchent aussi)
+INGREDIENT_STOPWORDS = {
+    'a', 'au', 'aux', 'de', 'd', 'du', 'des', 'la', 'le', 'les', 'l', 'un', 'une',
+    'et', 'ou', 'en', 'pour', 'avec', 'of', 'the', 'and', 'or', 'to', 'for', 'with',
+    'g', 'gr', 'kg', 'mg', 'ml', 'cl', 'dl', 'l', 'c', 'cs', 'cc', 'cuillere', 'cuilleres',
+    'soupe', 'cafe', 'tbsp', 'tsp', 'cup', 'cups', 'tasse', 'tasses', 'verre', 'verres',
+    'pincee', 'pinch', 'gousse', 'gousses', 'clove', 'cloves', 'botte', 'bunch',
+    'piece', 'pieces', 'tranche', 'tranches', 'slice', 'slices', 'boite', 'can',
+    'petit', 'petite', 'petits', 'petites', 'gros', 'grosse', 'grand', 'grande',
+    'large', 'small', 'medium', 'frais', 'fraiche', 'fresh', 'hache', 'hachee',
+    'chopped', 'moulu', 'ground',
+}
+
+
+def strip_accents(text):
+    text = ''.join(ARABIC_TO_LATIN.get(ch, ch) for ch in text)
+    decomposed = unicodedata.normalize('NFKD', text)
+    return ''.join(ch for ch in decomposed if not unicodedata.combining(ch))
+
+
+def fold_word(word):
+    for old, new in SPELLING_FOLDS:
+        word = word.replace(old, new)
+    return _REPEAT_RE.sub(r'\1', word)
+
+
+def normalize(text):
+    """Lower-case, accent-free, transliterated and spelling-folded form of ``text``."""
+    if not text:
+        return ''
+    text = _NON_WORD_RE.sub(' ', strip_accents(text).lower())
+    return ' '.join(fold_word(word) for word in text.split())
+
+
+def trigrams(text):
+    """Set of padded trigrams of an already normalized string (pg_trgm style)."""
+    grams = set()
+    for word in text.split():
+        padded = f'  {word} '
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return grams
+
+
+def stem(word):
+    """
+    Very small stemmer, good enough for ingredient names (FR/EN).
+
+    Strips the plural, then a final e/o, so tomates, tomatoes and tomato
+    all become "tomat".
+    """
+    if len(word) > 4 and word.endswith('ies'):
+        word = word[:-3] + 'i'
+    elif len(word) > 4 and word.endswith('oes'):
+        word = word[:-2]
+    elif len(word) > 2 and word[-1] in 'sx' and word[-2] != 's':
+        word = word[:-1]
+    if len(word) > 4 and word[-1] in 'eo':
+        word = word[:-1]
+    return word
+
+
+_FOLDED_STOPWORDS = {fold_word(word) for word in INGREDIENT_STOPWORDS}
+
+
+def ingredient_words(text):
+    """
+    ``[(token, word)]`` for a free-text ingredient list (one ingredient per line).
+
+    ``token`` is the normalized, stemmed form used by the indexes and ``word``
+    the lower-cased word as written, for display. Quantities, units and filler
+    words are dropped, so "2 c. à soupe de harissa" and "Harissa" give the same
+    token. Order is preserved, duplicate tokens removed.
+    """
+    pairs = []
+    seen = set()
+    for line in (text or '').splitlines():
+        for raw in _NON_WORD_RE.sub(' ', strip_accents(line).lower()).split():
+            word = fold_word(raw)
+            if word.isdigit() or word in _FOLDED_STOPWORDS or len(word) < 2:
+                continue
+            token = stem(word)
+            if token not in seen:
+                seen.add(token)
+                pairs.append((token, raw))
+    return pairs
+
+
+def ingredient_tokens(text):
+    """Normalized ingredient tokens of a free-text ingredient list, see ``ingredient_words``."""
+    return [token for token, word in ingredient_words(text)]
@@ -0,0 +1,98 @@
+# accounts/trending.py
+"""
+Time-decayed "trending" score of the recipes.
+
+The score of a recipe at time ``now`` is
+
+    engagement * 2 ** (-(now - created_at) / half_life)
+
+Its log2 is ``log2(engagement) + (created_at - EPOCH) / half_life`` minus
+``(now - EPOCH) / half_life``, which is the same for every recipe. So the first
+part is stored in ``Recipe.trending_score`` and keeps the right order forever:
+it only changes when the engagement of the recipe changes, and ordering by the
+indexed column gives the top-N in one query.
+
+Every engagement counter update (accounts/counters.py) stamps
+``Recipe.activity_at``, so a refresh only reads the recipes stamped since the
+previous run (JobRun).
+"""
+import math
+from datetime import datetime, timezone as dt_timezone
+
+from django.conf import settings
+from django.utils import timezone
+
+from .models import Recipe, JobRun, RECIPE_RATING_FIELDS
+from . import pagecache
+
+JOB_NAME = 'refresh_trending'
+
+EPOCH = datetime(2024, 1, 1, tzinfo=dt_timezone.utc)
+
+# Poids de chaque interaction dans l'engagement
+VIEW_WEIGHT = 1.0
+RATING_WEIGHT = 10.0      # une note de 5/5 ; une note de 1/5 ne vaut que 2
+FAVORITE_WEIGHT = 8.0
+COMMENT_WEIGHT = 4.0
+
+
+def engagement(views, rating_count, rating_avg, favorites, comments):
+    return (
+        1.0
+        + VIEW_WEIGHT * views
+        + RATING_WEIGHT * rating_count * (rating_avg or 0) / 5.0
+        + FAVORITE_WEIGHT * favorites
+        + COMMENT_WEIGHT * comments
+    )
+
+
+def trending_score(engagement_value, created_at):
+    half_life = settings.TRENDING_HALF_LIFE_HOURS * 3600
+    return round(math.log2(engagement_value) + (created_at - EPOCH).total_seconds() / half_life, 6)
+
+
+def baseline_score(created_at):
+    """Score of a recipe nobody has interacted with yet."""
+    return trending_score(1.0, created_at)
+
+
+def refresh_scores(full=False):
+    """
+    Recompute the engagement of the recipes from their stored counters (one
+    query, no join) and write only the scores that changed. Returns the
+    number of recipes updated.
+
+    Incremental by default: only recipes with activity since the last run are
+    read, approved or not (a recipe approved later keeps a correct score).
+    ``full=True`` reads every recipe.
+    """
+    started_at = timezone.now()
+    last_run = JobRun.objects.filter(name=JOB_NAME).first()
+    recipes = Recipe.objects.only(
+        'pk', 'views', 'created_at', 'trending_score', 'favorite_count', 'comment_count', *RECIPE_RATING_FIELDS,
+    )
+    if not full and last_run is not None:
+        recipes = recipes.filter(activity_at__gte=last_run.last_run_at)
+
+    changed = []
+    for recipe in recipes.iterator():
+        score = trending_score(
+            engagement(recipe.views, recipe.rating_count, recipe.average_rating,
+                       recipe.favorite_count, recipe.comment_count),
+            recipe.created_at,
+        )
+        if abs(score - recipe.trending_score) > 1e-6:
+            recipe.trending_score = score
+            changed.append(recipe)
+    Recipe.objects.bulk_update(changed, ['trending_score'], batch_size=500)
+    if changed:
+        # bulk_update n'envoie pas de signal : l'ordre "tendance" de l'accueil a changé
+        pagecache.bump('recipes')
+    JobRun.objects.update_or_create(name=JOB_NAME, defaults={'last_run_at': started_at})
+    return len(changed)
+
+
+def trending_recipes(limit=None):
+    return Recipe.objects.filter(is_approved=True) \
+        .select_related('author', 'analysis') \
+        .order_by('-trending_score')[:limit or settings.TRENDING_LIMIT]
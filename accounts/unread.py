@@ -0,0 +1,94 @@
+# accounts/unread.py
+"""
+Per-user unread counters (notifications, nutrition messages) for the navbar
+badges and the dashboards.
+
+Each counter is cached under its own key and read with one ``get_many``; a
+missing key costs one COUNT query and is stored again. The cache is written
+through rather than dropped:
+
+- a new unread row increments the counter (``cache.incr``, after commit);
+- ``mark_read`` is given the number of rows a view marked read with
+  ``queryset.update()`` (which sends no signal) and decrements the counter;
+- any other save or delete of a row of the user drops the counter, so the
+  next read recounts.
+
+``incr`` / ``decr`` on a missing key are simply skipped: the next read counts
+from the database. UNREAD_COUNTS_CACHE_TIMEOUT bounds any drift.
+"""
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+from .models import Notification, NutritionMessage
+
+KINDS = ('notifications', 'messages')
+
+
+def _cache_key(kind, user_id):
+    return f'unread:{kind}:{user_id}'
+
+
+def _count(kind, user_id):
+    if kind == 'notifications':
+        return Notification.objects.filter(user_id=user_id, is_read=False).count()
+    return NutritionMessage.objects.filter(recipient_id=user_id, is_read=False).count()
+
+
+def counts(user):
+    """``{'notifications': n, 'messages': n}`` for ``user`` (zeros for anonymous visitors)."""
+    if not user.is_authenticated:
+        return dict.fromkeys(KINDS, 0)
+    keys = {kind: _cache_key(kind, user.pk) for kind in KINDS}
+    cached = cache.get_many(keys.values())
+    result = {}
+    missing = {}
+    for kind, key in keys.items():
+        if key in cached:
+            result[kind] = cached[key]
+        else:
+            result[kind] = missing[key] = _count(kind, user.pk)
+    if missing:
+        cache.set_many(missing, settings.UNREAD_COUNTS_CACHE_TIMEOUT)
+    return result
+
+
+def _add(kind, user_id, delta):
+    key = _cache_key(kind, user_id)
+    try:
+        value = cache.incr(key, delta)
+    except ValueError:
+        # Pas en cache : le prochain counts() relira la base
+        return
+    if value < 0:
+        cache.delete(key)
+
+
+def added(kind, user_id):
+    """A new unread row for ``user_id``; applied once the transaction commits."""
+    transaction.on_commit(lambda: _add(kind, user_id, 1))
+
+
+def mark_read(kind, user_id, count):
+    """``count`` rows of ``user_id`` were marked read by a ``queryset.update()``."""
+    if count:
+        transaction.on_commit(lambda: _add(kind, user_id, -count))
+
+
+def invalidate(kind, user_id):
+    transaction.on_commit(lambda: cache.delete(_cache_key(kind, user_id)))
+
+
+# ====================== SIGNAUX ======================
+def notification_saved(notification, created):
+    if created and not notification.is_read:
+        added('notifications', notification.user_id)
+    elif not created:
+        invalidate('notifications', notification.user_id)
+
+
+def message_saved(message, created):
+    if created and not message.is_read:
+        added('messages', message.recipient_id)
+    elif not created:
+        invalidate('messages', message.recipient_id)
@@ -37,11 +37,15 @@ urlpatterns = [
     path('chefs/', views.chefs_list, name='chefs_list'),
     path('nutritionists/', views.nutritionists_list, name='nutritionists_list'),
     path('recipes/', views.public_recipes, name='public_recipes'),
+    path('recipes/cook-with/', views.cook_with, name='cook_with'),
+    path('trending/', views.trending_recipes, name='trending_recipes'),
     path('search/', views.search_recipes, name='search_recipes'),
+    path('search/autocomplete/', views.search_autocomplete, name='search_autocomplete'),
 
     # Recipe detail & actions
     path('recipe/<int:pk>/', views.recipe_detail, name='recipe_detail'),
     path('add_comment/<int:pk>/', views.add_comment, name='add_comment'),
+    path('comments/<int:pk>/replies/', views.comment_replies, name='comment_replies'),
     path('add_rating/<int:pk>/', views.add_rating, name='add_rating'),
     path('toggle_favorite/<int:pk>/', views.toggle_favorite, name='toggle_favorite'),
     path('favorites/', views.favorites, name='favorites'),
@@ -0,0 +1,164 @@
+# accounts/viewcounter.py
+"""
+Write-behind buffer for the recipe view counter.
+
+``recipe_detail`` used to save the recipe on every first view: one write
+transaction per page view, which serializes on SQLite under load. Views are
+now added to an in-process buffer ({recipe id: pending views}) and written in
+batches of ``UPDATE ... SET views = views + n`` (one statement per distinct n),
+together with the authors' ``UserProfile.total_views``.
+
+The buffer is flushed:
+- VIEW_COUNT_FLUSH_INTERVAL seconds after its first pending view (a timer
+  thread), which bounds how stale the stored counts can be;
+- as soon as it holds VIEW_COUNT_FLUSH_THRESHOLD views;
+- when the process exits (atexit).
+
+A flush that fails (e.g. "database is locked") puts its views back into the
+buffer for the next attempt; a request never sees the error. Views still in
+the buffer of a process that is killed with SIGKILL are lost; the counter is
+statistics, not accounting.
+
+A visitor is counted once per recipe: ``first_view`` does an atomic
+``cache.add`` of a (visitor, recipe) key that expires after
+VIEW_DEDUP_TIMEOUT. The visitor is the user id, or for anonymous visitors a
+random id kept in the VISITOR_COOKIE cookie, so the session is never written
+on the read path.
+"""
+import atexit
+import re
+import secrets
+import threading
+from collections import Counter
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection, transaction, DatabaseError
+
+from .models import Recipe
+from . import counters
+
+_lock = threading.Lock()
+_pending = Counter()     # recipe id -> vues en attente
+_timer = None
+
+VISITOR_COOKIE = 'visitor_id'
+_VISITOR_ID_RE = re.compile(r'[A-Za-z0-9_-]{16}')
+
+
+def _start_timer():
+    # Appelé avec _lock tenu
+    global _timer
+    if _timer is None:
+        _timer = threading.Timer(settings.VIEW_COUNT_FLUSH_INTERVAL, _flush_from_timer)
+        _timer.daemon = True
+        _timer.start()
+
+
+def record(recipe_id):
+    """Count one view of the recipe; the database is updated on the next flush."""
+    with _lock:
+        _pending[recipe_id] += 1
+        total = sum(_pending.values())
+        _start_timer()
+    if total >= settings.VIEW_COUNT_FLUSH_THRESHOLD:
+        try:
+            flush()
+        except DatabaseError:
+            # Jamais d'erreur dans la requête : les vues remises en tampon repartent au prochain intervalle
+            with _lock:
+                if _pending:
+                    _start_timer()
+
+
+def pending(recipe_id):
+    """Views of ``recipe_id`` recorded by this process and not written yet."""
+    return _pending.get(recipe_id, 0)
+
+
+def flush():
+    """Write the buffered views. Returns the number of views written."""
+    global _timer
+    with _lock:
+        views = dict(_pending)
+        _pending.clear()
+        if _timer is not None:
+            _timer.cancel()
+            _timer = None
+    if not views:
+        return 0
+    try:
+        with transaction.atomic():
+            _write(views)
+    except DatabaseError:
+        with _lock:
+            _pending.update(views)
+        raise
+    return sum(views.values())
+
+
+def _write(views):
+    # Recettes supprimées entre-temps : leurs vues sont abandonnées
+    author_views = Counter()
+    for recipe_id, author_id in Recipe.objects.filter(pk__in=views).values_list('pk', 'author_id'):
+        author_views[author_id] += views[recipe_id]
+    # update() direct : ni post_save (pas de réindexation), ni updated_at
+    counters.bump_many(Recipe.objects.all(), 'pk', 'views', views)
+    counters.bump_profiles('total_views', author_views)
+
+
+def _flush_from_timer():
+    try:
+        flush()
+    except DatabaseError:
+        # Les vues sont remises dans le tampon : nouvel essai au prochain intervalle
+        with _lock:
+            if _pending:
+                _start_timer()
+    finally:
+        connection.close()
+
+
+@atexit.register
+def _flush_at_exit():
+    try:
+        flush()
+    except DatabaseError:
+        pass
+
+
+# ====================== DÉDOUBLONNAGE DES VUES ======================
+def visitor_id(request):
+    """``u<user id>``, or the anonymous id of the cookie (created on first use)."""
+    if request.user.is_authenticated:
+        return f'u{request.user.pk}'
+    if not hasattr(request, 'new_visitor_id'):
+        token = request.COOKIES.get(VISITOR_COOKIE, '')
+        request.new_visitor_id = None if _VISITOR_ID_RE.fullmatch(token) else secrets.token_urlsafe(12)
+    return f'a{request.new_visitor_id or request.COOKIES[VISITOR_COOKIE]}'
+
+
+def first_view(request, recipe_id, author_id=None):
+    """True the first time this visitor opens the recipe (within VIEW_DEDUP_TIMEOUT)."""
+    if request.user.is_authenticated and request.user.pk == author_id:
+        return False
+    key = f'views:seen:{visitor_id(request)}:{recipe_id}'
+    return cache.add(key, 1, timeout=settings.VIEW_DEDUP_TIMEOUT)
+
+
+def remember_visitor(request, response):
+    """Set the anonymous visitor cookie if ``visitor_id`` had to create one."""
+    if getattr(request, 'new_visitor_id', None):
+        response.set_cookie(
+            VISITOR_COOKIE, request.new_visitor_id, max_age=settings.VISITOR_COOKIE_AGE,
+            httponly=True, samesite='Lax', secure=request.is_secure(),
+        )
+    return response
+
+
+def count_view(request, recipe_id, author_id=None):
+    """Record the view if it is this visitor's first; returns whether it was counted."""
+    if first_view(request, recipe_id, author_id):
+        record(recipe_id)
+        return True
+    return False
@@ -2,24 +2,34 @@ from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth import authenticate, login, logout
 from django.contrib.auth.decorators import login_required
 from django.contrib.auth.models import User
-from django.db.models import Sum, Q as models_Q, Count, Avg
+from django.db.models import Sum, Q as models_Q, Count, Prefetch
 from django.db import transaction
 from django.conf import settings
 from django.core.mail import send_mail
 from django.views.decorators.cache import never_cache
+from django.views.decorators.http import condition
 from django.contrib import messages  # ← Import correct
+from django.http import JsonResponse
 from django.urls import reverse
 from datetime import datetime
+from functools import wraps
+import hashlib
 from dateutil.relativedelta import relativedelta
 import google.generativeai as genai
 from django.shortcuts import get_object_or_404
+from core import caching
 
 from .models import (
     UserProfile, Recipe, RecipeImage, Comment, Rating, Favorite,
-    Notification, RecipeAnalysis, NutritionFactSheet, NutritionMessage
+    Notification, RecipeAnalysis, NutritionFactSheet, NutritionMessage, DuplicateCandidate
+)
+from . import (
+    search, autocomplete, facets, ingredients, recommendations, trending, pagination, favorite_ids, viewcounter,
+    comments, detail_page, pagecache, conditional, unread, objcache,
 )
 
 # ====================== BASIC VIEWS ======================
+@pagecache.cache_anonymous_page(['recipes', 'chefs'])
 def home(request):
     if request.user.is_authenticated:
         if request.user.is_staff or request.user.is_superuser:
@@ -37,13 +47,9 @@ def home(request):
             pass
 
     recent_chefs = UserProfile.objects.filter(role='chef').select_related('user').order_by('-user__date_joined')[:3]
-    for profile in recent_chefs:
-        profile.recipe_count = profile.user.recipes.filter(is_approved=True).count()
 
-    popular_recipes = Recipe.objects.filter(is_approved=True) \
-        .select_related('author') \
-        .prefetch_related('images') \
-        .order_by('-created_at')[:3]
+    # Score tendance précalculé (vues, notes, favoris, commentaires, décroissance dans le temps)
+    popular_recipes = trending.trending_recipes(settings.HOME_TRENDING_COUNT)
 
     context = {
         'recent_chefs': recent_chefs,
@@ -167,14 +173,11 @@ def logout_view(request):
     return response
 
 
-@never_cache
-@login_required
-def admin_dashboard(request):
-    if not request.user.is_staff:
-        messages.error(request, "Accès restreint aux administrateurs.")
-        return redirect('accounts:home')
+# Namespaces dont les signaux invalident les statistiques du tableau de bord
+ADMIN_STATS_NAMESPACES = ['users', 'chefs', 'recipes', 'comments']
 
-    # ====================== STATISTIQUES GÉNÉRALES ======================
+
+def _admin_stats():
     total_users = User.objects.count()
 
     total_admins = User.objects.filter(
@@ -206,6 +209,34 @@ def admin_dashboard(request):
     total_analyses = RecipeAnalysis.objects.count()
     total_comments = Comment.objects.count()
 
+    return {
+        'total_users': total_users,
+        'total_admins': total_admins,
+        'total_visitors': total_visitors,
+        'total_chefs': total_chefs,
+        'total_nutritionists': total_nutritionists,
+        'total_recipes': total_recipes,
+        'approved_recipes': approved_recipes,
+        'pending_recipes': pending_recipes,
+        'total_analyses': total_analyses,
+        'total_comments': total_comments,
+    }
+
+
+@never_cache
+@login_required
+def admin_dashboard(request):
+    if not request.user.is_staff:
+        messages.error(request, "Accès restreint aux administrateurs.")
+        return redirect('accounts:home')
+
+    # ====================== STATISTIQUES GÉNÉRALES ======================
+    # Dix COUNT : en cache partagé (core/caching.py), invalidé par les signaux des modèles comptés
+    stats = caching.cached(
+        'admin:stats', _admin_stats, settings.ADMIN_STATS_CACHE_TIMEOUT,
+        namespaces=ADMIN_STATS_NAMESPACES,
+    )
+
     # ====================== OVERVIEW TAB DATA ======================
     recent_users_raw = User.objects.select_related('userprofile').order_by('-date_joined')[:10]
 
@@ -223,9 +254,13 @@ def admin_dashboard(request):
             'display_role': display_role,
         })
 
+    # Avec les doublons probables détectés à la soumission (MinHash / LSH)
     pending_approval = Recipe.objects.filter(is_approved=False)\
         .select_related('author')\
-        .prefetch_related('images')\
+        .prefetch_related(Prefetch(
+            'duplicate_candidates',
+            queryset=DuplicateCandidate.objects.select_related('duplicate', 'duplicate__author'),
+        ))\
         .order_by('-created_at')[:10]
 
     recent_comments = Comment.objects.select_related('author', 'recipe')\
@@ -261,23 +296,19 @@ def admin_dashboard(request):
     ).select_related('userprofile').order_by('-date_joined')
 
     # ====================== RECIPES MANAGEMENT TAB ======================
-    all_recipes = Recipe.objects.select_related('author')\
-        .prefetch_related('images')\
-        .order_by('-created_at')
+    # Paginé par curseur (created_at, id) ; paramètre distinct pour ne pas gêner les autres onglets
+    all_recipes = pagination.paginate(
+        request,
+        Recipe.objects.select_related('author'),
+        page_size=settings.ADMIN_RECIPES_PAGE_SIZE,
+        param='recipes_cursor',
+    )
 
     # ====================== CONTEXT ======================
     context = {
         # Stats overview
-        'total_users': total_users,
-        'total_admins': total_admins,
-        'total_visitors': total_visitors,
-        'total_chefs': total_chefs,
-        'total_nutritionists': total_nutritionists,
-        'total_recipes': total_recipes,
-        'approved_recipes': approved_recipes,
-        'pending_recipes': pending_recipes,
-        'total_analyses': total_analyses,
-        'total_comments': total_comments,
+        **stats,
+        'cache_stats': sorted(caching.stats().items()),
 
         # Overview tab
         'display_users': display_users,
@@ -307,13 +338,13 @@ def visitor_dashboard(request):
 
     favorites = Favorite.objects.filter(user=request.user).select_related('recipe', 'recipe__author')
 
-    unread_notifications_count = request.user.notifications.filter(is_read=False).count()
-    unread_messages_count = NutritionMessage.objects.filter(recipient=request.user, is_read=False).count()
+    unread_counts = unread.counts(request.user)
 
     context = {
         'favorites': favorites,
-        'unread_notifications_count': unread_notifications_count,
-        'unread_messages_count': unread_messages_count,
+        'recommendations': recommendations.recommended_recipes(request.user),
+        'unread_notifications_count': unread_counts['notifications'],
+        'unread_messages_count': unread_counts['messages'],
     }
     return render(request, 'visitor/dashboard.html', context)
 
@@ -327,7 +358,7 @@ def chef_dashboard(request):
     recipes = Recipe.objects.filter(author=request.user).order_by('-created_at')
     total_views = recipes.aggregate(total=Sum('views'))['total'] or 0
 
-    unread_notifications_count = request.user.notifications.filter(is_read=False).count()
+    unread_notifications_count = unread.counts(request.user)['notifications']
 
     context = {
         'recipes': recipes,
@@ -374,13 +405,11 @@ def nutritionist_dashboard(request):
     counts = [item['count'] for item in monthly_analysis]
 
     # Notifications et messages non lus
-    unread_notifications_count = request.user.notifications.filter(is_read=False).count()
-    unread_messages_count = NutritionMessage.objects.filter(recipient=request.user, is_read=False).count()
+    unread_counts = unread.counts(request.user)
 
     # NOUVEAU : Liste des recettes analysées (pour la section "My Analyzed Recipes")
     analyzed_recipes = RecipeAnalysis.objects.filter(nutritionist=nutritionist)\
         .select_related('recipe', 'recipe__author')\
-        .prefetch_related('recipe__images')\
         .order_by('-analyzed_at')
 
     context = {
@@ -391,8 +420,8 @@ def nutritionist_dashboard(request):
         'improvement_count': improvement_count,
         'chart_months': months,
         'chart_counts': counts,
-        'unread_notifications_count': unread_notifications_count,
-        'unread_messages_count': unread_messages_count,
+        'unread_notifications_count': unread_counts['notifications'],
+        'unread_messages_count': unread_counts['messages'],
         # Ajout crucial pour le template
         'analyzed_recipes': analyzed_recipes,
     }
@@ -444,7 +473,11 @@ def edit_profile(request):
         if profile.role == 'chef':
             profile.speciality = request.POST.get('speciality', profile.speciality)
 
-        profile.save()
+        # Champs du formulaire seulement : le profil vient du cache (accounts/objcache.py),
+        # ses compteurs (accounts/counters.py) peuvent être en retard
+        profile.save(update_fields=[
+            'bio', 'region', 'years_experience', 'profile_picture', 'certificate', 'speciality', 'updated_at',
+        ])
 
         messages.success(request, "Profile updated successfully!")
         if profile.role == 'visitor':
@@ -460,8 +493,9 @@ def edit_profile(request):
 @never_cache
 @login_required
 def favorites(request):
-    favorites = Favorite.objects.filter(user=request.user).select_related('recipe', 'recipe__author')
-    return render(request, 'visitor/favorites.html', {'favorites': favorites})
+    favorites = Favorite.objects.filter(user=request.user).select_related('recipe', 'recipe__author', 'recipe__analysis')
+    page = pagination.paginate(request, favorites, date_field='added_at')
+    return render(request, 'visitor/favorites.html', {'favorites': page, 'page': page})
 
 
 # ====================== CHEF RECIPE ACTIONS ======================
@@ -515,7 +549,10 @@ def edit_recipe(request, pk):
         recipe.servings = request.POST['servings']
         recipe.ingredients = request.POST.get('ingredients', recipe.ingredients)
         recipe.steps = request.POST.get('steps', recipe.steps)
-        recipe.save()
+        # Champs du formulaire seulement : ne pas écraser les compteurs mis à jour par F()
+        recipe.save(update_fields=[
+            'title', 'description', 'prep_time', 'cook_time', 'servings', 'ingredients', 'steps', 'updated_at',
+        ])
         for file in request.FILES.getlist('images'):
             RecipeImage.objects.create(recipe=recipe, image=file)
         messages.success(request, "Recipe updated!")
@@ -545,13 +582,12 @@ def nutritionist_analyze(request):
         return redirect('accounts:home')
 
     # Toutes les recettes approuvées, triées par date (plus récentes en haut)
-    recipes = Recipe.objects.filter(is_approved=True)\
-        .select_related('author')\
-        .prefetch_related('images')\
-        .order_by('-created_at')
+    recipes = Recipe.objects.filter(is_approved=True).select_related('author')
+    page = pagination.paginate(request, recipes)
 
     context = {
-        'recipes': recipes,
+        'recipes': page,
+        'page': page,
         'page_title': 'Recipes to Analyze',
     }
     return render(request, 'nutritionist/analyze.html', context)
@@ -656,20 +692,28 @@ def nutritionist_collaboration(request):
 
 
 # ====================== PUBLIC VIEWS ======================
+@pagecache.cache_anonymous_page(['chefs'])
 def chefs_list(request):
-    chefs = UserProfile.objects.filter(role='chef').select_related('user')
-    for profile in chefs:
-        profile.recipe_count = profile.user.recipes.filter(is_approved=True).count()
+    # Nombre de recettes, vues et note moyenne : compteurs du profil (accounts/counters.py)
+    # Les vues (écrites sans signal) peuvent avoir DIRECTORY_CACHE_TIMEOUT de retard
+    chefs = caching.cached(
+        'directory:chefs',
+        lambda: list(UserProfile.objects.filter(role='chef').select_related('user')),
+        settings.DIRECTORY_CACHE_TIMEOUT, namespaces=['chefs'],
+    )
 
     context = {'chefs': chefs, 'page_title': 'Our Tunisian Chefs 🔥'}
     return render(request, 'public/chefs_list.html', context)
 
 
+@pagecache.cache_anonymous_page(['nutritionists'])
 def nutritionists_list(request):
-    # On charge les nutritionnistes via User pour avoir accès à nutrition_sheets
-    nutritionists = User.objects.filter(
-        userprofile__role='nutritionist'
-    ).select_related('userprofile').prefetch_related('nutrition_sheets')
+    # Le nombre de fiches vient du compteur userprofile.sheet_count
+    nutritionists = caching.cached(
+        'directory:nutritionists',
+        lambda: list(User.objects.filter(userprofile__role='nutritionist').select_related('userprofile')),
+        settings.DIRECTORY_CACHE_TIMEOUT, namespaces=['nutritionists'],
+    )
 
     context = {
         'nutritionists': nutritionists,
@@ -677,9 +721,38 @@ def nutritionists_list(request):
     }
     return render(request, 'public/nutritionists_list.html', context)
 
+@pagecache.cache_anonymous_page(['recipes', 'chefs'])
 def public_recipes(request):
-    recipes = Recipe.objects.filter(is_approved=True).select_related('author').prefetch_related('images').order_by('-created_at')
-    context = {'recipes': recipes, 'page_title': 'All Tunisian Recipes'}
+    approved = Recipe.objects.filter(is_approved=True)
+
+    # Filtres à facettes (temps, portions, spécialité, région, note santé)
+    selected_filters = facets.selected_filters(request.GET)
+    recipes = facets.filter_recipes(approved, selected_filters).select_related('author', 'analysis')
+    # Une page par combinaison filtres / curseur / taille, mêmes namespaces que le cache des pages
+    page = caching.cached(
+        'recipes:list:' + hashlib.md5(request.GET.urlencode().encode()).hexdigest(),
+        lambda: pagination.paginate(request, recipes),
+        settings.RECIPE_LIST_CACHE_TIMEOUT, namespaces=['recipes', 'chefs'],
+    )
+
+    context = {
+        'recipes': page,
+        'page': page,
+        'page_title': 'All Tunisian Recipes',
+        'facets': facets.facet_counts(approved, selected_filters),
+        'selected_filters': selected_filters,
+    }
+    return render(request, 'public/recipes_list.html', context)
+
+
+def trending_recipes(request):
+    context = {
+        'recipes': caching.cached(
+            'recipes:trending', lambda: list(trending.trending_recipes()),
+            settings.RECIPE_LIST_CACHE_TIMEOUT, namespaces=['recipes'],
+        ),
+        'page_title': 'Trending Recipes 🔥',
+    }
     return render(request, 'public/recipes_list.html', context)
 
 
@@ -690,17 +763,20 @@ def search_recipes(request):
     nutritionists = []
 
     if query:
-        recipes = Recipe.objects.filter(is_approved=True) \
-            .filter(models_Q(title__icontains=query) | models_Q(description__icontains=query)) \
-            .select_related('author') \
-            .prefetch_related('images') \
-            .order_by('-created_at')
+        # Index plein texte FTS5, classé par pertinence (BM25)
+        recipes = search.search_recipes(query)
 
-        chefs = UserProfile.objects.filter(role='chef', user__username__icontains=query).select_related('user')
-        nutritionists = UserProfile.objects.filter(role='nutritionist', user__username__icontains=query).select_related('user')
+        # Complété par la recherche approximative (fautes, chakchouka/shakshuka, arabe...)
+        missing = settings.SEARCH_RESULTS_LIMIT - len(recipes)
+        if missing > 0:
+            found = {recipe.pk for recipe in recipes}
+            recipes += [r for r in search.fuzzy_search_recipes(query) if r.pk not in found][:missing]
+
+        chefs = list(UserProfile.objects.filter(role='chef', user__username__icontains=query).select_related('user'))
+        found = {profile.pk for profile in chefs}
+        chefs += [profile for profile in search.fuzzy_search_chefs(query) if profile.pk not in found]
 
-        for profile in chefs:
-            profile.recipe_count = profile.user.recipes.filter(is_approved=True).count()
+        nutritionists = UserProfile.objects.filter(role='nutritionist', user__username__icontains=query).select_related('user')
 
     context = {
         'query': query,
@@ -712,55 +788,74 @@ def search_recipes(request):
     return render(request, 'public/search_results.html', context)
 
 
-def recipe_detail(request, pk):
-    recipe = get_object_or_404(Recipe, pk=pk, is_approved=True)
-
-    # Smart view counter
-    view_key = f"recipe_viewed_{recipe.pk}"
-    has_viewed = False
-
-    if request.user.is_authenticated and request.user == recipe.author:
-        has_viewed = True
-    elif request.user.is_authenticated:
-        has_viewed = request.session.get(view_key, False)
-        if not has_viewed:
-            request.session[view_key] = True
-    else:
-        has_viewed = request.session.get(view_key, False)
-        if not has_viewed:
-            request.session[view_key] = True
-
-    # Increment view count only if not already viewed
-    if not has_viewed:
-        recipe.views += 1
-        recipe.save(update_fields=['views'])
-
-    # Calculate average rating and count – ALWAYS (even if no new view)
-    rating_agg = recipe.ratings.aggregate(avg=Avg('score'))
-    avg_rating = rating_agg['avg'] if rating_agg['avg'] is not None else 0.0
-    rating_count = recipe.ratings.count()
-    # All individual ratings with author
-    individual_ratings = recipe.ratings.select_related('author').order_by('-created_at')
+def cook_with(request):
+    # "Qu'est-ce que je peux cuisiner avec ce que j'ai ?"
+    pantry = request.GET.get('ingredients', '').strip()
+    tokens = ingredients.parse_pantry(pantry)
+    results = ingredients.recipes_for_pantry(tokens) if tokens else []
 
     context = {
-        'recipe': recipe,
-        'avg_rating': avg_rating,
-        'rating_count': rating_count,
-        'individual_ratings': individual_ratings,
+        'pantry': pantry,
+        'tokens': tokens,
+        'results': results,
+        'page_title': 'Cook With What I Have',
     }
+    return render(request, 'public/cook_with.html', context)
+
+
+def search_autocomplete(request):
+    # Index préfixe en mémoire : aucune requête SQL
+    query = request.GET.get('q', '').strip()
+    results = autocomplete.suggest(query) if query else []
+    return JsonResponse({'query': query, 'results': results})
+
+
+def _counts_recipe_view(view):
+    # Smart view counter : une vue par visiteur (clé en cache), écrite en différé (accounts/viewcounter.py).
+    # Appliqué à l'extérieur : la vue compte aussi pour une page servie par le cache ou un 304.
+    @wraps(view)
+    def wrapper(request, pk):
+        state = conditional.recipe_state(request, pk)
+        if state is not None and request.method == 'GET':
+            viewcounter.count_view(request, pk, state['author_id'])
+        return viewcounter.remember_visitor(request, view(request, pk))
+    return wrapper
+
+
+@_counts_recipe_view
+@condition(etag_func=conditional.recipe_etag)
+@pagecache.cache_anonymous_page(lambda pk: [f'recipe:{pk}'])
+def recipe_detail(request, pk):
+    # Toute la page en un nombre fixe de requêtes (voir accounts/detail_page.py)
+    context = detail_page.load(request, pk)
+    recipe = context['recipe']
+    recipe.views += viewcounter.pending(recipe.pk)
     return render(request, 'public/recipe_detail.html', context)
 
+
+def comment_replies(request, pk):
+    # Fragment HTML "voir plus de réponses" (chargé en fetch depuis recipe_detail)
+    comment = get_object_or_404(
+        Comment.objects.select_related('recipe'), pk=pk, parent__isnull=True, recipe__is_approved=True
+    )
+    page = comments.replies_page(request, comment)
+    context = {'comment': comment, 'recipe': comment.recipe, 'replies': page, 'more_query': page.next_query}
+    return render(request, 'includes/comment_replies.html', context)
+
+@condition(etag_func=conditional.chef_etag)
 def chef_profile_detail(request, username):
-    profile = get_object_or_404(UserProfile, user__username=username, role='chef')
-    recipes = Recipe.objects.filter(author=profile.user, is_approved=True).prefetch_related('images').order_by('-created_at')
-    context = {'chef_profile': profile, 'recipes': recipes, 'recipe_count': recipes.count()}
+    # Pas d'objcache ici : l'ETag (accounts/conditional.py) est lu en base, la page doit l'être aussi
+    profile = get_object_or_404(UserProfile.objects.select_related('user'), user__username=username, role='chef')
+    recipes = Recipe.objects.filter(author=profile.user, is_approved=True).order_by('-created_at')
+    context = {'chef_profile': profile, 'recipes': recipes, 'recipe_count': profile.approved_recipe_count}
     return render(request, 'public/chef_profile_detail.html', context)
 
 
 def chef_recipes(request, username):
-    profile = get_object_or_404(UserProfile, user__username=username, role='chef')
-    recipes = Recipe.objects.filter(author=profile.user, is_approved=True).prefetch_related('images').order_by('-created_at')
-    context = {'chef_profile': profile, 'recipes': recipes}
+    profile = objcache.chef_or_404(username)
+    recipes = Recipe.objects.filter(author=profile.user, is_approved=True).select_related('author', 'analysis')
+    page = pagination.paginate(request, recipes)
+    context = {'chef_profile': profile, 'recipes': page, 'page': page, 'recipe_count': profile.approved_recipe_count}
     return render(request, 'public/chef_recipes.html', context)
 
 
@@ -768,7 +863,7 @@ def chef_recipes(request, username):
 @never_cache
 @login_required
 def add_comment(request, pk):
-    recipe = get_object_or_404(Recipe, pk=pk, is_approved=True)
+    recipe = objcache.approved_recipe_or_404(pk)
 
     if request.method == 'POST':
         content = request.POST.get('content', '').strip()
@@ -778,12 +873,13 @@ def add_comment(request, pk):
             if parent_id:
                 parent = get_object_or_404(Comment, pk=parent_id, recipe=recipe)
 
-            comment = Comment.objects.create(
-                recipe=recipe,
-                author=request.user,
-                content=content,
-                parent=parent
-            )
+            with transaction.atomic():  # commentaire + compteur de la recette
+                comment = Comment.objects.create(
+                    recipe=recipe,
+                    author=request.user,
+                    content=content,
+                    parent=parent
+                )
 
             # Notification pour le Chef (seulement si c'est un Visiteur qui commente)
             if request.user.userprofile.role == 'visitor':
@@ -809,7 +905,7 @@ def add_comment(request, pk):
 @never_cache
 @login_required
 def add_rating(request, pk):
-    recipe = get_object_or_404(Recipe, pk=pk, is_approved=True)
+    recipe = objcache.approved_recipe_or_404(pk)
     if request.user == recipe.author:
         messages.error(request, "Vous ne pouvez pas noter votre propre recette.")
         return redirect('accounts:recipe_detail', pk=pk)
@@ -824,6 +920,7 @@ def add_rating(request, pk):
                     author=request.user,
                     defaults={'score': score}
                 )
+                recommendations.refresh_user(request.user.pk)
 
                 # Notification pour le Chef (nouvelle note)
                 Notification.objects.create(
@@ -843,15 +940,19 @@ def toggle_favorite(request, pk):
         messages.error(request, "This feature is only for visitors.")
         return redirect('accounts:recipe_detail', pk=pk)
 
-    recipe = get_object_or_404(Recipe, pk=pk, is_approved=True)
+    recipe = objcache.approved_recipe_or_404(pk)
+
+    with transaction.atomic():  # favori + compteurs de la recette
+        fav, created = Favorite.objects.get_or_create(user=request.user, recipe=recipe)
+        if not created:
+            fav.delete()
 
-    fav, created = Favorite.objects.get_or_create(user=request.user, recipe=recipe)
-    
     if not created:
-        fav.delete()
         messages.info(request, "Removed from favorites ❤️")
     else:
         messages.success(request, "Added to favorites 🤍")
+    favorite_ids.invalidate(request.user.pk)
+    recommendations.refresh_user(request.user.pk)
 
     # Redirection intelligente selon la page d'origine
     referer = request.META.get('HTTP_REFERER', '')
@@ -870,7 +971,8 @@ def toggle_favorite(request, pk):
 @never_cache
 @login_required
 def mark_notifications_read(request):
-    request.user.notifications.filter(is_read=False).update(is_read=True)
+    marked = request.user.notifications.filter(is_read=False).update(is_read=True)
+    unread.mark_read('notifications', request.user.pk, marked)
     messages.success(request, "All notifications marked as read.")
     return redirect(request.META.get('HTTP_REFERER', request.path))
 
@@ -878,8 +980,9 @@ def mark_notifications_read(request):
 @login_required
 def read_notification(request, notif_id):
     notif = get_object_or_404(Notification, id=notif_id, user=request.user)
-    notif.is_read = True
-    notif.save()
+    # update() : le compteur en cache n'est décrémenté que si elle était non lue
+    marked = Notification.objects.filter(pk=notif.pk, is_read=False).update(is_read=True)
+    unread.mark_read('notifications', request.user.pk, marked)
     return redirect(notif.link or 'accounts:visitor_dashboard')
 
 
@@ -953,19 +1056,20 @@ def create_nutrition_sheet(request):
         return redirect('accounts:home')
 
     if request.method == 'POST':
-        sheet = NutritionFactSheet.objects.create(
-            nutritionist=request.user,
-            title=request.POST['title'],
-            description=request.POST['description'],
-            energy_kcal=request.POST.get('energy_kcal') or None,
-            proteins=request.POST.get('proteins') or None,
-            carbs=request.POST.get('carbs') or None,
-            sugars=request.POST.get('sugars') or None,
-            fats=request.POST.get('fats') or None,
-            saturated_fats=request.POST.get('saturated_fats') or None,
-            fiber=request.POST.get('fiber') or None,
-            salt=request.POST.get('salt') or None,
-        )
+        with transaction.atomic():  # fiche + compteur du profil
+            sheet = NutritionFactSheet.objects.create(
+                nutritionist=request.user,
+                title=request.POST['title'],
+                description=request.POST['description'],
+                energy_kcal=request.POST.get('energy_kcal') or None,
+                proteins=request.POST.get('proteins') or None,
+                carbs=request.POST.get('carbs') or None,
+                sugars=request.POST.get('sugars') or None,
+                fats=request.POST.get('fats') or None,
+                saturated_fats=request.POST.get('saturated_fats') or None,
+                fiber=request.POST.get('fiber') or None,
+                salt=request.POST.get('salt') or None,
+            )
         messages.success(request, "Nutrition fact sheet created successfully!")
         return redirect('accounts:nutritionist_fiches')
 
@@ -1006,6 +1110,8 @@ def delete_nutrition_sheet(request, pk):
         return redirect('accounts:nutritionist_fiches')
     return render(request, 'nutritionist/delete_sheet.html', {'sheet': sheet})
 
+@condition(etag_func=conditional.library_etag)
+@pagecache.cache_anonymous_page(['sheets'])
 def public_nutrition_library(request):
     sheets = NutritionFactSheet.objects.all().select_related('nutritionist')
     context = {
@@ -1015,8 +1121,10 @@ def public_nutrition_library(request):
     return render(request, 'public/nutrition_library.html', context)
 
 
+@condition(etag_func=conditional.sheet_etag, last_modified_func=conditional.sheet_last_modified)
+@pagecache.cache_anonymous_page(lambda pk: [f'sheet:{pk}'])
 def public_nutrition_sheet_detail(request, pk):
-    sheet = get_object_or_404(NutritionFactSheet, pk=pk)
+    sheet = objcache.sheet_or_404(pk)
     context = {
         'sheet': sheet,
         'page_title': sheet.title,
@@ -1109,8 +1217,8 @@ def reply_nutrition_message(request, message_id):
             replied_to=original_message
         )
 
-        original_message.is_read = True
-        original_message.save()
+        marked = NutritionMessage.objects.filter(pk=original_message.pk, is_read=False).update(is_read=True)
+        unread.mark_read('messages', request.user.pk, marked)
 
         
         
@@ -1170,7 +1278,8 @@ def conversation_detail(request, conversation_id):
     ).select_related('sender').order_by('sent_at')
 
     # Marque comme lus les messages reçus
-    conversation_messages.filter(recipient=request.user).update(is_read=True)
+    marked = conversation_messages.filter(recipient=request.user, is_read=False).update(is_read=True)
+    unread.mark_read('messages', request.user.pk, marked)
 
     if request.method == 'POST':
         message_text = request.POST.get('message', '').strip()
@@ -1565,7 +1674,13 @@ def admin_manage_recipes(request):
         if not recipe_ids:
             messages.warning(request, "Aucune recette sélectionnée.")
         elif action == 'approve':
-            updated = Recipe.objects.filter(pk__in=recipe_ids, is_approved=False).update(is_approved=True)
+            # save() plutôt que update() : les signaux mettent à jour les index de recherche
+            updated = 0
+            with transaction.atomic():
+                for recipe in Recipe.objects.filter(pk__in=recipe_ids, is_approved=False):
+                    recipe.is_approved = True
+                    recipe.save(update_fields=['is_approved'])
+                    updated += 1
             messages.success(request, f"{updated} recette(s) approuvée(s) avec succès.")
         elif action == 'delete':
             deleted_count, _ = Recipe.objects.filter(pk__in=recipe_ids).delete()
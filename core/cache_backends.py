@@ -0,0 +1,294 @@
+# core/cache_backends.py
+"""
+Cache backend stored in a local SQLite file, shared by every worker process
+of the node (no Redis / memcached needed).
+
+``LocMemCache`` is private to each process: with several WSGI workers, the
+page cache versions, the view dedup keys, the unread counters and the locks
+of core/caching.py would all be incoherent. This backend keeps the entries
+in one SQLite database in WAL mode, so readers never block and all workers
+see the same values:
+
+- ``incr`` / ``decr`` are a single ``UPDATE ... RETURNING`` (atomic across
+  processes); integers are stored as SQLite integers, other values pickled;
+- ``add`` is an ``INSERT ... ON CONFLICT`` that only replaces expired rows;
+- every entry has an expiry time, checked on read;
+- the table is bounded by MAX_ENTRIES with least-recently-used eviction.
+  Reads do not write: the keys read are remembered in memory and their
+  access time is written in batches by the compactor;
+- a compactor thread per process (every COMPACT_INTERVAL seconds) writes
+  those access times, deletes expired rows, evicts down to MAX_ENTRIES,
+  checkpoints the WAL and returns free pages to the file system.
+
+Configured in core/settings.py (CACHES); ``manage.py bench_cache`` compares
+it with ``LocMemCache`` and ``FileBasedCache``.
+"""
+import os
+import pickle
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+
+from django.core.cache.backends.base import BaseCache, DEFAULT_TIMEOUT
+
+SCHEMA = (
+    "CREATE TABLE IF NOT EXISTS cache ("
+    "key TEXT PRIMARY KEY, value BLOB NOT NULL, expires REAL, accessed REAL NOT NULL"
+    ") WITHOUT ROWID",
+    "CREATE INDEX IF NOT EXISTS cache_accessed_idx ON cache (accessed)",
+    "CREATE INDEX IF NOT EXISTS cache_expires_idx ON cache (expires)",
+)
+
+# Condition "non expirée" (expires NULL : pas d'expiration)
+ALIVE = "(expires IS NULL OR expires > ?)"
+
+
+@contextmanager
+def _immediate(conn):
+    # IMMEDIATE : prend le verrou d'écriture tout de suite (pas d'échec au COMMIT)
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        yield
+    except BaseException:
+        conn.execute("ROLLBACK")
+        raise
+    conn.execute("COMMIT")
+
+
+class SQLiteCache(BaseCache):
+    """
+    OPTIONS (in addition to MAX_ENTRIES / CULL_FREQUENCY):
+    COMPACT_INTERVAL (seconds, 0 = no compactor thread), BUSY_TIMEOUT
+    (seconds a writer waits for the lock), MMAP_SIZE (bytes), CULL_EVERY
+    (writes between two size checks).
+    """
+
+    def __init__(self, location, params):
+        super().__init__(params)
+        options = params.get('OPTIONS', {})
+        self._path = os.path.abspath(location)
+        self._compact_interval = float(options.get('COMPACT_INTERVAL', 60))
+        self._busy_timeout = float(options.get('BUSY_TIMEOUT', 5))
+        self._mmap_size = int(options.get('MMAP_SIZE', 64 * 1024 * 1024))
+        self._cull_every = int(options.get('CULL_EVERY', 100))
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._touched = set()
+        self._writes = 0
+        self._pid = None
+        self._compactor = None
+
+    # ====================== CONNEXIONS ======================
+    def _connection(self):
+        # Une connexion par thread, recréée après un fork (workers préforkés)
+        pid = os.getpid()
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None and self._local.pid == pid:
+            return conn
+        conn = sqlite3.connect(self._path, timeout=self._busy_timeout, isolation_level=None,
+                               check_same_thread=False)
+        conn.execute("PRAGMA auto_vacuum = INCREMENTAL")  # sans effet sur une base existante
+        conn.execute("PRAGMA journal_mode = WAL")
+        conn.execute("PRAGMA synchronous = NORMAL")
+        conn.execute(f"PRAGMA mmap_size = {self._mmap_size}")
+        self._local.conn, self._local.pid = conn, pid
+        if self._pid != pid:
+            self._start_process(conn, pid)
+        return conn
+
+    def _start_process(self, conn, pid):
+        with self._lock:
+            if self._pid == pid:
+                return
+            for statement in SCHEMA:
+                conn.execute(statement)
+            self._pid = pid
+            self._touched = set()
+            if self._compact_interval > 0:
+                self._compactor = threading.Thread(target=self._compact_loop, args=(pid,), daemon=True)
+                self._compactor.start()
+
+    def _compact_loop(self, pid):
+        while self._pid == pid:
+            time.sleep(self._compact_interval)
+            try:
+                self.compact()
+            except sqlite3.Error:
+                # Base occupée : nouvel essai au prochain intervalle
+                pass
+
+    # ====================== VALEURS ======================
+    @staticmethod
+    def _dumps(value):
+        # Les entiers restent des entiers SQLite : incr() se fait en SQL
+        if type(value) is int:
+            return value
+        return pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+
+    @staticmethod
+    def _loads(value):
+        return value if isinstance(value, int) else pickle.loads(value)
+
+    def _touch_later(self, keys):
+        with self._lock:
+            # Borné : sans compacteur, seules les écritures vident cet ensemble
+            if len(self._touched) < self._max_entries:
+                self._touched.update(keys)
+
+    # ====================== API DU CACHE ======================
+    def get(self, key, default=None, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        row = self._connection().execute(
+            f"SELECT value FROM cache WHERE key = ? AND {ALIVE}", (key, time.time())
+        ).fetchone()
+        if row is None:
+            return default
+        self._touch_later([key])
+        return self._loads(row[0])
+
+    def get_many(self, keys, version=None):
+        by_key = {self.make_and_validate_key(key, version=version): key for key in keys}
+        if not by_key:
+            return {}
+        placeholders = ', '.join('?' * len(by_key))
+        rows = self._connection().execute(
+            f"SELECT key, value FROM cache WHERE key IN ({placeholders}) AND {ALIVE}",
+            (*by_key, time.time()),
+        ).fetchall()
+        self._touch_later(key for key, value in rows)
+        return {by_key[key]: self._loads(value) for key, value in rows}
+
+    def has_key(self, key, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        return self._connection().execute(
+            f"SELECT 1 FROM cache WHERE key = ? AND {ALIVE}", (key, time.time())
+        ).fetchone() is not None
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        now = time.time()
+        self._connection().execute(
+            "INSERT INTO cache (key, value, expires, accessed) VALUES (?, ?, ?, ?) "
+            "ON CONFLICT (key) DO UPDATE SET "
+            "value = excluded.value, expires = excluded.expires, accessed = excluded.accessed",
+            (key, self._dumps(value), self.get_backend_timeout(timeout), now),
+        )
+        self._written(1)
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        now = time.time()
+        # Ne remplace qu'une ligne expirée : atomique entre les processus
+        cursor = self._connection().execute(
+            "INSERT INTO cache (key, value, expires, accessed) VALUES (?, ?, ?, ?) "
+            "ON CONFLICT (key) DO UPDATE SET "
+            "value = excluded.value, expires = excluded.expires, accessed = excluded.accessed "
+            "WHERE cache.expires IS NOT NULL AND cache.expires <= ?",
+            (key, self._dumps(value), self.get_backend_timeout(timeout), now, now),
+        )
+        if cursor.rowcount:
+            self._written(1)
+        return cursor.rowcount == 1
+
+    def set_many(self, data, timeout=DEFAULT_TIMEOUT, version=None):
+        expires = self.get_backend_timeout(timeout)
+        now = time.time()
+        rows = [
+            (self.make_and_validate_key(key, version=version), self._dumps(value), expires, now)
+            for key, value in data.items()
+        ]
+        conn = self._connection()
+        with _immediate(conn):
+            conn.executemany(
+                "INSERT INTO cache (key, value, expires, accessed) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT (key) DO UPDATE SET "
+                "value = excluded.value, expires = excluded.expires, accessed = excluded.accessed",
+                rows,
+            )
+        self._written(len(rows))
+        return []
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        cursor = self._connection().execute(
+            f"UPDATE cache SET expires = ? WHERE key = ? AND {ALIVE}",
+            (self.get_backend_timeout(timeout), key, time.time()),
+        )
+        return cursor.rowcount == 1
+
+    def incr(self, key, delta=1, version=None):
+        made_key = self.make_and_validate_key(key, version=version)
+        row = self._connection().execute(
+            f"UPDATE cache SET value = value + ? "
+            f"WHERE key = ? AND typeof(value) = 'integer' AND {ALIVE} RETURNING value",
+            (delta, made_key, time.time()),
+        ).fetchone()
+        if row is not None:
+            return row[0]
+        if not self.has_key(key, version=version):
+            raise ValueError("Key '%s' not found" % key)
+        # Valeur non entière (ex. un float) : lecture / écriture non atomique, comme BaseCache
+        return super().incr(key, delta, version=version)
+
+    def delete(self, key, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        cursor = self._connection().execute("DELETE FROM cache WHERE key = ?", (key,))
+        return cursor.rowcount == 1
+
+    def delete_many(self, keys, version=None):
+        conn = self._connection()
+        with _immediate(conn):
+            conn.executemany(
+                "DELETE FROM cache WHERE key = ?",
+                [(self.make_and_validate_key(key, version=version),) for key in keys],
+            )
+
+    def clear(self):
+        self._connection().execute("DELETE FROM cache")
+
+    # ====================== TAILLE ET COMPACTAGE ======================
+    def _written(self, count):
+        with self._lock:
+            before = self._writes
+            self._writes += count
+        if self._writes // self._cull_every != before // self._cull_every:
+            try:
+                self._cull(self._connection())
+            except sqlite3.Error:
+                # Base occupée : l'écriture a réussi, le nettoyage attendra (compactage ou prochain passage)
+                pass
+
+    def _flush_touched(self, conn):
+        with self._lock:
+            keys, self._touched = self._touched, set()
+        if keys:
+            now = time.time()
+            with _immediate(conn):
+                conn.executemany("UPDATE cache SET accessed = ? WHERE key = ?", [(now, key) for key in keys])
+
+    def _cull(self, conn):
+        """Delete expired rows, then the least recently used ones above MAX_ENTRIES."""
+        self._flush_touched(conn)
+        with _immediate(conn):
+            conn.execute("DELETE FROM cache WHERE expires <= ?", (time.time(),))
+            count = conn.execute("SELECT COUNT(*) FROM cache").fetchone()[0]
+            if count > self._max_entries:
+                # Comme les backends de Django : on libère aussi 1/CULL_FREQUENCY de la place
+                excess = count - self._max_entries + self._max_entries // max(self._cull_frequency, 1)
+                conn.execute(
+                    "DELETE FROM cache WHERE key IN (SELECT key FROM cache ORDER BY accessed LIMIT ?)",
+                    (excess,),
+                )
+
+    def compact(self):
+        """One compactor pass; also usable from a cron job."""
+        conn = self._connection()
+        self._cull(conn)
+        conn.execute("PRAGMA wal_checkpoint(PASSIVE)")
+        conn.execute("PRAGMA incremental_vacuum")
+
+    def entry_count(self):
+        return self._connection().execute(
+            f"SELECT COUNT(*) FROM cache WHERE {ALIVE}", (time.time(),)
+        ).fetchone()[0]
@@ -0,0 +1,162 @@
+# core/caching.py
+"""
+Project-wide helpers on top of Django's cache.
+
+- Namespaces: every namespace has a version number kept in the cache
+  (``ns:<name>``). A key built with ``namespaces=[...]`` contains their
+  versions, so ``bump(name)`` invalidates every entry of the namespace at once;
+  old entries are never read again and simply expire.
+- ``cached(key, compute, ...)``: read-through with stampede protection. An entry
+  remembers how long ``compute`` took and is refreshed *early*, with a
+  probability that grows as it nears its expiry ("XFetch"), so one request
+  usually recomputes it while the others are still served. When an entry is
+  really missing, only the request that takes a short lock (``cache.add``)
+  computes it; the others wait up to CACHE_LOCK_WAIT seconds for its result.
+- Negative caching: ``compute`` returning None is cached too, for
+  CACHE_NEGATIVE_TIMEOUT seconds (e.g. a lookup that found nothing).
+- Hit / miss / refresh counters and compute / read times, per key group (the
+  key up to its first ``:``). They are kept in memory and cover the current
+  process only; see ``stats()``.
+
+The lock and the namespace versions only coordinate workers that share the
+cache backend (CACHES in core/settings.py).
+"""
+import math
+import random
+import threading
+import time
+from collections import Counter, defaultdict
+
+from django.conf import settings
+from django.core.cache import cache
+
+LOCK_POLL_INTERVAL = 0.05
+
+
+# ====================== NAMESPACES ======================
+def _version_key(namespace):
+    return f'ns:{namespace}'
+
+
+def bump(*namespaces):
+    """Invalidate every entry of the given namespaces."""
+    for namespace in namespaces:
+        try:
+            cache.incr(_version_key(namespace))
+        except ValueError:
+            # Version absente (jamais créée ou évincée) : repart d'une valeur jamais utilisée
+            cache.set(_version_key(namespace), time.time_ns(), timeout=None)
+
+
+def versions(namespaces):
+    """The current versions of ``namespaces``, as one string (``'v1.v2'``)."""
+    keys = [_version_key(namespace) for namespace in namespaces]
+    found = cache.get_many(keys)
+    missing = {key: time.time_ns() for key in keys if key not in found}
+    if missing:
+        cache.set_many(missing, timeout=None)
+        found.update(missing)
+    return '.'.join(str(found[key]) for key in keys)
+
+
+def make_key(key, namespaces=()):
+    return f'{key}:{versions(namespaces)}' if namespaces else key
+
+
+# ====================== STATISTIQUES ======================
+_stats_lock = threading.Lock()
+_stats = defaultdict(Counter)
+
+
+def record(key, **values):
+    """Add ``values`` to the counters of the key's group (also used by accounts/objcache.py)."""
+    group = key.split(':', 1)[0]
+    with _stats_lock:
+        _stats[group].update(values)
+
+
+def stats():
+    """
+    ``{group: {...}}`` for this process: hits, misses, negative hits, early
+    refreshes, lock waits, computes, and the average cache read / compute
+    times in ms.
+    """
+    with _stats_lock:
+        snapshot = {group: dict(values) for group, values in _stats.items()}
+    for values in snapshot.values():
+        lookups = values.get('hits', 0) + values.get('misses', 0)
+        computes = values.get('computes', 0)
+        values['hit_rate'] = values.get('hits', 0) / lookups if lookups else 0.0
+        values['read_ms'] = values.pop('read_time', 0.0) * 1000 / lookups if lookups else 0.0
+        values['compute_ms'] = values.pop('compute_time', 0.0) * 1000 / computes if computes else 0.0
+    return snapshot
+
+
+def reset_stats():
+    with _stats_lock:
+        _stats.clear()
+
+
+# ====================== LECTURE / CALCUL ======================
+def _compute_and_store(key, compute, timeout, negative_timeout):
+    started = time.monotonic()
+    value = compute()
+    duration = time.monotonic() - started
+    ttl = timeout if value is not None else negative_timeout
+    # (valeur, expiration, durée du calcul) : la durée règle le rafraîchissement anticipé
+    cache.set(key, (value, time.time() + ttl, duration), ttl)
+    record(key, computes=1, compute_time=duration)
+    return value
+
+
+def _should_refresh_early(expires_at, duration, beta):
+    return time.time() - duration * beta * math.log(random.random() or 1e-12) >= expires_at
+
+
+def cached(key, compute, timeout, namespaces=(), negative_timeout=None, beta=None):
+    """
+    The value cached under ``key`` (in ``namespaces``), or ``compute()``.
+
+    ``compute`` must return a picklable value; None is cached as a negative
+    result for ``negative_timeout`` (CACHE_NEGATIVE_TIMEOUT by default).
+    ``beta`` > 1 refreshes earlier, 0 disables early refresh.
+    """
+    negative_timeout = settings.CACHE_NEGATIVE_TIMEOUT if negative_timeout is None else negative_timeout
+    beta = settings.CACHE_EARLY_REFRESH_BETA if beta is None else beta
+    full_key = make_key(key, namespaces)
+    lock_key = f'lock:{full_key}'
+
+    started = time.monotonic()
+    entry = cache.get(full_key)
+    read_time = time.monotonic() - started
+
+    if entry is not None:
+        value, expires_at, duration = entry
+        # Un seul rafraîchissement à la fois : les autres requêtes gardent l'ancienne valeur
+        if beta and _should_refresh_early(expires_at, duration, beta) \
+                and cache.add(lock_key, 1, settings.CACHE_LOCK_TIMEOUT):
+            try:
+                record(key, refreshes=1, read_time=read_time)
+                return _compute_and_store(full_key, compute, timeout, negative_timeout)
+            finally:
+                cache.delete(lock_key)
+        record(key, hits=1, negative_hits=int(value is None), read_time=read_time)
+        return value
+
+    record(key, misses=1, read_time=read_time)
+    if cache.add(lock_key, 1, settings.CACHE_LOCK_TIMEOUT):
+        try:
+            return _compute_and_store(full_key, compute, timeout, negative_timeout)
+        finally:
+            cache.delete(lock_key)
+
+    # Un autre worker calcule déjà cette valeur : on attend son résultat
+    record(key, lock_waits=1)
+    deadline = time.monotonic() + settings.CACHE_LOCK_WAIT
+    while time.monotonic() < deadline:
+        time.sleep(LOCK_POLL_INTERVAL)
+        entry = cache.get(full_key)
+        if entry is not None:
+            return entry[0]
+    # Trop long (ou verrou orphelin) : calcul sans verrou
+    return _compute_and_store(full_key, compute, timeout, negative_timeout)
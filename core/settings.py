@@ -45,6 +45,7 @@ MIDDLEWARE = [
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'accounts.middleware.UserProfileCacheMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -62,6 +63,8 @@ TEMPLATES = [
                 'django.template.context_processors.request',
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
+                'accounts.context_processors.favorite_recipe_ids',
+                'accounts.context_processors.unread_counts',
             ],
         },
     },
@@ -125,6 +128,111 @@ if not EMAIL_HOST_USER or not EMAIL_HOST_PASSWORD:
     if DEBUG:
         print("⚠️ Email credentials missing in .env – using console backend (emails printed in terminal)")
 
+# ==================== SEARCH ====================
+# Nombre maximum de recettes renvoyées par la recherche (classées par pertinence)
+SEARCH_RESULTS_LIMIT = int(os.getenv('SEARCH_RESULTS_LIMIT', '50'))
+# Recherche approximative (trigrammes) : score minimum et nombre de candidats évalués
+FUZZY_SEARCH_THRESHOLD = 0.3
+FUZZY_SEARCH_CANDIDATES = 200
+# Autocomplétion : nombre de suggestions, et âge max (secondes) de l'index en mémoire
+AUTOCOMPLETE_LIMIT = 8
+AUTOCOMPLETE_MAX_AGE = 15 * 60
+# Durée de cache (secondes) des compteurs de facettes de la liste des recettes
+FACET_CACHE_TIMEOUT = 5 * 60
+# Nombre de recettes similaires (TF-IDF) stockées et affichées par recette
+SIMILAR_RECIPES_COUNT = 6
+# Recommandations "pour vous" : taille de la liste par utilisateur, voisins stockés par recette
+RECOMMENDATIONS_COUNT = 8
+RECOMMENDATION_NEIGHBOURS = 30
+
+# ==================== TRENDING ====================
+# Demi-vie (heures) du score tendance, et nombre de recettes sur /trending/
+TRENDING_HALF_LIFE_HOURS = 72
+TRENDING_LIMIT = 24
+# Recettes "populaires" affichées sur la page d'accueil
+HOME_TRENDING_COUNT = 3
+
+# ==================== VIEW COUNTER ====================
+# Vues des recettes mises en tampon (accounts/viewcounter.py) : écrites au plus tard
+# après VIEW_COUNT_FLUSH_INTERVAL secondes, ou dès VIEW_COUNT_FLUSH_THRESHOLD vues en attente
+VIEW_COUNT_FLUSH_INTERVAL = 10
+VIEW_COUNT_FLUSH_THRESHOLD = 200
+# Une vue par visiteur et par recette sur cette durée (clé en cache, pas en session)
+VIEW_DEDUP_TIMEOUT = 7 * 24 * 3600
+# Durée de vie du cookie qui identifie un visiteur anonyme
+VISITOR_COOKIE_AGE = 365 * 24 * 3600
+
+# ==================== CACHE ====================
+# Par défaut, cache partagé par tous les workers du serveur : base SQLite locale en WAL
+# (core/cache_backends.py, voir manage.py bench_cache). CACHE_BACKEND=locmem : cache en
+# mémoire propre à chaque processus (un seul worker).
+CACHE_BACKEND = os.getenv('CACHE_BACKEND', 'sqlite')
+if CACHE_BACKEND == 'locmem':
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': 'dbara',
+            'TIMEOUT': 300,
+            'OPTIONS': {'MAX_ENTRIES': 10000},
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'core.cache_backends.SQLiteCache',
+            'LOCATION': os.getenv('CACHE_LOCATION', str(BASE_DIR / 'cache.sqlite3')),
+            'TIMEOUT': 300,
+            'OPTIONS': {
+                # Éviction LRU au-delà de MAX_ENTRIES ; compacteur toutes les COMPACT_INTERVAL secondes
+                'MAX_ENTRIES': 50000,
+                'CULL_FREQUENCY': 10,
+                'COMPACT_INTERVAL': 60,
+            },
+        }
+    }
+# core/caching.py : durée max d'un recalcul sous verrou, attente des autres requêtes,
+# durée des résultats négatifs (None), précocité du rafraîchissement anticipé (0 = désactivé)
+CACHE_LOCK_TIMEOUT = 30
+CACHE_LOCK_WAIT = 2.0
+CACHE_NEGATIVE_TIMEOUT = 60
+CACHE_EARLY_REFRESH_BETA = 1.0
+# Statistiques du tableau de bord admin, annuaires (chefs, nutritionnistes), listes de recettes
+ADMIN_STATS_CACHE_TIMEOUT = 5 * 60
+DIRECTORY_CACHE_TIMEOUT = 10 * 60
+RECIPE_LIST_CACHE_TIMEOUT = 5 * 60
+# Objets lus par clé (accounts/objcache.py) : taille du LRU par processus (0 = désactivé),
+# âge maximum d'une entrée (les vues, écrites sans signal, peuvent avoir ce retard)
+OBJECT_CACHE_SIZE = 1000
+OBJECT_CACHE_TIMEOUT = 60
+
+# ==================== PAGE CACHE ====================
+# Pages publiques mises en cache pour les visiteurs anonymes (accounts/pagecache.py)
+PAGE_CACHE_TIMEOUT = 5 * 60
+
+# ==================== FAVORITES ====================
+# Durée de cache (secondes) de l'ensemble des recettes favorites d'un utilisateur
+FAVORITE_IDS_CACHE_TIMEOUT = 60 * 60
+
+# ==================== UNREAD COUNTS ====================
+# Durée de cache (secondes) des compteurs de notifications / messages non lus d'un utilisateur
+UNREAD_COUNTS_CACHE_TIMEOUT = 60 * 60
+
+# ==================== PAGINATION ====================
+# Pagination par curseur : taille de page par défaut, maximum accepté via ?size=
+PAGINATION_PAGE_SIZE = 12
+PAGINATION_MAX_PAGE_SIZE = 100
+ADMIN_RECIPES_PAGE_SIZE = 50
+# Commentaires d'une recette : par page, réponses affichées par fil, réponses par "voir plus"
+COMMENTS_PAGE_SIZE = 20
+COMMENT_REPLIES_PREVIEW = 3
+COMMENT_REPLIES_PAGE_SIZE = 20
+# Notes individuelles affichées par page sur la fiche recette
+RATINGS_PAGE_SIZE = 10
+
+# ==================== MODERATION ====================
+# Similarité (Jaccard estimée par MinHash) à partir de laquelle une recette est signalée comme doublon
+DUPLICATE_SIMILARITY_THRESHOLD = 0.7
+
 # ==================== GEMINI API KEY ====================
 GEMINI_API_KEY = os.getenv('GEMINI_API_KEY')
 
@@ -14,3 +14,7 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'core.settings')
 
 application = get_wsgi_application()
+
+# Charge l'index d'autocomplétion au démarrage du worker
+from accounts import autocomplete  # noqa: E402
+autocomplete.warm_up()